@@ -25,10 +25,14 @@ class CaptureAgent(BaseAgent):
         # Maze distance calculator
         self.distancer = None
 
+        # The structure of the maze (see `pacai.core.topology.Topology`).
+        self.topology = None
+
         # A history of observations
         self.observationHistory = []
 
-        # Time to spend each turn on computing maze distances
+        # Time (in seconds) to wait for maze distances when registering the initial state.
+        # Distances that are not done by then continue to be computed in the background.
         self.timeForComputing = timeForComputing
 
     def registerInitialState(self, gameState):
@@ -39,8 +43,11 @@ class CaptureAgent(BaseAgent):
 
         self.red = gameState.isOnRedTeam(self.index)
         self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout())
+        self.topology = gameState.getInitialLayout().getTopology()
 
-        self.distancer.getMazeDistances()
+        # Exact distances are available right away, even before the full table is done.
+        self.distancer.getMazeDistances(background = True)
+        self.distancer.waitForMazeDistances(self.timeForComputing)
 
     def final(self, gameState):
         self.observationHistory = []
@@ -86,7 +93,7 @@ class CaptureAgent(BaseAgent):
     def getFood(self, gameState):
         """
         Returns the food you're meant to eat.
-        This is in the form of a `pacai.core.grid.Grid`
+        This is in the form of a read-only `pacai.core.grid.Grid`
         where `m[x][y] = True` if there is food you can eat (based on your team) in that square.
         """
 
@@ -98,7 +105,7 @@ class CaptureAgent(BaseAgent):
     def getFoodYouAreDefending(self, gameState):
         """
         Returns the food you're meant to protect (i.e., that your opponent is supposed to eat).
-        This is in the form of a `pacai.core.grid.Grid`
+        This is in the form of a read-only `pacai.core.grid.Grid`
         where `m[x][y] = True` if there is food at (x, y) that your opponent can eat.
         """
 
@@ -119,6 +126,16 @@ class CaptureAgent(BaseAgent):
         else:
             return gameState.getBlueCapsules()
 
+    def getHomeBorder(self):
+        """
+        Returns the cells on your side of the border that lead over to the opponent's side.
+        """
+
+        if (self.red):
+            return self.topology.getRedBorder()
+        else:
+            return self.topology.getBlueBorder()
+
     def getOpponents(self, gameState):
         """
         Returns agent indices of your opponents. This is the list of the numbers
@@ -11,6 +11,9 @@ from pacai.core.search.problem import SearchProblem
 from pacai.student.search import depthFirstSearch
 from pacai.util import reflection
 
+# The module that holds the searches that can be picked without a fully qualified name.
+SEARCH_ENGINE_MODULE = 'pacai.core.search.engine'
+
 class SearchAgent(BaseAgent):
     """
     A general search agent that finds a path using a supplied search algorithm for a
@@ -65,7 +68,7 @@ class SearchAgent(BaseAgent):
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem.
 
-        self._actions = self.searchFunction(problem)  # Find a path.
+        self._actions = problem.expandActions(self.searchFunction(problem))  # Find a path.
         self._actionIndex = 0
 
         totalCost = problem.actionsCost(self._actions)
@@ -94,11 +97,16 @@ class SearchAgent(BaseAgent):
     def _fetchSearchFunction(self, functionName: str, heuristic: Union[str, Callable]):
         """
         Get the specified search function by name.
+        Names that are not fully qualified (e.g. "astar") are searches from
+        `pacai.core.search.engine`.
         If that function also takes a heurisitc (i.e. has a parameter called "heuristic"),
         then return a lambda that binds the heuristic to the function.
         """
 
         # Locate the function.
+        if ('.' not in functionName):
+            functionName = SEARCH_ENGINE_MODULE + '.' + functionName
+
         function = reflection.qualifiedImport(functionName)
 
         # Check if the function has a heuristic.
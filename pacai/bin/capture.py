@@ -15,21 +15,22 @@ from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
-from pacai.core.distance import manhattan
+from pacai.core.agentstate import HALF_STEP
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
+from pacai.core.grid import ReadOnlyGrid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
+from pacai.core.layout import registerLayout
 from pacai.ui.capture.null import CaptureNullView
 from pacai.ui.capture.text import CaptureTextView
 from pacai.util import reflection
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
 from pacai.util.mazeGenerator import generateMaze
-from pacai.util.util import nearestPoint
 
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill
+COLLISION_HALF_STEPS = int(COLLISION_TOLERANCE / HALF_STEP)  # The same, in half steps.
 
 KILL_POINTS = 0
 FOOD_POINTS = 1  # Points for eating food.
@@ -78,18 +79,15 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        # Each team's food is not stored separately,
+        # it is the food grid masked with the side of the board (see getRedFood()).
+        # The masked grids are built on demand and cached until that team's food is eaten.
+        self._redFoodView = self._maskFood(layout.getRedSideMask())
+        self._blueFoodView = self._maskFood(layout.getBlueSideMask())
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
-
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        # Running counts of each team's food.
+        self._numRedFood = self._redFoodView.count()
+        self._numBlueFood = self._blueFoodView.count()
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -124,16 +122,17 @@ class CaptureGameState(AbstractGameState):
 
     # Override
     def eatFood(self, x, y):
-        if (not self._foodCopied):
-            self._redFood = self._redFood.copy()
-            self._blueFood = self._blueFood.copy()
-
-        super().eatFood(x, y)
+        if (not super().eatFood(x, y)):
+            return False
 
         if (self.isOnRedSide((x, y))):
-            self._redFood[x][y] = False
+            self._redFoodView = None
+            self._numRedFood -= 1
         else:
-            self._blueFood[x][y] = False
+            self._blueFoodView = None
+            self._numBlueFood -= 1
+
+        return True
 
     def getBlueCapsules(self):
         """
@@ -148,10 +147,14 @@ class CaptureGameState(AbstractGameState):
         Returns a grid of food that corresponds to the food on the blue team's side.
         For the grid g, g[x][y] = True if there is food in (x, y) that belongs to
         blue (meaning blue is protecting it, red is trying to eat it).
-        The caller should not modify the grid.
+        The returned grid is a read-only view that shares storage with this state.
         """
 
-        return self._blueFood
+        if (self._blueFoodView is None):
+            self._blueFoodView = self._maskFood(self._layout.getBlueSideMask(),
+                    self._numBlueFood)
+
+        return self._blueFoodView
 
     def getBlueTeamIndices(self):
         """
@@ -161,6 +164,36 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueTeam
 
+    def getNumBlueCapsules(self):
+        """
+        Get the number of capsules left on the blue side.
+        """
+
+        return len(self._blueCapsules)
+
+    def getNumBlueFood(self):
+        """
+        Get the amount of food left on the blue side.
+        This is a constant time operation.
+        """
+
+        return self._numBlueFood
+
+    def getNumRedCapsules(self):
+        """
+        Get the number of capsules left on the red side.
+        """
+
+        return len(self._redCapsules)
+
+    def getNumRedFood(self):
+        """
+        Get the amount of food left on the red side.
+        This is a constant time operation.
+        """
+
+        return self._numRedFood
+
     def getRedCapsules(self):
         """
         Get a list of remaining capsules on the red side.
@@ -174,10 +207,13 @@ class CaptureGameState(AbstractGameState):
         Returns a grid of food that corresponds to the food on the red team's side.
         For the grid g, g[x][y] = True if there is food in (x, y) that belongs to
         red (meaning red is protecting it, blue is trying to eat it).
-        The caller should not modify the grid.
+        The returned grid is a read-only view that shares storage with this state.
         """
 
-        return self._redFood
+        if (self._redFoodView is None):
+            self._redFoodView = self._maskFood(self._layout.getRedSideMask(), self._numRedFood)
+
+        return self._redFoodView
 
     def getRedTeamIndices(self):
         """
@@ -232,13 +268,32 @@ class CaptureGameState(AbstractGameState):
         # Find appropriate rules for the agent.
         AgentRules.applyAction(self, action, agentIndex)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
         self._timeleft -= 1
 
-        self._hash = None
+    def _maskFood(self, mask, count = None):
+        food = self._food
+        return ReadOnlyGrid.fromBits(food.getWidth(), food.getHeight(), food.getBits() & mask,
+                count)
+
+    # Override
+    def _restoreUndoRecord(self, record):
+        baseRecord, self._timeleft, foodRecord, capsuleRecord = record
+
+        self._redFoodView, self._blueFoodView, self._numRedFood, self._numBlueFood = foodRecord
+        self._redCapsules, self._blueCapsules = capsuleRecord
+
+        super()._restoreUndoRecord(baseRecord)
+
+    # Override
+    def _saveUndoRecord(self):
+        foodRecord = (self._redFoodView, self._blueFoodView, self._numRedFood, self._numBlueFood)
+        capsuleRecord = (self._redCapsules, self._blueCapsules)
+
+        return (super()._saveUndoRecord(), self._timeleft, foodRecord, capsuleRecord)
 
 class CaptureRules:
     """
@@ -255,8 +310,8 @@ class CaptureRules:
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getNumBlueFood()
+        self._totalRedFood = initState.getNumRedFood()
 
         return game
 
@@ -279,10 +334,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getNumRedFood() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getNumBlueFood() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -343,7 +398,7 @@ class AgentRules:
 
         agentState = state.getAgentState(agentIndex)
         return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+                state.getWalls(), state.getInitialLayout().getMoveTable())
 
     @staticmethod
     def applyAction(state, action, agentIndex):
@@ -351,24 +406,32 @@ class AgentRules:
         Edits the state to reflect the results of the action.
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
-        if (action not in legal):
-            raise ValueError('Illegal action: ' + str(action))
+        agentState = state.getMutableAgentState(agentIndex)
 
-        agentState = state.getAgentState(agentIndex)
+        # The rules work with action codes, agents hand in actions.
+        code = Actions.getActionCode(action)
+
+        legal = None
+        if (code is not None):
+            moveTable = state.getInitialLayout().getMoveTable()
+            legal = moveTable.isLegalCode(agentState.getPosition(), code)
+
+            if (legal is None):
+                legal = (action in AgentRules.getLegalActions(state, agentIndex))
+
+        if (not legal):
+            raise ValueError('Illegal action: ' + str(action))
 
         # Update position.
-        vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
-        agentState.updatePosition(vector)
+        agentState.updatePositionByCode(code, AgentRules.AGENT_SPEED)
 
-        # Eat.
-        nextPosition = agentState.getPosition()
-        nearest = nearestPoint(nextPosition)
-        if (agentState.isPacman() and manhattan(nearest, nextPosition) <= 0.9):
-            AgentRules.consume(nearest, state, state.isOnRedTeam(agentIndex))
+        # Eat (if the agent is within half a step of a grid point).
+        if (agentState.isPacman() and agentState.getHalfStepsToNearestPoint() <= 1):
+            AgentRules.consume(agentState.getNearestPosition(), state,
+                    state.isOnRedTeam(agentIndex))
 
         # Potentially change agent type.
-        if (nextPosition == nearest):
+        if (agentState.isOnGridPoint()):
             # Agents are pacmen when they are not on their own side.
             position = agentState.getPosition()
             agentState.setIsPacman(state.isOnRedTeam(agentIndex) != state.isOnRedSide(position))
@@ -392,8 +455,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getNumBlueFood() <= MIN_FOOD)
+                    or (not isRed and state.getNumRedFood() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -414,7 +477,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state.getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -444,21 +507,18 @@ class AgentRules:
             if (agentState.isPacman() == otherAgentState.isPacman()):
                 continue
 
-            otherPosition = otherAgentState.getPosition()
-
             # Ignore other agents that are too far away.
-            if (otherPosition is None
-                    or manhattan(otherPosition, agentState.getPosition()) > COLLISION_TOLERANCE):
+            if (agentState.getHalfStepDistance(otherAgentState) > COLLISION_HALF_STEPS):
                 continue
 
             # If we are a brave ghost or they are a scared ghost, then we will eat them.
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state.getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
-                agentState.respawn()
+                state.getMutableAgentState(agentIndex).respawn()
 
 #############################
 # FRAMEWORK TO START A GAME #
@@ -624,7 +684,7 @@ def readCommand(argv):
         if (options.layout != 'RANDOM'):
             layoutSeed = int(options.layout[6:])
 
-        args['layout'] = Layout(generateMaze(layoutSeed).split('\n'))
+        args['layout'] = registerLayout(Layout(generateMaze(layoutSeed).split('\n')))
     elif options.layout.lower().find('capture') == -1:
         raise ValueError('You must use a capture layout with capture.py.')
     else:
@@ -669,9 +729,9 @@ def replayGame(layout, agents, actions, display, length, redTeamName, blueTeamNa
     display.blueTeam = blueTeamName
     display.initialize(state)
 
-    for action in actions:
+    for agentIndex, action in actions:
         # Execute the action
-        state = state.generateSuccessor(*action)
+        state = state.generateSuccessor(agentIndex, Actions.codeToAction(action))
         # Change the display
         display.update(state)
         # Allow for game specific conditions (winning, losing, etc.)
@@ -0,0 +1,98 @@
+"""
+Compile text layouts (`.lay`) into the binary format of `pacai.core.compiledlayout`.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+
+from pacai.core import compiledlayout
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import Layout
+from pacai.core.layout import parseLayoutSource
+from pacai.util.logs import initLogging
+
+def compileLayout(path):
+    """
+    Compile a single text layout, writing the compiled layout next to it.
+    Returns the path of the compiled layout.
+    """
+
+    with open(path, 'rb') as file:
+        source = file.read()
+
+    layout = Layout(parseLayoutSource(source))
+
+    compiledPath = compiledlayout.getCompiledPath(path)
+    compiledlayout.writeCompiledLayout(compiledPath, layout, source)
+
+    return compiledPath
+
+def compileLayouts(paths):
+    """
+    Compile all the given layout files and all the layouts in the given directories.
+    Returns the paths of the compiled layouts.
+    """
+
+    compiledPaths = []
+
+    for path in paths:
+        if (os.path.isdir(path)):
+            layoutPaths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                    if name.endswith('.lay')]
+        else:
+            layoutPaths = [path]
+
+        for layoutPath in layoutPaths:
+            compiledPaths.append(compileLayout(layoutPath))
+            logging.debug('Compiled layout: %s', layoutPath)
+
+    return compiledPaths
+
+def readCommand(argv):
+    """
+    Processes the command used to compile layouts from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program compiles text layouts into a binary format that loads faster.
+        Compiled layouts are written next to their text layouts,
+        and are used automatically while they are up to date.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.compilelayouts
+            - Compiles all the layouts that ship with pacai.
+        (2) python -m pacai.bin.compilelayouts myLayouts/ extra.lay
+            - Compiles all the layouts in a directory and a single layout.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('paths', metavar = 'PATH',
+            action = 'store', type = str, nargs = '*', default = [DEFAULT_LAYOUT_DIR],
+            help = 'layout files or directories of layouts to compile'
+                + ' (default: the pacai layout directory)')
+
+    return parser.parse_args(argv)
+
+def main(argv):
+    """
+    Entry point for compiling layouts.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    options = readCommand(argv)
+    compiledPaths = compileLayouts(options.paths)
+
+    logging.info('Compiled %d layouts.', len(compiledPaths))
+
+    return compiledPaths
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -18,6 +18,7 @@ from pacai.agents.ghost.random import RandomGhost
 from pacai.agents.greedy import GreedyAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
+from pacai.core.agentstate import HALF_STEP
 from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
@@ -27,12 +28,12 @@ from pacai.ui.pacman.null import PacmanNullView
 from pacai.ui.pacman.text import PacmanTextView
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
-from pacai.util.util import nearestPoint
 
 PACMAN_AGENT_INDEX = 0
 
 SCARED_TIME = 40  # The number of moves that ghosts are scared for.
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill.
+COLLISION_HALF_STEPS = int(COLLISION_TOLERANCE / HALF_STEP)  # The same, in half steps.
 
 TIME_PENALTY = 1  # Number of points lost each round.
 FOOD_POINTS = 10  # Points for eating food.
@@ -134,7 +135,7 @@ class PacmanGameState(AbstractGameState):
             # Penalty for waiting around.
             self.addScore(-TIME_PENALTY)
         else:
-            GhostRules.decrementTimer(self.getAgentState(agentIndex))
+            GhostRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects.
         GhostRules.checkDeath(self, agentIndex)
@@ -142,8 +143,6 @@ class PacmanGameState(AbstractGameState):
         # Book keeping.
         self._lastAgentMoved = agentIndex
 
-        self._hash = None
-
 class ClassicGameRules(object):
     """
     These game rules manage the control flow of a game, deciding when
@@ -218,7 +217,7 @@ class PacmanRules:
 
         agentState = state.getPacmanState()
         return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+                state.getWalls(), state.getInitialLayout().getMoveTable())
 
     @staticmethod
     def applyAction(state, action):
@@ -226,22 +225,29 @@ class PacmanRules:
         Edits the state to reflect the results of the action.
         """
 
-        legal = PacmanRules.getLegalActions(state)
-        if (action not in legal):
-            raise ValueError('Illegal pacman action: ' + str(action))
+        pacmanState = state.getMutableAgentState(PACMAN_AGENT_INDEX)
 
-        pacmanState = state.getPacmanState()
+        # The rules work with action codes, agents hand in actions.
+        code = Actions.getActionCode(action)
+
+        legal = None
+        if (code is not None):
+            moveTable = state.getInitialLayout().getMoveTable()
+            legal = moveTable.isLegalCode(pacmanState.getPosition(), code)
+
+            if (legal is None):
+                legal = (action in PacmanRules.getLegalActions(state))
+
+        if (not legal):
+            raise ValueError('Illegal pacman action: ' + str(action))
 
         # Update position.
-        vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
-        pacmanState.updatePosition(vector)
+        pacmanState.updatePositionByCode(code, PacmanRules.PACMAN_SPEED)
 
-        # Eat.
-        nextPosition = pacmanState.getPosition()
-        nearest = nearestPoint(nextPosition)
-        if (manhattan(nearest, nextPosition) <= 0.5):
+        # Eat (if pacman is within half a step of a grid point).
+        if (pacmanState.getHalfStepsToNearestPoint() <= 1):
             # Remove food
-            PacmanRules.consume(nearest, state)
+            PacmanRules.consume(pacmanState.getNearestPosition(), state)
 
     @staticmethod
     def consume(position, state):
@@ -260,8 +266,8 @@ class PacmanRules:
             state.eatCapsule(x, y)
 
             # Reset all ghosts' scared timers.
-            for ghostState in state.getGhostStates():
-                ghostState.setScaredTimer(SCARED_TIME)
+            for ghostIndex in state.getGhostIndexes():
+                state.getMutableAgentState(ghostIndex).setScaredTimer(SCARED_TIME)
 
 class GhostRules:
     """
@@ -278,31 +284,47 @@ class GhostRules:
         """
 
         agentState = state.getGhostState(ghostIndex)
+
+        moveTable = state.getInitialLayout().getMoveTable()
+        possibleActions = moveTable.getGhostActionsByCode(agentState.getPosition(),
+                agentState.getDirectionCode())
+        if (possibleActions is not None):
+            return list(possibleActions)
+
         possibleActions = Actions.getPossibleActions(agentState.getPosition(),
                 agentState.getDirection(), state.getWalls())
         reverse = Actions.reverseDirection(agentState.getDirection())
 
-        if (Directions.STOP in possibleActions):
-            possibleActions.remove(Directions.STOP)
-
-        if (reverse in possibleActions and len(possibleActions) > 1):
-            possibleActions.remove(reverse)
+        possibleActions = [action for action in possibleActions if action != Directions.STOP]
+        if (len(possibleActions) > 1):
+            possibleActions = [action for action in possibleActions if action != reverse]
 
         return possibleActions
 
     @staticmethod
     def applyAction(state, action, ghostIndex):
-        legal = GhostRules.getLegalActions(state, ghostIndex)
-        if (action not in legal):
+        ghostState = state.getMutableAgentState(ghostIndex)
+
+        # The rules work with action codes, agents hand in actions.
+        code = Actions.getActionCode(action)
+
+        legal = None
+        if (code is not None):
+            moveTable = state.getInitialLayout().getMoveTable()
+            legal = moveTable.isLegalGhostCode(ghostState.getPosition(),
+                    ghostState.getDirectionCode(), code)
+
+            if (legal is None):
+                legal = (action in GhostRules.getLegalActions(state, ghostIndex))
+
+        if (not legal):
             raise ValueError('Illegal ghost action: ' + str(action))
 
-        ghostState = state.getGhostState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if (ghostState.isScared()):
             speed /= 2.0
 
-        vector = Actions.directionToVector(action, speed)
-        ghostState.updatePosition(vector)
+        ghostState.updatePositionByCode(code, speed)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -316,24 +338,22 @@ class GhostRules:
 
     @staticmethod
     def checkDeath(state, agentIndex):
-        pacmanPosition = state.getPacmanPosition()
+        pacmanState = state.getPacmanState()
 
         # Did pacman just move?
         if (agentIndex == PACMAN_AGENT_INDEX):
             # See if a ghost can kill pacman.
             for index in state.getGhostIndexes():
                 ghostState = state.getGhostState(index)
-                ghostPosition = ghostState.getPosition()
 
-                if (GhostRules.canKill(pacmanPosition, ghostPosition)):
+                if (pacmanState.getHalfStepDistance(ghostState) <= COLLISION_HALF_STEPS):
                     GhostRules.collide(state, ghostState, index)
 
             return
         else:
             # A ghost just moved.
             ghostState = state.getGhostState(agentIndex)
-            ghostPosition = ghostState.getPosition()
-            if (GhostRules.canKill(pacmanPosition, ghostPosition)):
+            if (pacmanState.getHalfStepDistance(ghostState) <= COLLISION_HALF_STEPS):
                 GhostRules.collide(state, ghostState, agentIndex)
 
     @staticmethod
@@ -341,7 +361,7 @@ class GhostRules:
         if (ghostState.isScared()):
             # Pacman ate a ghost.
             state.addScore(GHOST_POINTS)
-            ghostState.respawn()
+            state.getMutableAgentState(agentIndex).respawn()
         elif (not state.isOver()):
             # A ghost ate pacman.
             state.addScore(LOSE_POINTS)
@@ -499,9 +519,9 @@ def replayGame(layout, actions, display):
     state = game.state
     display.initialize(state)
 
-    for action in actions:
+    for agentIndex, action in actions:
         # Execute the action
-        state = state.generateSuccessor(*action)
+        state = state.generateSuccessor(agentIndex, Actions.codeToAction(action))
 
         # Change the display
         display.update(state)
@@ -4,6 +4,11 @@ class Actions:
     """
     A collection of static methods for manipulating move actions.
     An action is just a `pacai.core.directions.Directions`.
+
+    Internally, the engine also identifies actions by small integer codes
+    (see `Actions.actionToCode`, `Actions.codeToAction`, and `Actions.codeToVector`).
+    Codes are used for indexing (e.g. in `pacai.core.movetable.MoveTable`) and in recorded games.
+    Agents only ever see and return the string constants in `pacai.core.directions.Directions`.
     """
 
     # Directions
@@ -17,20 +22,71 @@ class Actions:
 
     _directionsAsList = sorted(list(_directions.items()))
 
+    # Action codes are the index of the action in _directionsAsList.
+    _codeToAction = tuple(action for action, vector in _directionsAsList)
+    _actionToCode = {action: code for code, action in enumerate(_codeToAction)}
+
+    # The (unit) movement vector of every action code.
+    _codeToVector = tuple(vector for action, vector in _directionsAsList)
+
+    NUM_ACTION_CODES = len(_codeToAction)
+    STOP_CODE = _actionToCode[Directions.STOP]
+
     TOLERANCE = 0.001
 
+    @staticmethod
+    def actionToCode(action):
+        """
+        Get the integer code for an action.
+        Raises a ValueError if the action is not known.
+        """
+
+        code = Actions.getActionCode(action)
+        if (code is None):
+            raise ValueError('Unknown action: ' + str(action))
+
+        return code
+
+    @staticmethod
+    def codeToAction(code):
+        """
+        Get the action for an integer code.
+        For compatibility with games recorded before actions were coded,
+        actions (strings) are passed through unchanged.
+        """
+
+        if (isinstance(code, str)):
+            return code
+
+        return Actions._codeToAction[code]
+
+    @staticmethod
+    def codeToVector(code):
+        """
+        Get the (unit) movement vector for an integer code.
+        """
+
+        return Actions._codeToVector[code]
+
+    @staticmethod
+    def getActionCode(action):
+        """
+        Get the integer code for an action, or None if the action is not known.
+        """
+
+        return Actions._actionToCode.get(action)
+
+    @staticmethod
+    def getCodedActions():
+        """
+        Get every action, indexed by its integer code.
+        """
+
+        return Actions._codeToAction
+
     @staticmethod
     def reverseDirection(action):
-        if (action == Directions.NORTH):
-            return Directions.SOUTH
-        elif (action == Directions.SOUTH):
-            return Directions.NORTH
-        elif (action == Directions.EAST):
-            return Directions.WEST
-        elif (action == Directions.WEST):
-            return Directions.EAST
-        else:
-            return action
+        return Directions.REVERSE.get(action, action)
 
     @staticmethod
     def vectorToDirection(vector):
@@ -52,7 +108,18 @@ class Actions:
         return (dx * speed, dy * speed)
 
     @staticmethod
-    def getPossibleActions(position, direction, walls):
+    def getPossibleActions(position, direction, walls, moveTable = None):
+        """
+        Get all the actions an agent at the given position (facing the given direction) can take.
+        If a `pacai.core.movetable.MoveTable` for the walls is supplied,
+        then agents on a grid point are looked up instead of recomputed.
+        """
+
+        if (moveTable is not None):
+            possible = moveTable.getLegalActions(position)
+            if (possible is not None):
+                return list(possible)
+
         x, y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
 
@@ -72,7 +139,18 @@ class Actions:
         return possible
 
     @staticmethod
-    def getLegalNeighbors(position, walls):
+    def getLegalNeighbors(position, walls, moveTable = None):
+        """
+        Get all the open cells (including the current one) reachable with a single action.
+        If a `pacai.core.movetable.MoveTable` for the walls is supplied,
+        then agents on a grid point are looked up instead of recomputed.
+        """
+
+        if (moveTable is not None):
+            neighbors = moveTable.getNeighbors(position)
+            if (neighbors is not None):
+                return list(neighbors)
+
         x, y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
 
@@ -2,6 +2,9 @@ from pacai.core.actions import Actions
 from pacai.core.directions import Directions
 from pacai.util import util
 
+# Positions are stored internally as integer multiples of this step.
+HALF_STEP = 0.5
+
 class AgentState:
     """
     This class hold the state of an agent (position, direction, scared, etc).
@@ -9,45 +12,121 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Agents only ever move in whole or half steps (scared ghosts move at half speed),
+    so positions are stored internally as integer counts of half steps
+    (see `AgentState.getHalfPosition`).
+    This keeps hashing, equality, and collision checks in pure integer arithmetic.
+    `AgentState.getPosition` still returns the usual (x, y) position,
+    with ints for grid points and floats for positions between grid points.
+
+    Agent states are shared between a game state and its successors until they are modified
+    (see `pacai.core.gamestate.AbstractGameState.getMutableAgentState`),
+    so callers that got an agent state from a game state should treat it as read-only.
     """
 
-    def __init__(self, position, direction, isPacman):
-        # Save the starting information for later use.
-        self._startPosition = position
-        self._startDirection = direction
-        self._startIsPacman = isPacman
+    __slots__ = ('_start', '_halfPosition', '_position', '_direction', '_directionCode',
+            '_isPacman', '_scaredTimer', '_hash')
 
-        self._position = position
+    def __init__(self, position, direction, isPacman):
+        self._setPosition(_toHalf(position[0]), _toHalf(position[1]))
         self._direction = direction
 
+        # The action code of the direction (see `pacai.core.actions.Actions.actionToCode`).
+        self._directionCode = Actions.getActionCode(direction)
+
+        # Save the starting information for later use.
+        # This never changes, so copies share it.
+        self._start = (self._halfPosition, self._position, direction, self._directionCode,
+                isPacman)
+
         self._isPacman = isPacman
         self._scaredTimer = 0
 
+        # The hash is cached and cleared by any method that changes the state.
+        self._hash = None
+
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        # Skip __init__, every field is about to be set.
+        state = AgentState.__new__(AgentState)
 
+        state._start = self._start
         state._isPacman = self._isPacman
+        state._halfPosition = self._halfPosition
         state._position = self._position
         state._direction = self._direction
+        state._directionCode = self._directionCode
         state._scaredTimer = self._scaredTimer
+        state._hash = self._hash
 
         return state
 
     def decrementScaredTimer(self):
         self._scaredTimer = max(0, self._scaredTimer - 1)
+        self._hash = None
 
     def getDirection(self):
         return self._direction
 
-    def getPosition(self):
-        return self._position
+    def getDirectionCode(self):
+        """
+        Get the action code (see `pacai.core.actions.Actions.actionToCode`)
+        of the direction this agent is facing.
+        """
+
+        return self._directionCode
+
+    def getHalfPosition(self):
+        """
+        Get the position of this agent measured in (integer) half steps.
+        E.g. a position of (3, 4.5) is (6, 9) in half steps.
+        """
+
+        return self._halfPosition
+
+    def getHalfStepDistance(self, other):
+        """
+        Get the manhattan distance (in half steps) between this agent and another agent.
+        """
+
+        x1, y1 = self._halfPosition
+        x2, y2 = other._halfPosition
+
+        return abs(x1 - x2) + abs(y1 - y2)
+
+    def getHalfStepsToNearestPoint(self):
+        """
+        Get the manhattan distance (in half steps) between this agent and
+        the grid point closest to it.
+        """
+
+        x, y = self._halfPosition
+        return (x & 1) + (y & 1)
 
     def getNearestPosition(self):
-        return util.nearestPoint(self._position)
+        """
+        Get the grid point closest to this agent.
+        This is the same as `pacai.util.util.nearestPoint` on the agent's position.
+        """
+
+        x, y = self._halfPosition
+        return ((x + 1) >> 1, (y + 1) >> 1)
+
+    def getPosition(self):
+        return self._position
 
     def getScaredTimer(self):
         return self._scaredTimer
 
+    def getTruncatedPosition(self):
+        """
+        Get the position of this agent with each component truncated to an int
+        (the same as calling int() on each component of the position).
+        """
+
+        x, y = self._halfPosition
+        return (_truncateHalf(x), _truncateHalf(y))
+
     def isBraveGhost(self):
         """
         A ghost that is not scared.
@@ -58,6 +137,14 @@ class AgentState:
     def isGhost(self):
         return not self.isPacman()
 
+    def isOnGridPoint(self):
+        """
+        Returns true if this agent is exactly on a grid point (not between two points).
+        """
+
+        x, y = self._halfPosition
+        return not ((x | y) & 1)
+
     def isPacman(self):
         return self._isPacman
 
@@ -69,53 +156,94 @@ class AgentState:
 
     def setIsPacman(self, isPacman):
         self._isPacman = isPacman
+        self._hash = None
 
     def setScaredTimer(self, timer):
         self._scaredTimer = timer
+        self._hash = None
 
     def snapToNearestPoint(self):
         """
         Move the agent to the nearest point to its current location.
         """
 
-        self._position = util.nearestPoint(self._position)
+        x, y = self.getNearestPosition()
+        self._setPosition(x << 1, y << 1)
+        self._hash = None
 
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
-        self._direction = self._startDirection
-        self._isPacman = self._startIsPacman
+        start = self._start
+        self._halfPosition, self._position, self._direction, self._directionCode = start[:4]
+        self._isPacman = start[4]
         self._scaredTimer = 0
+        self._hash = None
 
     def updatePosition(self, vector):
         """
         Update the position and direction with the given movement vector.
+        Movement is kept to a resolution of half a step.
         """
 
-        x, y = self._position
+        x, y = self._halfPosition
         dx, dy = vector
 
-        self._position = (x + dx, y + dy)
+        self._setPosition(x + _toHalf(dx), y + _toHalf(dy))
 
         direction = Actions.vectorToDirection(vector)
         if (direction != Directions.STOP):
             # If this is a zero vector, face the same direction as before.
             self._direction = direction
+            self._directionCode = Actions.actionToCode(direction)
+
+        self._hash = None
+
+    def updatePositionByCode(self, code, speed):
+        """
+        Move the agent by an action (given by its code, see `pacai.core.actions.Actions`)
+        at the given speed, and face the direction of the action.
+        This is the same as `AgentState.updatePosition` with the action's vector,
+        without converting between vectors and directions.
+        """
+
+        x, y = self._halfPosition
+        dx, dy = Actions.codeToVector(code)
+        halfSteps = _toHalf(speed)
+
+        self._setPosition(x + dx * halfSteps, y + dy * halfSteps)
+
+        if (code != Actions.STOP_CODE):
+            self._direction = Actions.codeToAction(code)
+            self._directionCode = code
+
+        self._hash = None
+
+    def _setPosition(self, x, y):
+        """
+        Set the position (in half steps).
+        """
+
+        self._halfPosition = (x, y)
+        self._position = (_fromHalf(x), _fromHalf(y))
 
     def __eq__(self, other):
         if (other is None):
             return False
 
-        return (self._position == other._position
+        return (self._halfPosition == other._halfPosition
                 and self._direction == other._direction
                 and self._isPacman == other._isPacman
                 and self._scaredTimer == other._scaredTimer)
 
     def __hash__(self):
-        return util.buildHash(self._position, self._direction, self._isPacman, self._scaredTimer)
+        if (self._hash is None):
+            self._hash = util.buildHash(self._halfPosition, self._direction, self._isPacman,
+                    self._scaredTimer)
+
+        return self._hash
 
     def __str__(self):
         typeString = 'Ghost'
@@ -127,4 +255,20 @@ class AgentState:
             scaredString = '!'
 
         return "%s%s: Position: %s, Direction: %s" % (typeString, scaredString,
-                str(self._position), str(self.direction))
+                str(self._position), str(self._direction))
+
+def _toHalf(value):
+    return int(round(value / HALF_STEP))
+
+def _fromHalf(value):
+    if (value & 1):
+        return value * HALF_STEP
+
+    return value >> 1
+
+def _truncateHalf(value):
+    # int() truncates towards zero.
+    if (value < 0):
+        return -((-value) >> 1)
+
+    return value >> 1
@@ -0,0 +1,192 @@
+"""
+A compiled (binary) form of layout files.
+
+Parsing a `.lay` file walks every character of the board in Python.
+A compiled layout (`.layc`) stores the already parsed board as packed bitmaps,
+so loading one is a handful of slices out of a memory-mapped file.
+Compiled layouts live next to the text layout they were compiled from,
+and `pacai.core.layout.getLayout` uses them automatically when they are up to date.
+Layouts can be compiled with `pacai.bin.compilelayouts`.
+
+File format (all integers are little-endian):
+```
+    header (see HEADER_FORMAT):
+        magic, version, width, height, number of capsules, number of agents, flags,
+        length of the layout text, SHA-1 of the source text file
+    walls bitmap (see `pacai.core.grid.Grid.getBits`), ceil(width * height / 8) bytes
+    food bitmap, ceil(width * height / 8) bytes
+    capsules, (x, y) as two uint16 each
+    agents in the order they appear in the text, (index, x, y) as three uint16 each
+    the layout text (utf-8, rows joined with newlines)
+```
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+COMPILED_EXTENSION = '.layc'
+
+MAGIC = b'PACL'
+VERSION = 1
+
+HEADER_FORMAT = '<4sHHHHHHI20s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+CAPSULE_FORMAT = '<HH'
+AGENT_FORMAT = '<HHH'
+
+# Flags for optional sections.
+# No optional sections are defined yet, so readers reject files with any flags set.
+FLAGS_NONE = 0
+
+def getCompiledPath(path):
+    """
+    Get the path of the compiled version of a text layout file.
+    """
+
+    base, extension = os.path.splitext(path)
+    return base + COMPILED_EXTENSION
+
+def getSourceDigest(source):
+    """
+    Get the digest (stored in the compiled file) of the raw bytes of a text layout file.
+    """
+
+    return hashlib.sha1(source).digest()
+
+def readCompiledLayout(path, sourceDigest = None):
+    """
+    Read a compiled layout.
+    If a source digest is supplied, then the compiled layout must have been compiled from
+    a source with the same digest.
+
+    Returns None if the file does not exist, is not a compiled layout, or is out of date.
+    Otherwise, returns a tuple of:
+    (layoutText, width, height, walls bits, food bits, capsules, agents).
+    Agents are (index, (x, y)) in the order they appear in the layout text.
+    """
+
+    if (not os.path.isfile(path)):
+        return None
+
+    with open(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file.
+            return None
+
+        try:
+            return _parse(data, sourceDigest)
+        finally:
+            data.close()
+
+def writeCompiledLayout(path, layout, source):
+    """
+    Write a compiled version of a layout that was parsed from the given source bytes.
+    The file is written to a temp file and then moved into place,
+    so readers never see a partially written layout.
+    """
+
+    width = layout.getWidth()
+    height = layout.getHeight()
+    gridSize = _bytesPerGrid(width, height)
+
+    text = '\n'.join(layout.layoutText).encode('utf-8')
+    agents = _scanAgents(layout.layoutText)
+
+    parts = [
+        struct.pack(HEADER_FORMAT, MAGIC, VERSION, width, height,
+                len(layout.capsules), len(agents), FLAGS_NONE, len(text),
+                getSourceDigest(source)),
+        layout.walls.getBits().to_bytes(gridSize, 'little'),
+        layout.food.getBits().to_bytes(gridSize, 'little'),
+    ]
+
+    for (x, y) in layout.capsules:
+        parts.append(struct.pack(CAPSULE_FORMAT, x, y))
+
+    for (index, (x, y)) in agents:
+        parts.append(struct.pack(AGENT_FORMAT, index, x, y))
+
+    parts.append(text)
+
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tempPath, 'wb') as file:
+        file.write(b''.join(parts))
+
+    os.replace(tempPath, path)
+
+def _bytesPerGrid(width, height):
+    return (width * height + 7) // 8
+
+def _parse(data, sourceDigest):
+    if (len(data) < HEADER_SIZE):
+        return None
+
+    header = struct.unpack_from(HEADER_FORMAT, data, 0)
+    magic, version, width, height, numCapsules, numAgents, flags, textLength, digest = header
+
+    if (magic != MAGIC or version != VERSION or flags != FLAGS_NONE):
+        return None
+
+    if (sourceDigest is not None and digest != sourceDigest):
+        return None
+
+    gridSize = _bytesPerGrid(width, height)
+    capsuleSize = struct.calcsize(CAPSULE_FORMAT)
+    agentSize = struct.calcsize(AGENT_FORMAT)
+
+    expectedSize = (HEADER_SIZE + 2 * gridSize + numCapsules * capsuleSize
+            + numAgents * agentSize + textLength)
+    if (len(data) != expectedSize):
+        return None
+
+    offset = HEADER_SIZE
+
+    walls = int.from_bytes(data[offset:offset + gridSize], 'little')
+    offset += gridSize
+
+    food = int.from_bytes(data[offset:offset + gridSize], 'little')
+    offset += gridSize
+
+    capsules = []
+    for i in range(numCapsules):
+        capsules.append(struct.unpack_from(CAPSULE_FORMAT, data, offset))
+        offset += capsuleSize
+
+    agents = []
+    for i in range(numAgents):
+        index, x, y = struct.unpack_from(AGENT_FORMAT, data, offset)
+        agents.append((index, (x, y)))
+        offset += agentSize
+
+    layoutText = data[offset:offset + textLength].decode('utf-8').split('\n')
+
+    return (layoutText, width, height, walls, food, capsules, agents)
+
+def _scanAgents(layoutText):
+    """
+    Find all the agents in the layout text, in the same order that
+    `pacai.core.layout.Layout.processLayoutText` visits them.
+    Pacman has index 0, 'G' ghosts have index 1, and numbered ghosts have their number.
+    """
+
+    agents = []
+
+    height = len(layoutText)
+    for y in range(height):
+        row = layoutText[height - 1 - y]
+        for x in range(len(row)):
+            layoutChar = row[x]
+
+            if (layoutChar == 'P'):
+                agents.append((0, (x, y)))
+            elif (layoutChar == 'G'):
+                agents.append((1, (x, y)))
+            elif (layoutChar in '1234'):
+                agents.append((int(layoutChar), (x, y)))
+
+    return agents
@@ -1,14 +1,52 @@
+import array
+import collections
+import heapq
+import itertools
+import logging
+import operator
 import sys
+import threading
 
+from pacai.core import distancecache
+from pacai.core.agentstate import HALF_STEP
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
+from pacai.core.junctiongraph import JunctionGraph
+from pacai.core.topology import Topology
+from pacai.util.priorityQueue import IndexedPriorityQueue
 
 DEFAULT_DISTANCE = 10000
 
+# The default amount of memory (in bytes) that a lazy distancer may use for distance rows.
+DEFAULT_LAZY_BYTES = 16 * 1024 * 1024
+
+# The default number of distances that a landmark distancer remembers.
+DEFAULT_QUERY_CACHE_SIZE = 100000
+
+# The number of landmarks that guide each search of a landmark distancer.
+NUM_ACTIVE_LANDMARKS = 2
+
+# Distance rows are computed on the junction graph (instead of cell by cell)
+# when at most this fraction of the cells are junctions.
+# Past this, filling in the corridors costs about as much as a BFS over every cell.
+MAX_JUNCTION_FRACTION = 0.2
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
 
+    By default, `Distancer.getMazeDistances` computes the distances between all pairs of points.
+    A lazy distancer instead computes the distances from a point the first time that point
+    is queried, and only keeps the most recently used points (up to lazyBytes of memory).
+    Lazy distancers are better suited to huge mazes where only a few points are ever queried.
+
+    The complete table can also be computed in the background
+    (see `Distancer.getMazeDistances`).
+    Until it is ready, distances are answered (exactly) by a lazy table.
+
+    For mazes that are too large for a complete table,
+    a landmark distancer (landmarks > 0) only stores the distances from a few landmark cells
+    and searches for the exact distance of each new query (see `LandmarkDistanceTable`).
+
     Example:
     ```
     distancer = Distancer(gameState.getInitialLayout())
@@ -16,12 +54,52 @@ class Distancer(object):
     ```
     """
 
-    def __init__(self, layout):
+    def __init__(self, layout, lazy = False, lazyBytes = DEFAULT_LAZY_BYTES, landmarks = 0):
         self._distances = None
+        self._lazy = lazy
+        self._lazyBytes = lazyBytes
+        self._landmarks = landmarks
+
+        # The background computation of the complete table (if one was started).
+        self._computation = None
+
         self.dc = DistanceCalculator(layout, self)
 
-    def getMazeDistances(self):
-        self.dc.run()
+    def getCellId(self, position):
+        """
+        Get the index of a grid position in the rows returned by `Distancer.getDistanceRow`.
+        Returns None for walls.
+        Maze distances must be ready (see `Distancer.isReadyForMazeDistance`).
+        """
+
+        return self._distances.getCellId(position)
+
+    def getMazeDistances(self, background = False):
+        """
+        Compute (or load) the maze distances.
+        If background is true, then the distances are computed in a background thread
+        and this method returns right away.
+        See `Distancer.isReadyForMazeDistance` and `Distancer.waitForMazeDistances`.
+        """
+
+        if (background):
+            self.dc.runInBackground()
+        else:
+            self.dc.run()
+
+    def getMazeDistanceProgress(self):
+        """
+        Get the fraction (between 0 and 1) of the complete maze distance table
+        that has been computed.
+        """
+
+        if (self.isReadyForMazeDistance()):
+            return 1.0
+
+        if (self._computation is None):
+            return 0.0
+
+        return self._computation.progress
 
     def getDistance(self, pos1, pos2):
         """
@@ -48,17 +126,78 @@ class Distancer(object):
         return bestDistance
 
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        distance = self._distances.getDistance(pos1, pos2)
+        if (distance is None):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
 
-        raise Exception("Position not in grid: " + str(key))
+        return distance
+
+    def getDistanceLowerBound(self, pos1, pos2):
+        """
+        Get a lower bound on the maze distance between two grid positions
+        that is cheaper to get than the distance itself.
+        For distancers that store all distances, this is just the distance.
+        """
+
+        if (self._distances is None):
+            return manhattan(pos1, pos2)
+
+        bound = self._distances.getLowerBound(pos1, pos2)
+        if (bound is None):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        return bound
+
+    def getDistanceRow(self, position):
+        """
+        Get the maze distance from a grid position to every open cell at once.
+        The row is an array of unsigned ints indexed by cell id (see `Distancer.getCellId`),
+        with UNREACHABLE for cells that cannot be reached.
+        The row should not be modified.
+        Maze distances must be ready (see `Distancer.isReadyForMazeDistance`).
+
+        For example, the distance to the closest food is:
+        ```
+        row = distancer.getDistanceRow(myPosition)
+        min([row[distancer.getCellId(food)] for food in foodList])
+        ```
+        """
+
+        row = self._distances.getRow(position)
+        if (row is None):
+            raise Exception("Position not in grid: " + str(position))
+
+        return row
 
     def isReadyForMazeDistance(self):
-        return (self._distances is not None)
+        """
+        Returns true if maze distances are available and will not change
+        (a background computation, if any, is done).
+        While a background computation is running this returns false,
+        but `Distancer.getDistance` already gives exact maze distances.
+        """
+
+        if (self._distances is None):
+            return False
+
+        return (self._computation is None or self._computation.isDone())
+
+    def waitForMazeDistances(self, timeout = None):
+        """
+        Wait (up to timeout seconds) for a background computation of maze distances.
+        Returns `Distancer.isReadyForMazeDistance`.
+        """
+
+        if (self._computation is not None):
+            self._computation.wait(timeout)
+
+        return self.isReadyForMazeDistance()
 
 def isInt(pos):
     x, y = pos
+    if (type(x) is int and type(y) is int):
+        return True
+
     return x == int(x) and y == int(y)
 
 def getGrids2D(pos):
@@ -69,88 +208,713 @@ def getGrids2D(pos):
     return grids
 
 def getGrids1D(x):
+    # Agents only ever stop on grid points or half way between them,
+    # so those positions are worked out in (integer) half steps.
+    halfX = x / HALF_STEP
+    if (halfX == int(halfX)):
+        halfX = int(halfX)
+        intX = halfX >> 1
+
+        if (not (halfX & 1)):
+            return [(intX, 0)]
+
+        return [(intX, HALF_STEP), (intX + 1, HALF_STEP)]
+
     intX = int(x)
-    if x == int(x):
-        return [(x, 0)]
     return [(intX, x - intX), (intX + 1, intX + 1 - x)]
 
 ##########################################
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
+# The value stored in a distance table for cells that cannot reach each other.
+UNREACHABLE = 0xFFFF
+
+# Distance tables shared by every distancer in this process.
+# {walls: DistanceTable}
 distanceMap = {}
 
+class DistanceTable(object):
+    """
+    The maze distance between every pair of open cells in a set of walls.
+
+    Open cells are numbered (in the order of `pacai.core.grid.Grid.asList`),
+    and distances are kept in a single flat array of unsigned 16-bit ints,
+    where the distance from cell i to cell j is at (i * numCells + j).
+    Pairs of cells that cannot reach each other are stored as UNREACHABLE,
+    so a complete table can only hold mazes with fewer than UNREACHABLE open cells
+    (lazy and landmark tables do not have that limit).
+
+    Tables are saved in (and loaded from) the on-disk cache in `pacai.core.distancecache`,
+    which also shares a single (memory-mapped) copy of each table between processes.
+
+    Cells (and their neighbors) come from the `pacai.core.topology.Topology` of the walls.
+    If the table is given the `pacai.core.layout.Layout` that the walls came from,
+    the layout's (shared) topology and junction graph are used
+    (see `pacai.core.layout.Layout.getTopology`) instead of building another copy.
+    """
+
+    def __init__(self, walls, data = None, progress = None, layout = None):
+        self._layout = layout
+
+        if (layout is not None):
+            self._topology = layout.getTopology()
+        else:
+            self._topology = Topology(walls)
+
+        # Built the first time a row is computed, see _getJunctionGraph().
+        # False if the maze has too many junctions for the graph to help.
+        self._junctionGraph = None
+
+        # [(x, y), ...]
+        self._cells = self._topology.getCells()
+        self._numCells = len(self._cells)
+
+        # [(neighbor cell id, ...), ...]
+        self._neighbors = [self._topology.getNeighbors(cellId)
+                for cellId in range(self._numCells)]
+
+        self._data = self._initData(walls, data, progress)
+
+    def getCellId(self, position):
+        """
+        Get the id of an open cell, or None if the position is a wall or off the board.
+        """
+
+        return self._topology.getCellId(position)
+
+    def getCells(self):
+        """
+        Get all the open cells, indexed by cell id.
+        """
+
+        return self._cells
+
+    def getData(self):
+        """
+        Get the flat array of distances.
+        """
+
+        return self._data
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two open cells (in integer coordinates).
+        Returns None if either position is not an open cell.
+        """
+
+        id1 = self.getCellId(pos1)
+        id2 = self.getCellId(pos2)
+        if (id1 is None or id2 is None):
+            return None
+
+        distance = self._getDistanceById(id1, id2)
+        if (distance == UNREACHABLE):
+            return sys.maxsize
+
+        return distance
+
+    def getLowerBound(self, pos1, pos2):
+        """
+        Get a lower bound on the maze distance between two open cells.
+        Returns None if either position is not an open cell.
+        """
+
+        return self.getDistance(pos1, pos2)
+
+    def getNumCells(self):
+        return self._numCells
+
+    def getRow(self, position):
+        """
+        Get the distances from an open cell to every cell (indexed by cell id).
+        Returns None if the position is not an open cell.
+        """
+
+        cellId = self.getCellId(position)
+        if (cellId is None):
+            return None
+
+        return self._getRowById(cellId)
+
+    def computeRow(self, sourceId):
+        """
+        Get the distance from a single cell to every cell (by cell id).
+        Mazes that are mostly corridors are searched on their junction graph
+        (see `pacai.core.junctiongraph.JunctionGraph`), other mazes cell by cell.
+        """
+
+        graph = self._getJunctionGraph()
+        if (graph is None):
+            return self._computeRowOnCells(sourceId)
+
+        return self._computeRowOnGraph(sourceId, graph)
+
+    def _computeAll(self, progress = None):
+        data = array.array('H')
+        for sourceId in range(self._numCells):
+            data.extend(self.computeRow(sourceId))
+
+            if (progress is not None):
+                progress((sourceId + 1) / self._numCells)
+
+        return data
+
+    def _computeRowOnGraph(self, sourceId, graph):
+        """
+        Get the distances to every junction from the junction distances
+        (see _initCorridorOrder()),
+        and then fill in the cells inside each corridor from the corridor's two ends.
+
+        The row is first built in corridor order (junctions, then the inside of each corridor),
+        where the distances inside a corridor are just two runs of consecutive numbers,
+        and is then put into cell id order in one go.
+        """
+
+        location = graph.getLocation(sourceId)
+
+        if (location is None):
+            row = list(self._junctionDistances[self._junctionIndexes[sourceId]])
+        else:
+            # Leave through either end of the source's corridor.
+            corridorIndex, sourceIndex = location
+            firstIndex, lastIndex, sourceLength = self._corridorEnds[corridorIndex]
+
+            fromFirst = map(operator.add, self._junctionDistances[firstIndex],
+                    itertools.repeat(sourceIndex))
+            fromLast = map(operator.add, self._junctionDistances[lastIndex],
+                    itertools.repeat(sourceLength - sourceIndex))
+
+            row = list(map(min, fromFirst, fromLast, itertools.repeat(UNREACHABLE)))
+
+        junctionDistances = row[:len(self._junctionDistances)]
+
+        for (firstIndex, lastIndex, length) in self._corridorEnds:
+            if (length == 1):
+                continue
+
+            firstDistance = junctionDistances[firstIndex]
+            lastDistance = junctionDistances[lastIndex]
+
+            # Either both ends are reachable or neither is.
+            if (firstDistance == UNREACHABLE):
+                row.extend([UNREACHABLE] * (length - 1))
+                continue
+
+            # Cells up to the split are closer to the first junction.
+            split = (lastDistance + length - firstDistance) // 2
+            if (split >= length):
+                split = length - 1
+
+            row.extend(range(firstDistance + 1, firstDistance + split + 1))
+            row.extend(range(lastDistance + length - split - 1, lastDistance, -1))
+
+        # Cells in the source's own corridor may be closer by just walking along the corridor.
+        if (location is not None):
+            start = self._corridorStarts[corridorIndex]
+
+            for pathIndex in range(1, sourceLength):
+                index = start + pathIndex - 1
+                row[index] = min(row[index], abs(pathIndex - sourceIndex))
+
+        return array.array('H', self._fromCorridorOrder(row))
+
+    def _computeRowOnCells(self, sourceId):
+        """
+        Run a BFS from a single cell over every cell.
+        """
+
+        neighbors = self._neighbors
+
+        row = [UNREACHABLE] * self._numCells
+        row[sourceId] = 0
+
+        frontier = [sourceId]
+        distance = 0
+
+        while (frontier):
+            distance += 1
+            if (distance >= UNREACHABLE):
+                raise ValueError('Maze distance too long for a distance row: %d.' % (distance))
+
+            nextFrontier = []
+
+            for cellId in frontier:
+                for neighborId in neighbors[cellId]:
+                    if (row[neighborId] == UNREACHABLE):
+                        row[neighborId] = distance
+                        nextFrontier.append(neighborId)
+
+            frontier = nextFrontier
+
+        return array.array('H', row)
+
+    def _getDistanceById(self, id1, id2):
+        return self._data[id1 * self._numCells + id2]
+
+    def _initCorridorOrder(self, graph):
+        """
+        Set up what _computeRowOnGraph() needs:
+        the distance between every pair of junctions (with Dijkstra's algorithm on the graph),
+        and the corridor order of the cells
+        (all the junctions, and then the inside of every corridor from its first junction).
+        """
+
+        junctionIds = graph.getJunctions()
+
+        # The index of every junction (by cell id).
+        self._junctionIndexes = {}
+        for index, junctionId in enumerate(junctionIds):
+            self._junctionIndexes[junctionId] = index
+
+        # [(first junction index, last junction index, length), ...]
+        self._corridorEnds = []
+
+        # [index (in corridor order) of the first cell inside each corridor, ...]
+        self._corridorStarts = []
+
+        # [[(other junction index, length), ...], ...]
+        edges = [[] for junctionId in junctionIds]
+
+        order = list(junctionIds)
+        for corridorIndex in range(graph.getNumEdges()):
+            path = graph.getPath(corridorIndex)
+            firstIndex = self._junctionIndexes[path[0]]
+            lastIndex = self._junctionIndexes[path[-1]]
+            length = len(path) - 1
+
+            self._corridorEnds.append((firstIndex, lastIndex, length))
+            self._corridorStarts.append(len(order))
+            order.extend(path[1:-1])
+
+            edges[firstIndex].append((lastIndex, length))
+            edges[lastIndex].append((firstIndex, length))
+
+        # The index (in corridor order) of each cell id.
+        positions = [0] * self._numCells
+        for index, cellId in enumerate(order):
+            positions[cellId] = index
+
+        self._fromCorridorOrder = operator.itemgetter(*positions)
+
+        # [[distance to each junction, ...] for each junction]
+        self._junctionDistances = []
+        for sourceIndex in range(len(junctionIds)):
+            distances = [UNREACHABLE] * len(junctionIds)
+            distances[sourceIndex] = 0
+
+            fringe = IndexedPriorityQueue()
+            fringe.push(sourceIndex, 0)
+
+            while (not fringe.isEmpty()):
+                index, distance = fringe.popWithPriority()
+
+                for (otherIndex, length) in edges[index]:
+                    otherDistance = distance + length
+                    if (otherDistance < distances[otherIndex]):
+                        distances[otherIndex] = otherDistance
+                        fringe.update(otherIndex, otherDistance)
+
+            self._junctionDistances.append(distances)
+
+    def _initData(self, walls, data, progress = None):
+        # Cell ids index the rows of the complete table, and distances are stored as 16-bit ints.
+        if (self._numCells >= UNREACHABLE):
+            raise ValueError('Too many open cells for a complete distance table: %d.'
+                    % (self._numCells))
+
+        if (data is not None):
+            return data
+
+        return distancecache.loadOrCompute(walls, self._numCells,
+                lambda: self._computeAll(progress))
+
+    def _getJunctionGraph(self):
+        if (self._junctionGraph is None):
+            self._junctionGraph = False
+
+            if (self._layout is not None):
+                graph = self._layout.getJunctionGraph()
+            else:
+                graph = JunctionGraph(self._topology)
+
+            if (self._numCells >= 2
+                    and graph.getNumJunctions() <= MAX_JUNCTION_FRACTION * self._numCells):
+                self._initCorridorOrder(graph)
+                self._junctionGraph = graph
+
+        if (self._junctionGraph is False):
+            return None
+
+        return self._junctionGraph
+
+    def _getRowById(self, cellId):
+        start = cellId * self._numCells
+        return memoryview(self._data)[start:start + self._numCells]
+
+class LazyDistanceTable(DistanceTable):
+    """
+    A `DistanceTable` that only computes the distances from a cell (a row)
+    when that cell is first queried.
+    Rows are kept in a least recently used cache that is limited to maxBytes of memory.
+    """
+
+    def __init__(self, walls, maxBytes = DEFAULT_LAZY_BYTES, layout = None):
+        super().__init__(walls, layout = layout)
+
+        # {cellId: row}, ordered from least to most recently used.
+        self._rows = collections.OrderedDict()
+        self._maxRows = max(1, maxBytes // max(1, 2 * self._numCells))
+
+    # Override
+    def getData(self):
+        raise TypeError('Lazy distance tables do not have all distances at once.')
+
+    def getNumCachedRows(self):
+        return len(self._rows)
+
+    # Override
+    def _getDistanceById(self, id1, id2):
+        # Distances are symmetric, so either row will do.
+        if (id2 in self._rows and id1 not in self._rows):
+            return self._getRowById(id2)[id1]
+
+        return self._getRowById(id1)[id2]
+
+    # Override
+    def _initData(self, walls, data, progress = None):
+        # Nothing is computed up front.
+        return None
+
+    # Override
+    def _getRowById(self, cellId):
+        row = self._rows.get(cellId)
+        if (row is not None):
+            self._rows.move_to_end(cellId)
+            return row
+
+        row = self.computeRow(cellId)
+        self._rows[cellId] = row
+
+        if (len(self._rows) > self._maxRows):
+            self._rows.popitem(last = False)
+
+        return row
+
+class LandmarkDistanceTable(LazyDistanceTable):
+    """
+    A distance table for mazes that are too large to store all the distances (ALT).
+
+    Only the rows for a few landmark cells (spread out over the maze) are stored.
+    By the triangle inequality, |d(L, a) - d(L, b)| <= d(a, b) for any landmark L,
+    which gives an admissible (and consistent) lower bound for any pair of cells.
+    Exact distances are found with an A* search guided by that bound,
+    and the most recent answers are kept in a query cache.
+    Full rows (see `DistanceTable.getRow`) are computed lazily, like a `LazyDistanceTable`.
+    """
+
+    def __init__(self, walls, numLandmarks, maxBytes = DEFAULT_LAZY_BYTES,
+            queryCacheSize = DEFAULT_QUERY_CACHE_SIZE, layout = None):
+        super().__init__(walls, maxBytes, layout = layout)
+
+        # {(lowId, highId): distance}, ordered from least to most recently used.
+        self._queries = collections.OrderedDict()
+        self._queryCacheSize = queryCacheSize
+
+        self._landmarkIds = []
+        self._landmarkRows = []
+        self._chooseLandmarks(numLandmarks)
+
+    def getLandmarks(self):
+        return [self._cells[landmarkId] for landmarkId in self._landmarkIds]
+
+    # Override
+    def getLowerBound(self, pos1, pos2):
+        id1 = self.getCellId(pos1)
+        id2 = self.getCellId(pos2)
+        if (id1 is None or id2 is None):
+            return None
+
+        bound = self._getLowerBoundById(id1, id2)
+        if (bound == UNREACHABLE):
+            return sys.maxsize
+
+        return bound
+
+    def _chooseLandmarks(self, numLandmarks):
+        """
+        Pick landmarks by farthest point sampling:
+        each new landmark is the cell farthest from all the landmarks picked so far.
+        """
+
+        if (self._numCells == 0):
+            return
+
+        # The distance from each cell to the closest landmark so far.
+        closest = [UNREACHABLE] * self._numCells
+        candidate = 0
+
+        for i in range(min(numLandmarks, self._numCells)):
+            row = self.computeRow(candidate)
+            self._landmarkIds.append(candidate)
+            self._landmarkRows.append(row)
+
+            bestDistance = -1
+            for cellId in range(self._numCells):
+                distance = row[cellId]
+                if (distance < closest[cellId]):
+                    closest[cellId] = distance
+
+                # Cells that no landmark can reach make the best next landmark.
+                if (closest[cellId] > bestDistance):
+                    bestDistance = closest[cellId]
+                    candidate = cellId
+
+            if (bestDistance <= 0):
+                break
+
+    # Override
+    def _getDistanceById(self, id1, id2):
+        if (id1 == id2):
+            return 0
+
+        # If either row is already around, then there is nothing to search for.
+        if (id1 in self._rows):
+            return self._getRowById(id1)[id2]
+
+        if (id2 in self._rows):
+            return self._getRowById(id2)[id1]
+
+        key = (min(id1, id2), max(id1, id2))
+
+        distance = self._queries.get(key)
+        if (distance is not None):
+            self._queries.move_to_end(key)
+            return distance
+
+        distance = self._search(id1, id2)
+
+        self._queries[key] = distance
+        if (len(self._queries) > self._queryCacheSize):
+            self._queries.popitem(last = False)
+
+        return distance
+
+    def _getLowerBoundById(self, id1, id2):
+        bound = 0
+
+        for row in self._landmarkRows:
+            distance1 = row[id1]
+            distance2 = row[id2]
+
+            if (distance1 == UNREACHABLE or distance2 == UNREACHABLE):
+                if (distance1 != distance2):
+                    # Only one of the cells can reach the landmark.
+                    return UNREACHABLE
+
+                continue
+
+            if (distance1 > distance2):
+                distance = distance1 - distance2
+            else:
+                distance = distance2 - distance1
+
+            if (distance > bound):
+                bound = distance
+
+        return bound
+
+    def _search(self, sourceId, targetId):
+        """
+        A* from the source to the target, using the landmark bound as the heuristic.
+        """
+
+        heuristic = self._getLowerBoundById(sourceId, targetId)
+        if (heuristic == UNREACHABLE):
+            return UNREACHABLE
+
+        # Only use the few landmarks that give the best bound for this query (active landmarks).
+        # The max over any subset of landmarks is still a consistent heuristic.
+        activeLandmarks = []
+        for row in self._landmarkRows:
+            targetDistance = row[targetId]
+            if (targetDistance != UNREACHABLE):
+                activeLandmarks.append((abs(row[sourceId] - targetDistance), row, targetDistance))
+
+        activeLandmarks.sort(key = lambda landmark: landmark[0], reverse = True)
+        activeLandmarks = [(row, targetDistance)
+                for (bound, row, targetDistance) in activeLandmarks[:NUM_ACTIVE_LANDMARKS]]
+
+        neighbors = self._neighbors
+
+        costs = {sourceId: 0}
+        closed = set()
+        fringe = [(heuristic, sourceId)]
+
+        while (fringe):
+            estimate, cellId = heapq.heappop(fringe)
+            if (cellId == targetId):
+                return costs[cellId]
+
+            if (cellId in closed):
+                continue
+
+            closed.add(cellId)
+            cost = costs[cellId] + 1
+
+            for neighborId in neighbors[cellId]:
+                if (neighborId in closed or costs.get(neighborId, UNREACHABLE) <= cost):
+                    continue
+
+                costs[neighborId] = cost
+
+                heuristic = 0
+                for (row, targetDistance) in activeLandmarks:
+                    bound = abs(row[neighborId] - targetDistance)
+                    if (bound > heuristic):
+                        heuristic = bound
+
+                heapq.heappush(fringe, (cost + heuristic, neighborId))
+
+        return UNREACHABLE
+
+# Complete tables currently being computed in the background.
+# {walls: _BackgroundComputation}
+_backgroundComputations = {}
+_backgroundLock = threading.Lock()
+
 class DistanceCalculator:
     def __init__(self, layout, distancer):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
+        self.cache = distanceMap
 
     def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+        walls = self.layout.walls
+
+        # Lazy and landmark distancers still use a complete table if one is already around.
+        if (self.distancer._landmarks > 0 and walls not in self.cache):
+            self.distancer._distances = LandmarkDistanceTable(walls, self.distancer._landmarks,
+                    self.distancer._lazyBytes, layout = self.layout)
+            return
+
+        if (self.distancer._lazy and walls not in self.cache):
+            self.distancer._distances = LazyDistanceTable(walls, self.distancer._lazyBytes,
+                    layout = self.layout)
+            return
+
+        # Don't compute the same table twice.
+        with _backgroundLock:
+            computation = _backgroundComputations.get(walls)
+
+        if (computation is not None):
+            computation.wait()
+
+        if walls not in self.cache:
+            self.cache[walls] = computeDistances(self.layout)
+
+        self.distancer._distances = self.cache[walls]
 
-        self.distancer._distances = self.cache[self.layout.walls]
+    def runInBackground(self):
+        """
+        Start computing the complete table in a background thread (unless it is already known),
+        and answer queries with a lazy table until it is done.
+        Distancers on the same walls share a single background computation.
+        """
+
+        walls = self.layout.walls
+
+        with _backgroundLock:
+            if (walls in self.cache):
+                self.distancer._distances = self.cache[walls]
+                return
 
-def computeDistances(layout):
+            self.distancer._distances = LazyDistanceTable(walls, self.distancer._lazyBytes,
+                    layout = self.layout)
+
+            computation = _backgroundComputations.get(walls)
+            if (computation is None):
+                computation = _BackgroundComputation(self.layout, self.cache)
+                _backgroundComputations[walls] = computation
+                computation.start()
+
+            self.distancer._computation = computation
+            computation.addDistancer(self.distancer)
+
+class _BackgroundComputation(object):
     """
-    Runs UCS to all other positions from each position.
+    A complete `DistanceTable` being computed in a background (daemon) thread.
+    When the table is done, it is handed to every distancer waiting on it.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    def __init__(self, layout, cache):
+        self.progress = 0.0
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+        self._layout = layout
+        self._cache = cache
+        self._distancers = []
+        self._table = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target = self._run, daemon = True,
+                name = 'pacai-distances')
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+    def addDistancer(self, distancer):
+        """
+        Give the table to a distancer when it is done.
+        Must be called while holding the background lock.
+        """
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+        if (self._table is not None):
+            distancer._distances = self._table
+        else:
+            self._distancers.append(distancer)
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+    def isDone(self):
+        return self._done.is_set()
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+    def start(self):
+        self._thread.start()
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+    def wait(self, timeout = None):
+        return self._done.wait(timeout)
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+    def _run(self):
+        table = None
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+        try:
+            table = computeDistances(self._layout, self._setProgress)
+        except Exception:
+            logging.exception('Failed to compute maze distances in the background.')
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+        with _backgroundLock:
+            if (table is not None):
+                self._cache[self._layout.walls] = table
+                self._table = table
 
-            for other in adjacent:
-                if other not in dist:
-                    continue
+                for distancer in self._distancers:
+                    distancer._distances = table
+
+            self._distancers = []
+            del _backgroundComputations[self._layout.walls]
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+            self._done.set()
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+    def _setProgress(self, progress):
+        self.progress = progress
+
+def computeDistances(layout, progress = None):
+    """
+    Runs a BFS to all other positions from each position.
+    Returns a `DistanceTable`.
+    If supplied, progress is called with the fraction of the table that is done
+    after every row.
+    """
 
-    return distances
+    return DistanceTable(layout.walls, progress = progress, layout = layout)
 
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if (distance is None):
+        return DEFAULT_DISTANCE
 
-    return DEFAULT_DISTANCE
+    return distance
@@ -0,0 +1,301 @@
+"""
+A persistent, on-disk cache of maze distance tables
+(see `pacai.core.distanceCalculator.DistanceTable`).
+
+Tables are keyed by a fingerprint of the walls they were computed for,
+so every agent in every process (and every game) on the same maze can load
+the distances instead of computing them.
+Cached tables are memory-mapped, so loading one does not copy the table
+and processes on the same machine share the same physical pages.
+
+Files are written to a temp file and then moved into place, so readers never see a partial table.
+When the cache grows past its size limit, the least recently used tables are removed.
+
+Tables are published through the cache (see `loadOrCompute`):
+the process that computes a table writes it and then maps the written copy,
+while other processes that want the same table wait for it instead of computing their own.
+So any number of processes (e.g. tournament workers) share one physical copy of each table.
+
+The cache is off by default (nothing is written to disk),
+and is turned on by setting the PACAI_DISTANCE_CACHE environment variable to a directory,
+e.g. `PACAI_DISTANCE_CACHE=~/.cache/pacai/distances`.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+
+CACHE_DIR_ENV = 'PACAI_DISTANCE_CACHE'
+
+# The most space (in bytes) that cached tables may take up.
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+EXTENSION = '.dist'
+LOCK_EXTENSION = '.lock'
+
+# How long (in seconds) to wait for another process that is computing a table.
+# Locks older than this are assumed to belong to a process that died.
+DEFAULT_LOCK_TIMEOUT = 60
+
+LOCK_POLL_SECONDS = 0.05
+
+MAGIC = b'PACD'
+VERSION = 1
+
+# magic, version, byte order (0 = little, 1 = big), width, height, number of cells
+HEADER_FORMAT = '<4sHHIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+def getCacheDir():
+    """
+    Get the cache directory (from the PACAI_DISTANCE_CACHE environment variable),
+    or None if the cache is disabled (the variable is not set or is empty).
+    """
+
+    cacheDir = os.environ.get(CACHE_DIR_ENV, '')
+    if (cacheDir == ''):
+        return None
+
+    return os.path.expanduser(cacheDir)
+
+def getWallsFingerprint(walls):
+    """
+    Get a hex digest of a set of walls that is stable across processes.
+    """
+
+    content = '%d,%d,%x' % (walls.getWidth(), walls.getHeight(), walls.getBits())
+    return hashlib.sha1(content.encode()).hexdigest()
+
+def load(walls, numCells, cacheDir = None):
+    """
+    Load the cached distance data for some walls.
+    Returns a flat (memory-mapped) array of unsigned 16-bit ints
+    (see `pacai.core.distanceCalculator.DistanceTable`),
+    or None if the walls are not in the cache.
+    """
+
+    if (cacheDir is None):
+        cacheDir = getCacheDir()
+
+    if (cacheDir is None):
+        return None
+
+    path = _getPath(cacheDir, walls)
+    if (not os.path.isfile(path)):
+        return None
+
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        logging.debug('Could not read cached distances (%s): %s.', path, ex)
+        return None
+
+    expectedSize = HEADER_SIZE + numCells * numCells * 2
+    if (len(data) != expectedSize):
+        data.close()
+        return None
+
+    magic, version, byteOrder, width, height, cachedNumCells = struct.unpack_from(HEADER_FORMAT,
+            data, 0)
+
+    if (magic != MAGIC or version != VERSION or byteOrder != _byteOrder()
+            or (width, height, cachedNumCells) != (walls.getWidth(), walls.getHeight(), numCells)):
+        data.close()
+        return None
+
+    # Mark the table as recently used.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return memoryview(data)[HEADER_SIZE:].cast('H')
+
+def loadOrCompute(walls, numCells, compute, cacheDir = None, lockTimeout = DEFAULT_LOCK_TIMEOUT):
+    """
+    Get the distance data for some walls from the cache,
+    or call compute() (which returns the data) and publish the result to the cache.
+    Only one process computes a table at a time,
+    others wait (up to lockTimeout seconds) for the result.
+    When possible, the returned data is the memory-mapped copy in the cache
+    (which is shared with every other process using the same table).
+    """
+
+    if (cacheDir is None):
+        cacheDir = getCacheDir()
+
+    if (cacheDir is None):
+        return compute()
+
+    data = load(walls, numCells, cacheDir)
+    if (data is not None):
+        return data
+
+    lockPath = _getPath(cacheDir, walls) + LOCK_EXTENSION
+
+    if (not _acquireLock(lockPath, lockTimeout)):
+        # Another process is computing this table, wait for it.
+        _waitForLock(lockPath, lockTimeout)
+
+        data = load(walls, numCells, cacheDir)
+        if (data is not None):
+            return data
+
+        # The other process did not finish in time, just compute a private copy.
+        return compute()
+
+    try:
+        # The table may have been published between the first load and taking the lock.
+        data = load(walls, numCells, cacheDir)
+        if (data is not None):
+            return data
+
+        data = compute()
+
+        if (save(walls, numCells, data, cacheDir)):
+            shared = load(walls, numCells, cacheDir)
+            if (shared is not None):
+                return shared
+
+        return data
+    finally:
+        _releaseLock(lockPath)
+
+def save(walls, numCells, data, cacheDir = None, maxBytes = DEFAULT_MAX_BYTES):
+    """
+    Save the distance data for some walls to the cache.
+    Failing to write the cache is not an error (the distances just will not be cached).
+    Returns true if the data was saved.
+    """
+
+    if (cacheDir is None):
+        cacheDir = getCacheDir()
+
+    if (cacheDir is None):
+        return False
+
+    path = _getPath(cacheDir, walls)
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, _byteOrder(),
+            walls.getWidth(), walls.getHeight(), numCells)
+
+    try:
+        os.makedirs(cacheDir, exist_ok = True)
+
+        with open(tempPath, 'wb') as file:
+            file.write(header)
+            file.write(data)
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.debug('Could not write cached distances (%s): %s.', path, ex)
+
+        if (os.path.exists(tempPath)):
+            os.remove(tempPath)
+
+        return False
+
+    evict(cacheDir, maxBytes, keep = path)
+    return True
+
+def evict(cacheDir, maxBytes, keep = None):
+    """
+    Remove the least recently used tables until the cache takes up at most maxBytes.
+    The table at the path passed as keep is never removed.
+    """
+
+    entries = []
+    totalBytes = 0
+
+    for name in os.listdir(cacheDir):
+        if (not name.endswith(EXTENSION)):
+            continue
+
+        path = os.path.join(cacheDir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+
+        entries.append((stat.st_mtime, path, stat.st_size))
+        totalBytes += stat.st_size
+
+    entries.sort()
+
+    for (mtime, path, size) in entries:
+        if (totalBytes <= maxBytes):
+            break
+
+        if (path == keep):
+            continue
+
+        try:
+            os.remove(path)
+            totalBytes -= size
+        except OSError:
+            pass
+
+def _acquireLock(lockPath, lockTimeout):
+    """
+    Try to take the lock for computing a table.
+    Returns true if the lock was taken (or if locking is not possible at all).
+    """
+
+    try:
+        os.makedirs(os.path.dirname(lockPath), exist_ok = True)
+    except OSError:
+        return True
+
+    for i in range(2):
+        try:
+            os.close(os.open(lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+        except OSError:
+            # We can't lock (e.g. a read-only cache), so don't wait on anyone.
+            return True
+
+        if (not _isStale(lockPath, lockTimeout)):
+            return False
+
+        # The process holding the lock is gone, take it over.
+        try:
+            os.remove(lockPath)
+        except OSError:
+            pass
+
+    return False
+
+def _isStale(lockPath, lockTimeout):
+    try:
+        return (time.time() - os.stat(lockPath).st_mtime) > lockTimeout
+    except OSError:
+        # The lock is already gone.
+        return True
+
+def _releaseLock(lockPath):
+    try:
+        os.remove(lockPath)
+    except OSError:
+        pass
+
+def _waitForLock(lockPath, lockTimeout):
+    deadline = time.time() + lockTimeout
+    while (os.path.exists(lockPath) and time.time() < deadline):
+        time.sleep(LOCK_POLL_SECONDS)
+
+def _byteOrder():
+    if (sys.byteorder == 'little'):
+        return 0
+
+    return 1
+
+def _getPath(cacheDir, walls):
+    return os.path.join(cacheDir, getWallsFingerprint(walls) + EXTENSION)
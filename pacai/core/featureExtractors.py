@@ -40,6 +40,7 @@ class SimpleExtractor(FeatureExtractor):
         # Extract the grid of food and wall locations and get the ghost locations.
         food = state.getFood()
         walls = state.getWalls()
+        moveTable = state.getInitialLayout().getMoveTable()
         ghosts = state.getGhostPositions()
 
         features = {}
@@ -52,7 +53,7 @@ class SimpleExtractor(FeatureExtractor):
 
         # Count the number of ghosts 1-step away.
         features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in
-                Actions.getLegalNeighbors(g, walls) for g in ghosts)
+                Actions.getLegalNeighbors(g, walls, moveTable) for g in ghosts)
 
         # If there is no danger of ghosts then add the food feature.
         if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
@@ -5,6 +5,8 @@ The core of a pacman-style game.
 import logging
 import time
 
+from pacai.core.actions import Actions
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
@@ -17,6 +19,9 @@ class Game:
         self.rules = rules
         self.startingIndex = startingIndex
         self.gameOver = False
+
+        # [(agentIndex, actionCode), ...]
+        # Actions are stored as their integer codes, see `pacai.core.actions.Actions.codeToAction`.
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -68,8 +73,8 @@ class Game:
                 return False
 
             # Execute the action.
-            self.moveHistory.append((agentIndex, action))
             try:
+                self.moveHistory.append((agentIndex, Actions.actionToCode(action)))
                 self.state = self.state.generateSuccessor(agentIndex, action)
             except Exception as ex:
                 if (not self.catchExceptions):
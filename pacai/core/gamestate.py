@@ -1,9 +1,18 @@
 import abc
+import contextlib
 import copy
+import random
 
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
-from pacai.util import util
+
+# The seed used to generate the Zobrist keys.
+# The keys only need to be consistent within a single process.
+ZOBRIST_SEED = 4
+
+_zobristRandom = random.Random(ZOBRIST_SEED)
+_foodKeys = []
+_capsuleKeys = []
 
 class AbstractGameState(abc.ABC):
     """
@@ -22,10 +31,6 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
-        # Any children should be sure to clear the hash when modifications are made.
-        self._hash = None
-
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
 
@@ -33,8 +38,11 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Keep a running count of the food, so counting never has to look at the grid.
+        self._numFood = self._food.count()
+
         self._capsulesCopied = False
-        self._capsules = layout.capsules.copy()
+        self._capsules = list(layout.capsules)
         self._lastCapsuleEaten = None
 
         # An ordered list of locations that this state considers special.
@@ -45,8 +53,31 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # Agent states are copied on write.
+        # Successors share the agent states of their parent until they modify one,
+        # see getMutableAgentState().
+        # This is a bitmask of the agent indexes whose agent state is owned by this state.
+        self._ownedAgentStates = (1 << len(self._agentStates)) - 1
+
         self._score = 0
 
+        # Records for undoing actions applied in place with applyAction().
+        # Created on demand, since most states never have actions applied to them.
+        self._undoLog = None
+
+        # A Zobrist-style hash of everything except the agent states.
+        # Every mutator XORs out the old value of what it changes and XORs in the new one,
+        # so the hash never has to be rebuilt from the whole board.
+        # Agent states cache their own hashes, see `AbstractGameState.__hash__`.
+        self._zobrist = hash(layout) ^ _scoreKey(self._score) ^ _endKey(False, False)
+
+        height = layout.height
+        for (x, y) in self._food.asList():
+            self._zobrist ^= _zobristKey(_foodKeys, x * height + y)
+
+        for (x, y) in self._capsules:
+            self._zobrist ^= _zobristKey(_capsuleKeys, x * height + y)
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -65,8 +96,40 @@ class AbstractGameState(abc.ABC):
         pass
 
     def addScore(self, score):
-        self._hash = None
-        self._score += score
+        self.setScore(self._score + score)
+
+    def applyAction(self, agentIndex, action):
+        """
+        Apply an action to this state in place, instead of creating a successor.
+        The resulting state is the same as what `AbstractGameState.generateSuccessor` would return.
+        Every applied action is recorded and can be reverted with `AbstractGameState.undo`.
+
+        This allows tree searches to walk a single state up and down the tree
+        instead of allocating a new state for every node.
+        See `AbstractGameState.withAction` for a convenient way to pair the two calls.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't apply actions to a terminal state.")
+
+        if (self._undoLog is None):
+            self._undoLog = []
+
+        self._undoLog.append(self._saveUndoRecord())
+
+        # Food, capsules, and agent states that get changed must be copied on write,
+        # so the references saved in the undo record stay intact.
+        self._foodCopied = False
+        self._capsulesCopied = False
+
+        self._agentStates = self._agentStates.copy()
+        self._ownedAgentStates = 0
+
+        try:
+            self._applySuccessorAction(agentIndex, action)
+        except Exception:
+            self.undo()
+            raise
 
     def eatCapsule(self, x, y):
         """
@@ -83,7 +146,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
-        self._hash = None
+        self._zobrist ^= _zobristKey(_capsuleKeys, x * self._layout.height + y)
         return True
 
     def eatFood(self, x, y):
@@ -98,18 +161,19 @@ class AbstractGameState(abc.ABC):
             self._food = self._food.copy()
             self._foodCopied = True
 
-        self._food[x][y] = False
+        self._food.set(x, y, False)
         self._lastFoodEaten = (x, y)
+        self._numFood -= 1
 
-        self._hash = None
+        self._zobrist ^= _zobristKey(_foodKeys, x * self._layout.height + y)
         return True
 
     def endGame(self, win):
+        self._zobrist ^= _endKey(self._gameover, self._win) ^ _endKey(True, win)
+
         self._gameover = True
         self._win = win
 
-        self._hash = None
-
     def getAgentPosition(self, index):
         """
         Returns a location tuple of the agent with the given index.
@@ -117,17 +181,28 @@ class AbstractGameState(abc.ABC):
         (like if it just died and is respawning).
         """
 
-        position = self._agentStates[index].getPosition()
-        if (position is None):
+        agentState = self._agentStates[index]
+        if (agentState.getPosition() is None):
             return None
 
         # Ensure positions are ints.
-        return tuple(int(pos) for pos in position)
+        return agentState.getTruncatedPosition()
 
     def getAgentState(self, index):
+        """
+        Get the `pacai.core.agentstate.AgentState` for the given agent.
+        Agent states may be shared with other game states, so the caller should not modify it.
+        See `AbstractGameState.getMutableAgentState`.
+        """
+
         return self._agentStates[index]
 
     def getAgentStates(self):
+        """
+        Get all the agent states.
+        The caller should not modify the list or the agent states in it.
+        """
+
         return self._agentStates
 
     def getCapsules(self):
@@ -144,10 +219,12 @@ class AbstractGameState(abc.ABC):
         Grids can be accessed via list notation.
         So to check if there is food at (x, y), just do something like: food[x][y].
 
-        Callers should favor hasFood() over this, since this will make a copy of the grid.
+        The returned grid is a read-only view that shares storage with this state
+        (see `pacai.core.grid.Grid.asReadOnly`), so no copy is made.
+        Callers that want to modify the grid should call copy() on it.
         """
 
-        return self._food.copy()
+        return self._food.asReadOnly()
 
     def getHighlightLocations(self):
         return self._highlightLocations
@@ -173,6 +250,20 @@ class AbstractGameState(abc.ABC):
     def getLastFoodEaten(self):
         return self._lastFoodEaten
 
+    def getMutableAgentState(self, index):
+        """
+        Get an agent state that is owned by this game state and can be safely modified.
+        Successors share unchanged agent states with their parent,
+        so the agent state is copied the first time this is called for it on this state.
+        Game rules use this before moving an agent, changing scared timers, respawning, etc.
+        """
+
+        if (not (self._ownedAgentStates >> index) & 1):
+            self._agentStates[index] = self._agentStates[index].copy()
+            self._ownedAgentStates |= (1 << index)
+
+        return self._agentStates[index]
+
     def getNumAgents(self):
         return len(self._agentStates)
 
@@ -186,9 +277,10 @@ class AbstractGameState(abc.ABC):
     def getNumFood(self):
         """
         Get the amount of food left on the board.
+        This is a constant time operation.
         """
 
-        return self._food.count()
+        return self._numFood
 
     def getScore(self):
         return self._score
@@ -217,7 +309,7 @@ class AbstractGameState(abc.ABC):
         Returns true if the location (x, y) has food.
         """
 
-        return self._food[x][y]
+        return self._food.get(x, y)
 
     def hasWall(self, x, y):
         """
@@ -239,8 +331,45 @@ class AbstractGameState(abc.ABC):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        self._zobrist ^= _scoreKey(self._score) ^ _scoreKey(score)
         self._score = score
-        self._hash = None
+
+    def undo(self):
+        """
+        Revert the last action applied with `AbstractGameState.applyAction`.
+        """
+
+        if (not self._undoLog):
+            raise RuntimeError('There are no applied actions to undo.')
+
+        self._restoreUndoRecord(self._undoLog.pop())
+
+    @contextlib.contextmanager
+    def withAction(self, agentIndex, action):
+        """
+        A context manager that applies an action to this state in place,
+        and undoes it when the context exits.
+
+        ```
+        with state.withAction(agentIndex, action):
+            value = evaluate(state)
+        ```
+        """
+
+        self.applyAction(agentIndex, action)
+
+        try:
+            yield self
+        finally:
+            self.undo()
+
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action):
+        """
+        Apply the action to the context state (self).
+        """
+
+        pass
 
     def _initSuccessor(self):
         """
@@ -250,17 +379,45 @@ class AbstractGameState(abc.ABC):
 
         # Start with a shallow copy.
         successor = copy.copy(self)
-        successor._hash = None
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
         successor._foodCopied = False
         successor._capsulesCopied = False
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        # Actions applied in place to this state do not carry over.
+        successor._undoLog = None
+
+        # Share agent states with this state, and only copy the ones that change.
+        successor._agentStates = self._agentStates.copy()
+        successor._ownedAgentStates = 0
 
         return successor
 
+    def _restoreUndoRecord(self, record):
+        """
+        Restore a record made by `AbstractGameState._saveUndoRecord`.
+        """
+
+        gameRecord, foodRecord, capsuleRecord, agentRecord = record
+
+        self._lastAgentMoved, self._gameover, self._win, self._score, self._zobrist = gameRecord
+        self._food, self._foodCopied, self._lastFoodEaten, self._numFood = foodRecord
+        self._capsules, self._capsulesCopied, self._lastCapsuleEaten = capsuleRecord
+        self._agentStates, self._ownedAgentStates = agentRecord
+
+    def _saveUndoRecord(self):
+        """
+        Save everything that applying an action can change.
+        Children with additional mutable fields should extend the record.
+        """
+
+        return (
+            (self._lastAgentMoved, self._gameover, self._win, self._score, self._zobrist),
+            (self._food, self._foodCopied, self._lastFoodEaten, self._numFood),
+            (self._capsules, self._capsulesCopied, self._lastCapsuleEaten),
+            (self._agentStates, self._ownedAgentStates),
+        )
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -275,6 +432,10 @@ class AbstractGameState(abc.ABC):
         # Note that not all fields are being used because we are checking if two states are equal,
         # not is they got to this confiruation in the same way.
 
+        # The Zobrist hash covers the layout, food, capsules, score, and end of game.
+        if (self._zobrist != other._zobrist):
+            return False
+
         # Check simple fields first.
         if (self._score != other._score
                 or self._gameover != other._gameover
@@ -288,8 +449,23 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
-        if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+        # Agent states cache their own hash, so this is linear in the number of agents
+        # and independent of the size of the board.
+        return self._zobrist ^ hash(tuple([hash(agentState) for agentState in self._agentStates]))
+
+def _zobristKey(keys, index):
+    """
+    Get the Zobrist key for a cell index out of the given key table,
+    growing the table as necessary.
+    """
+
+    while (len(keys) <= index):
+        keys.append(_zobristRandom.getrandbits(64))
+
+    return keys[index]
+
+def _scoreKey(score):
+    return hash(('score', score))
 
-        return self._hash
+def _endKey(gameover, win):
+    return hash(('end', gameover, win))
@@ -1,84 +1,313 @@
+class _GridColumn(list):
+    """
+    A materialized copy of a single column of a `Grid`.
+    Reads go straight through the list, so grid[x][y] is as fast as a list of lists.
+    Writes are forwarded to the owning grid, which keeps this column in sync.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        super().__init__(grid._columnValues(x))
+
+        self._grid = grid
+        self._x = x
+
+    def __setitem__(self, y, value):
+        if (y < 0):
+            y += len(self)
+
+        if (y < 0 or y >= len(self)):
+            raise IndexError('Grid row out of range: %d.' % (y))
+
+        self._grid.set(self._x, y, value)
+
+class _ReadOnlyColumn(_GridColumn):
+    """
+    A column of a `ReadOnlyGrid`.
+    """
+
+    __slots__ = ()
+
+    def __setitem__(self, y, value):
+        raise TypeError('Cannot modify a read-only grid.')
+
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.
+    A 2-dimensional array of booleans backed by a single packed integer (a bitboard).
     Data is accessed via grid[x][y] where (x, y) are positions on a Pacman map with x horizontal,
     y vertical and the origin (0, 0) in the bottom left corner.
+
+    Cell (x, y) is stored in bit (x * height + y).
+    Since Python ints are immutable, copies can share the same bits and
+    only pay for a new integer when they are written to.
+    The number of set cells and the hash are cached, so `Grid.copy`, `Grid.count`,
+    and `Grid.__hash__` are all constant time.
     """
 
+    __slots__ = ('_width', '_height', '_bits', '_count', '_hash', '_columns', '_view')
+
+    _COLUMN_CLASS = _GridColumn
+
     def __init__(self, width, height, initialValue = False):
         if (not isinstance(initialValue, bool)):
             raise ValueError('Grids can only contain booleans')
 
         self._width = width
         self._height = height
-        self._data = [[initialValue for y in range(height)] for x in range(width)]
+
+        self._bits = 0
+        self._count = 0
+        if (initialValue):
+            self._bits = (1 << (width * height)) - 1
+            self._count = width * height
+
+        self._hash = None
+
+        # Materialized columns (see `_GridColumn`), built lazily by __getitem__.
+        self._columns = None
+
+        # The cached read-only view of this grid, see asReadOnly().
+        self._view = None
+
+    @classmethod
+    def fromBits(cls, width, height, bits, count = None):
+        """
+        Build a grid directly from its packed representation.
+        If the number of set bits is already known, it can be passed to avoid a popcount.
+        """
+
+        grid = cls(width, height)
+        grid._bits = bits
+
+        if (count is None):
+            count = _popcount(bits)
+        grid._count = count
+
+        return grid
 
     def asList(self, key = True):
+        """
+        Get a list of all the positions (x, y) whose value matches the key.
+        Positions are ordered by x and then by y.
+        """
+
+        bits = self._bits
+        if (not key):
+            bits = ~bits & self._fullMask()
+
+        height = self._height
         values = []
 
-        for x in range(self._width):
-            for y in range(self._height):
-                if self[x][y] == key:
-                    values.append((x, y))
+        while (bits):
+            lowBit = bits & -bits
+            index = lowBit.bit_length() - 1
+            values.append((index // height, index % height))
+            bits ^= lowBit
 
         return values
 
+    def asReadOnly(self):
+        """
+        Get a read-only view of this grid.
+        The view shares this grid's (immutable) bits, so it is built in constant time
+        and always shows the grid as it was when the view was taken.
+        Any attempt to modify the view raises a TypeError.
+        The view is cached until this grid is modified,
+        so repeated calls on an unchanged grid return the same object.
+        Call `Grid.copy` on the view to get a mutable grid.
+        """
+
+        if (self._view is None):
+            view = ReadOnlyGrid(self._width, self._height)
+            view._bits = self._bits
+            view._count = self._count
+            view._hash = self._hash
+
+            self._view = view
+
+        return self._view
+
     def copy(self):
+        """
+        Get a mutable copy of this grid.
+        """
+
         grid = Grid(self._width, self._height)
-        grid._data = [row.copy() for row in self._data]
+        grid._bits = self._bits
+        grid._count = self._count
+        grid._hash = self._hash
+
         return grid
 
-    def count(self, item =True):
-        return sum([x.count(item) for x in self._data])
+    def count(self, item = True):
+        if (item):
+            return self._count
+
+        return (self._width * self._height) - self._count
 
     def deepCopy(self):
         return self.copy()
 
+    def get(self, x, y):
+        """
+        Get the value at (x, y) without materializing a column.
+        No bounds checking is done.
+        """
+
+        return bool((self._bits >> (x * self._height + y)) & 1)
+
+    def getBits(self):
+        """
+        Get the packed integer representation of this grid.
+        Cell (x, y) is bit (x * height + y).
+        """
+
+        return self._bits
+
     def getHeight(self):
         return self._height
 
     def getWidth(self):
         return self._width
 
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y).
+        No bounds checking is done.
+        """
+
+        mask = 1 << (x * self._height + y)
+        isSet = (self._bits & mask) != 0
+
+        if (value == isSet):
+            return
+
+        self._bits ^= mask
+        self._hash = None
+        self._view = None
+
+        if (value):
+            self._count += 1
+        else:
+            self._count -= 1
+
+        # Keep any materialized column in sync.
+        if (self._columns is not None and self._columns[x] is not None):
+            list.__setitem__(self._columns[x], y, bool(value))
+
     def shallowCopy(self):
-        grid = Grid(self._width, self._height)
-        grid._data = self._data
-        return grid
+        # The backing integer is immutable, so a shallow copy is as cheap as a copy.
+        return self.copy()
+
+    def _buildColumn(self, x):
+        if (x < 0):
+            x += self._width
+
+        if (x < 0 or x >= self._width):
+            raise IndexError('Grid column out of range: %d.' % (x))
+
+        if (self._columns is None):
+            self._columns = [None] * self._width
+
+        column = self._COLUMN_CLASS(self, x)
+        self._columns[x] = column
+
+        return column
 
     def _cellIndexToPosition(self, index):
-        x = index / self._height
+        x = index // self._height
         y = index % self._height
 
         return x, y
 
+    def _columnValues(self, x):
+        column = self._bits >> (x * self._height)
+        return [bool((column >> y) & 1) for y in range(self._height)]
+
+    def _fullMask(self):
+        return (1 << (self._width * self._height)) - 1
+
     def __eq__(self, other):
-        if (other is None):
+        if (other is None or not isinstance(other, Grid)):
             return False
 
-        return self._data == other._data
+        return (self._bits == other._bits
+                and self._width == other._width
+                and self._height == other._height)
 
-    def __getitem__(self, i):
-        return self._data[i]
+    def __getitem__(self, x):
+        columns = self._columns
+        if (columns is not None):
+            column = columns[x]
+            if (column is not None):
+                return column
 
-    def __hash__(self):
-        hashcode = 0
-        base = 1
+        return self._buildColumn(x)
 
-        for row in self._data:
-            for value in row:
-                if (value):
-                    hashcode += base
-                base *= 2
+    def __getstate__(self):
+        return (self._width, self._height, self._bits)
 
-        return hash(hashcode)
+    def __hash__(self):
+        if (self._hash is None):
+            self._hash = hash(self._bits)
+
+        return self._hash
 
     def __lt__(self, other):
         return self.__hash__() < other.__hash__()
 
-    def __setitem__(self, key, item):
-        self._data[key] = item
+    def __setitem__(self, x, column):
+        """
+        Replace an entire column with a sequence of booleans.
+        """
+
+        for y in range(self._height):
+            self.set(x, y, bool(column[y]))
+
+    def __setstate__(self, state):
+        if (isinstance(state, dict)):
+            # Grids pickled before they were bitboards (e.g. in old replays) kept a list of columns.
+            self._width = state['_width']
+            self._height = state['_height']
+
+            self._bits = 0
+            for x, column in enumerate(state['_data']):
+                for y, value in enumerate(column):
+                    if (value):
+                        self._bits |= 1 << (x * self._height + y)
+        else:
+            self._width, self._height, self._bits = state
+
+        self._count = _popcount(self._bits)
+        self._hash = None
+        self._columns = None
+        self._view = None
 
     def __str__(self):
-        out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
+        out = [[str(self.get(x, y))[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class ReadOnlyGrid(Grid):
+    """
+    A `Grid` that cannot be modified.
+    These are handed out by game states (see `Grid.asReadOnly`)
+    so that callers can read the state's food without a copy being made.
+    """
+
+    __slots__ = ()
+
+    _COLUMN_CLASS = _ReadOnlyColumn
+
+    def asReadOnly(self):
+        return self
+
+    def set(self, x, y, value):
+        raise TypeError('Cannot modify a read-only grid.')
+
+    def __setitem__(self, x, column):
+        raise TypeError('Cannot modify a read-only grid.')
+
+def _popcount(bits):
+    return bin(bits).count('1')
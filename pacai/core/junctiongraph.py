@@ -0,0 +1,136 @@
+"""
+A maze graph with its corridors compressed into single edges.
+"""
+
+from pacai.core.actions import Actions
+
+class JunctionGraph(object):
+    """
+    The graph of a maze where the nodes are the junctions of a `pacai.core.topology.Topology`
+    and the edges are the corridors between them (weighted by their length).
+
+    Most mazes are long corridors, so searching (or computing distances) on this graph
+    only visits the cells where there is an actual choice to be made.
+    Walks along a corridor can be expanded back into the per-cell actions
+    (see `JunctionGraph.getActions`).
+
+    Cells are referred to by their cell id (see `pacai.core.topology.Topology.getCellId`).
+    Every corridor has a path: the cell ids from its first junction to its last junction,
+    so the length of a corridor is one less than the length of its path.
+    Cells inside a corridor are located by (corridor index, index in the corridor's path).
+    """
+
+    def __init__(self, topology):
+        self._topology = topology
+
+        cells = topology.getCells()
+        corridors = topology.getCorridors()
+
+        # [(cell id, ...), ...]
+        self._paths = []
+
+        # [(action, ...), ...]
+        # The actions that walk each corridor from its first junction to its last.
+        self._actions = []
+
+        # [[(other junction id, length, corridor index, forward), ...] or None, ...]
+        # Only junctions have edges.
+        # Forward edges leave from a corridor's first junction.
+        self._edges = [None] * len(cells)
+        for junctionId in topology.getJunctions():
+            self._edges[junctionId] = []
+
+        # [(corridor index, path index) or None, ...]
+        self._locations = [None] * len(cells)
+
+        for corridorIndex, (firstId, lastId, interior) in enumerate(corridors):
+            path = (firstId, ) + interior + (lastId, )
+            length = len(path) - 1
+
+            actions = []
+            for i in range(length):
+                x1, y1 = cells[path[i]]
+                x2, y2 = cells[path[i + 1]]
+                actions.append(Actions.vectorToDirection((x2 - x1, y2 - y1)))
+
+            self._paths.append(path)
+            self._actions.append(tuple(actions))
+
+            self._edges[firstId].append((lastId, length, corridorIndex, True))
+            self._edges[lastId].append((firstId, length, corridorIndex, False))
+
+            for pathIndex in range(1, length):
+                self._locations[path[pathIndex]] = (corridorIndex, pathIndex)
+
+    def getActions(self, corridorIndex, fromIndex, toIndex):
+        """
+        Get the actions that walk along a corridor between two indexes of its path
+        (in either direction).
+        """
+
+        if (fromIndex <= toIndex):
+            return self._actions[corridorIndex][fromIndex:toIndex]
+
+        actions = self._actions[corridorIndex][toIndex:fromIndex]
+        return tuple([Actions.reverseDirection(action) for action in reversed(actions)])
+
+    def getEdges(self, junctionId):
+        """
+        Get all the edges leaving a junction,
+        as (other junction id, length, corridor index, forward).
+        Returns None if the cell is not a junction.
+        """
+
+        return self._edges[junctionId]
+
+    def getJunctions(self):
+        return self._topology.getJunctions()
+
+    def getLocation(self, cellId):
+        """
+        Get where a cell is inside a corridor, as (corridor index, path index).
+        Returns None for junctions.
+        """
+
+        return self._locations[cellId]
+
+    def getNumEdges(self):
+        return len(self._paths)
+
+    def getNumJunctions(self):
+        return len(self.getJunctions())
+
+    def getPath(self, corridorIndex):
+        """
+        Get the cell ids along a corridor, from its first junction to its last.
+        """
+
+        return self._paths[corridorIndex]
+
+    def getTopology(self):
+        return self._topology
+
+    def getWalks(self, cellId):
+        """
+        Get the ways to leave a cell along the graph,
+        as (corridor index, from path index, to path index).
+        Junctions can walk down every corridor they touch to the junction at the other end,
+        while cells inside a corridor can walk to either end of their corridor.
+        """
+
+        location = self._locations[cellId]
+        if (location is not None):
+            corridorIndex, pathIndex = location
+            return [
+                (corridorIndex, pathIndex, 0),
+                (corridorIndex, pathIndex, len(self._paths[corridorIndex]) - 1),
+            ]
+
+        walks = []
+        for (otherId, length, corridorIndex, forward) in self._edges[cellId]:
+            if (forward):
+                walks.append((corridorIndex, 0, length))
+            else:
+                walks.append((corridorIndex, length, 0))
+
+        return walks
@@ -1,17 +1,45 @@
+import collections
+import hashlib
 import os
 import random
+import weakref
 
+from pacai.core import compiledlayout
 from pacai.core.distance import manhattan
 from pacai.core.grid import Grid
+from pacai.core.junctiongraph import JunctionGraph
+from pacai.core.movetable import MoveTable
+from pacai.core.topology import Topology
 
 # By default, the layout directory is adjacent to this file.
 DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'layouts')
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+# The most layout files that getLayout() keeps parsed.
+MAX_CACHED_LAYOUTS = 64
+
+# Parsed layouts shared by the whole process, see getLayout().
+# {(path, maxGhosts): (fileStamp, Layout)}, ordered from least to most recently used.
+_layoutsByPath = collections.OrderedDict()
+
+# Every registered layout that is still in use somewhere, see registerLayout().
+# {fingerprint: Layout}
+_layoutsByFingerprint = weakref.WeakValueDictionary()
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
+
+    Layouts are not modified once they are parsed
+    (the walls and food are read-only grids, see `pacai.core.grid.Grid.asReadOnly`,
+    and the capsules and agent positions are tuples),
+    so a single layout can be shared between every game (and game state) that uses it.
+    Layouts that come from `getLayout` are shared process-wide.
+
+    Every layout has a fingerprint of its parsed content (see `Layout.getFingerprint`).
+    Layouts with the same content compare equal and hash the same,
+    even if they are different objects.
     """
 
     def __init__(self, layoutText, maxGhosts = None):
@@ -24,11 +52,127 @@ class Layout(object):
         self.numGhosts = 0
         self.layoutText = layoutText
 
+        # Built lazily, see getJunctionGraph(), getMoveTable(), and getTopology().
+        self._junctionGraph = None
+        self._moveTable = None
+        self._topology = None
+
         self.processLayoutText(layoutText, maxGhosts)
+        self._finishLoading()
+
+    @classmethod
+    def fromCompiled(cls, compiled, maxGhosts = None):
+        """
+        Build a layout out of the parts read from a compiled layout
+        (see `pacai.core.compiledlayout.readCompiledLayout`),
+        skipping the parsing of the layout text.
+        """
+
+        layoutText, width, height, walls, food, capsules, agents = compiled
+
+        layout = cls.__new__(cls)
+
+        layout.width = width
+        layout.height = height
+        layout.walls = Grid.fromBits(width, height, walls)
+        layout.food = Grid.fromBits(width, height, food)
+        layout.capsules = list(capsules)
+        layout.agentPositions = []
+        layout.numGhosts = 0
+        layout.layoutText = layoutText
+        layout._junctionGraph = None
+        layout._moveTable = None
+        layout._topology = None
+
+        # Agents are stored in the order that processLayoutText() would see them.
+        for (index, position) in agents:
+            if (index == 0):
+                layout.agentPositions.append((index, position))
+            elif (maxGhosts is None or layout.numGhosts < maxGhosts):
+                layout.agentPositions.append((index, position))
+                layout.numGhosts += 1
+
+        layout.agentPositions.sort()
+        layout.agentPositions = [(i == 0, pos) for i, pos in layout.agentPositions]
+
+        layout._finishLoading()
+
+        return layout
+
+    def _finishLoading(self):
+        self.walls = self.walls.asReadOnly()
+        self.food = self.food.asReadOnly()
+        self.capsules = tuple(self.capsules)
+        self.agentPositions = tuple(self.agentPositions)
+
+        self._fingerprint = self._computeFingerprint()
+        self._hash = int(self._fingerprint[:16], 16)
+
+        self._computeSideMasks()
+
+    def getFingerprint(self):
+        """
+        Get a hex digest of the content of this layout (walls, food, capsules, and agents).
+        The fingerprint is stable across processes.
+        """
+
+        return self._fingerprint
+
+    def getJunctionGraph(self):
+        """
+        Get the `pacai.core.junctiongraph.JunctionGraph` (the maze with its corridors compressed)
+        for this layout's walls.
+        The graph is built on the first call and shared by every agent using this layout.
+        """
+
+        if (self._junctionGraph is None):
+            self._junctionGraph = JunctionGraph(self.getTopology())
+
+        return self._junctionGraph
+
+    def getMoveTable(self):
+        """
+        Get the `pacai.core.movetable.MoveTable` for this layout's walls.
+        The table is built on the first call and shared by every state using this layout.
+        """
+
+        if (self._moveTable is None):
+            self._moveTable = MoveTable(self.walls)
+
+        return self._moveTable
 
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getTopology(self):
+        """
+        Get the `pacai.core.topology.Topology` (dead ends, corridors, chokepoints, borders)
+        of this layout's walls.
+        The index is built on the first call and shared by every agent using this layout.
+        """
+
+        if (self._topology is None):
+            self._topology = Topology(self.walls)
+
+        return self._topology
+
+    def getBlueSideMask(self):
+        """
+        Get a bitmask (in the bit layout of `pacai.core.grid.Grid.getBits`)
+        of all the cells on the blue (right) side of the board.
+        """
+
+        return self._blueSideMask
+
+    def getRedSideMask(self):
+        """
+        Get a bitmask (in the bit layout of `pacai.core.grid.Grid.getBits`)
+        of all the cells on the red (left) side of the board.
+        Since cells are stored column by column, the red side is just the low bits.
+        """
+
+        return self._redSideMask
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -72,6 +216,58 @@ class Layout(object):
         row, col = [int(x) for x in pacPos]
         return ghostPos in self.visibility[row][col][pacDirection]
 
+    def _computeFingerprint(self):
+        # Bits are written in hex, since huge ints cannot be converted to decimal strings.
+        content = '%d,%d,%x,%x,%r,%r' % (
+            self.width,
+            self.height,
+            self.walls.getBits(),
+            self.food.getBits(),
+            self.capsules,
+            self.agentPositions,
+        )
+
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def _computeSideMasks(self):
+        self._redSideMask = (1 << (int(self.width / 2) * self.height)) - 1
+        self._blueSideMask = ~self._redSideMask & ((1 << (self.width * self.height)) - 1)
+
+    def __eq__(self, other):
+        if (self is other):
+            return True
+
+        if (not isinstance(other, Layout)):
+            return False
+
+        return self._fingerprint == other._fingerprint
+
+    def __getstate__(self):
+        # Derived tables are cheap to rebuild and should not bloat replays.
+        state = self.__dict__.copy()
+        state['_junctionGraph'] = None
+        state['_moveTable'] = None
+        state['_topology'] = None
+        state['_redSideMask'] = None
+        state['_blueSideMask'] = None
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        if ('_fingerprint' not in state):
+            # Layouts pickled before they had fingerprints (e.g. in old replays).
+            self._junctionGraph = None
+            self._moveTable = None
+            self._topology = None
+            self._finishLoading()
+        else:
+            self._computeSideMasks()
+
+    def __hash__(self):
+        return self._hash
+
     def __str__(self):
         return "\n".join(self.layoutText)
 
@@ -104,9 +300,9 @@ class Layout(object):
 
     def processLayoutChar(self, x, y, layoutChar, maxGhosts):
         if (layoutChar == '%'):
-            self.walls[x][y] = True
+            self.walls.set(x, y, True)
         elif (layoutChar == '.'):
-            self.food[x][y] = True
+            self.food.set(x, y, True)
         elif (layoutChar == 'o'):
             self.capsules.append((x, y))
         elif (layoutChar == 'P'):
@@ -119,6 +315,16 @@ class Layout(object):
             self.numGhosts += 1
 
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
+    """
+    Load a layout by name.
+    Layouts are parsed once and shared by the whole process
+    (for the MAX_CACHED_LAYOUTS most recently loaded files),
+    so repeated calls for an unchanged file return the same `Layout` object.
+
+    If there is an up-to-date compiled version of the layout next to the text file
+    (see `pacai.core.compiledlayout`), then it is loaded instead of parsing the text.
+    """
+
     if (not name.endswith('.lay')):
         name += '.lay'
 
@@ -126,11 +332,57 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
     if (not os.path.isfile(path)):
         raise Exception("Could not locate layout file: '%s'." % (path))
 
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    fileStamp = (stat.st_mtime_ns, stat.st_size)
+
+    key = (path, maxGhosts)
+    if (key in _layoutsByPath):
+        cachedStamp, layout = _layoutsByPath[key]
+        if (cachedStamp == fileStamp):
+            _layoutsByPath.move_to_end(key)
+            return layout
+
+    with open(path, 'rb') as file:
+        source = file.read()
+
+    compiled = compiledlayout.readCompiledLayout(compiledlayout.getCompiledPath(path),
+            compiledlayout.getSourceDigest(source))
+
+    if (compiled is not None):
+        layout = Layout.fromCompiled(compiled, maxGhosts)
+    else:
+        layout = Layout(parseLayoutSource(source), maxGhosts)
+
+    layout = registerLayout(layout)
+    _layoutsByPath[key] = (fileStamp, layout)
+    _layoutsByPath.move_to_end(key)
+
+    while (len(_layoutsByPath) > MAX_CACHED_LAYOUTS):
+        _layoutsByPath.popitem(last = False)
+
+    return layout
+
+def parseLayoutSource(source):
+    """
+    Split the raw bytes of a layout file into the rows of the layout.
+    """
+
     rows = []
-    with open(path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if (line != ''):
-                rows.append(line)
+    for line in source.decode('utf-8').splitlines():
+        line = line.strip()
+        if (line != ''):
+            rows.append(line)
+
+    return rows
+
+def registerLayout(layout):
+    """
+    Add a layout to the process-wide registry.
+    If a layout with the same content has already been registered (and is still in use),
+    that layout is returned (and should be used instead of the passed in one).
+    The registry only holds weak references,
+    so layouts are dropped from it once nothing else uses them.
+    """
 
-    return Layout(rows, maxGhosts)
+    return _layoutsByFingerprint.setdefault(layout.getFingerprint(), layout)
@@ -0,0 +1,200 @@
+"""
+Precomputed movement information for a maze.
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+class MoveTable(object):
+    """
+    A table of the legal moves from every open cell of a set of walls.
+
+    The table is built once (see `pacai.core.layout.Layout.getMoveTable`)
+    and lets the game rules answer "what can an agent on this cell do" and
+    "where does this action lead" with a single dictionary lookup,
+    instead of re-checking the surrounding walls on every call.
+
+    The table only knows about agents that are exactly on a grid point.
+    Lookups for positions between grid points return None, and callers should fall back to
+    the general methods in `pacai.core.actions.Actions`.
+    Returned action collections are tuples and should be copied before being handed out.
+
+    Per-action information for a cell is stored in tuples indexed by action code
+    (see `pacai.core.actions.Actions.actionToCode`),
+    so a lookup only ever hashes the position.
+    The game rules check legality with the code methods (e.g. `MoveTable.isLegalCode`),
+    which test a single bit of a per-cell bitmask of legal action codes.
+    """
+
+    def __init__(self, walls):
+        width = walls.getWidth()
+        height = walls.getHeight()
+
+        # {(x, y): (action, ...)}
+        self._legalActions = {}
+
+        # {(x, y): (legal action codes, ...)}
+        self._legalActionCodes = {}
+
+        # {(x, y): ((action, ...) for each heading code)}
+        self._ghostActions = {}
+
+        # {(x, y): bitmask of legal action codes}
+        self._legalCodeMasks = {}
+
+        # {(x, y): (bitmask of legal ghost action codes for each heading code)}
+        self._ghostCodeMasks = {}
+
+        # {(x, y): ((x, y) or None for each action code)}
+        self._successors = {}
+
+        # {(x, y): ((x, y), ...)}
+        self._neighbors = {}
+
+        for x in range(width):
+            for y in range(height):
+                if (walls[x][y]):
+                    continue
+
+                position = (x, y)
+
+                legal = []
+                legalCodes = []
+                neighbors = []
+                successors = [None] * Actions.NUM_ACTION_CODES
+
+                for code, action in enumerate(Actions.getCodedActions()):
+                    dx, dy = Actions.codeToVector(code)
+                    nextX = x + dx
+                    nextY = y + dy
+
+                    if (nextX < 0 or nextX >= width or nextY < 0 or nextY >= height):
+                        continue
+
+                    if (walls[nextX][nextY]):
+                        continue
+
+                    legal.append(action)
+                    legalCodes.append(code)
+                    neighbors.append((nextX, nextY))
+                    successors[code] = (nextX, nextY)
+
+                self._legalActions[position] = tuple(legal)
+                self._legalActionCodes[position] = tuple(legalCodes)
+                self._neighbors[position] = tuple(neighbors)
+                self._successors[position] = tuple(successors)
+
+                self._ghostActions[position] = tuple([_ghostActions(legal, heading)
+                        for heading in Actions.getCodedActions()])
+
+                self._legalCodeMasks[position] = _codeMask(legal)
+                self._ghostCodeMasks[position] = tuple([_codeMask(actions)
+                        for actions in self._ghostActions[position]])
+
+    def getGhostActions(self, position, heading):
+        """
+        Get the actions available to a ghost on this cell, given the direction it is facing.
+        Ghosts cannot stop, and can only turn around in a dead end.
+        Returns None if the position is not on an open grid point.
+        """
+
+        actions = self._ghostActions.get(position)
+        if (actions is None):
+            return None
+
+        return actions[Actions.actionToCode(heading)]
+
+    def getGhostActionsByCode(self, position, headingCode):
+        """
+        Same as `MoveTable.getGhostActions`, but with the heading given as an action code.
+        """
+
+        actions = self._ghostActions.get(position)
+        if (actions is None):
+            return None
+
+        return actions[headingCode]
+
+    def getLegalActions(self, position):
+        """
+        Get all the legal actions (including STOP) from this cell.
+        Returns None if the position is not on an open grid point.
+        """
+
+        return self._legalActions.get(position)
+
+    def getLegalActionCodes(self, position):
+        """
+        Get the codes (see `pacai.core.actions.Actions.actionToCode`)
+        of all the legal actions (including STOP) from this cell.
+        Returns None if the position is not on an open grid point.
+        """
+
+        return self._legalActionCodes.get(position)
+
+    def getNeighbors(self, position):
+        """
+        Get all the open cells reachable from this cell with one legal action
+        (including the cell itself).
+        Returns None if the position is not on an open grid point.
+        """
+
+        return self._neighbors.get(position)
+
+    def getSuccessor(self, position, action):
+        """
+        Get the cell that the given action leads to from this cell.
+        Returns None if the action is not legal from this position
+        or if the position is not on an open grid point.
+        """
+
+        successors = self._successors.get(position)
+        if (successors is None):
+            return None
+
+        code = Actions.getActionCode(action)
+        if (code is None):
+            return None
+
+        return successors[code]
+
+    def isLegalCode(self, position, code):
+        """
+        Check if the action with the given code is legal (including STOP) from this cell.
+        Returns None if the position is not on an open grid point.
+        """
+
+        mask = self._legalCodeMasks.get(position)
+        if (mask is None):
+            return None
+
+        return ((mask >> code) & 1) == 1
+
+    def isLegalGhostCode(self, position, headingCode, code):
+        """
+        Check if a ghost on this cell facing the given heading (a code)
+        may take the action with the given code (see `MoveTable.getGhostActions`).
+        Returns None if the position is not on an open grid point.
+        """
+
+        masks = self._ghostCodeMasks.get(position)
+        if (masks is None):
+            return None
+
+        return ((masks[headingCode] >> code) & 1) == 1
+
+def _codeMask(actions):
+    mask = 0
+    for action in actions:
+        mask |= 1 << Actions.actionToCode(action)
+
+    return mask
+
+def _ghostActions(legal, heading):
+    actions = [action for action in legal if action != Directions.STOP]
+
+    reverse = Actions.reverseDirection(heading)
+    if (reverse in actions and len(actions) > 1):
+        actions.remove(reverse)
+
+    return tuple(actions)
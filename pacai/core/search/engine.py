@@ -0,0 +1,457 @@
+"""
+Fast, general search algorithms for any `pacai.core.search.problem.SearchProblem`.
+
+Unlike the versions that keep a copy of the path for every node on the fringe,
+the searches here only remember where each state was reached from (a parent pointer),
+so a node costs the same no matter how deep it is and the path is only built once,
+when a goal is found.
+Closed sets are hashed (so states must be hashable),
+and fringes are `pacai.util.priorityQueue.IndexedPriorityQueue`s,
+which hold each state once (finding a cheaper path lowers its priority in place),
+break ties first-in-first-out (after preferring the deepest node),
+and never compare the states themselves.
+
+Every search returns a list of actions that reaches a goal, or None if there is no path.
+All searches take an optional node budget (maxNodes):
+the most states they may expand before giving up with a `SearchBudgetExceededError`.
+
+These searches can be picked by their short name from a `pacai.agents.search.base.SearchAgent`,
+e.g. `--agent-args fn=astar,heuristic=pacai.core.search.heuristic.manhattan`.
+
+Jump point search (`jumpPointSearch`) is not general:
+it only solves `pacai.core.search.position.PositionSearchProblem`s with uniform step costs,
+but it works on the walls directly and expands far fewer nodes on open layouts.
+"""
+
+import collections
+
+from pacai.core.actions import Actions
+from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.core.search.position import DEFAULT_COST_FUNCTION
+from pacai.core.search.position import PositionSearchProblem
+from pacai.util.priorityQueue import IndexedPriorityQueue
+
+# How much more a weighted A* search trusts the heuristic than the path cost.
+DEFAULT_WEIGHT = 2.0
+
+class SearchBudgetExceededError(RuntimeError):
+    """
+    A search expanded more states than its node budget allows.
+    """
+
+    pass
+
+def aStarSearch(problem, heuristic = nullHeuristic, maxNodes = None):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    With an admissible and consistent heuristic, the path is optimal.
+    """
+
+    return _bestFirstSearch(problem, heuristic, 1.0, 1.0, maxNodes)
+
+def breadthFirstSearch(problem, maxNodes = None):
+    """
+    Search the shallowest nodes first.
+    """
+
+    start = problem.startingState()
+
+    # {state: (parent state, action)}
+    parents = {start: None}
+
+    fringe = collections.deque([start])
+    numExpanded = 0
+
+    while (fringe):
+        state = fringe.popleft()
+        if (problem.isGoal(state)):
+            return _buildPath(parents, state)
+
+        numExpanded = _countExpansion(numExpanded, maxNodes)
+
+        for (nextState, action, stepCost) in problem.successorStates(state):
+            if (nextState not in parents):
+                parents[nextState] = (state, action)
+                fringe.append(nextState)
+
+    return None
+
+def greedySearch(problem, heuristic = nullHeuristic, maxNodes = None):
+    """
+    Search the node that looks closest to a goal (by the heuristic) first.
+    Fast, but the path is not necessarily optimal.
+    """
+
+    return _bestFirstSearch(problem, heuristic, 0.0, 1.0, maxNodes)
+
+def iterativeDeepeningAStarSearch(problem, heuristic = nullHeuristic, maxNodes = None):
+    """
+    Run depth-first searches limited by the combined cost and heuristic,
+    raising the limit to the smallest value that went over it until a goal is found (IDA*).
+    Only the current path is kept in memory,
+    but the same states may be expanded many times
+    (only states on the current path are skipped).
+    With an admissible heuristic, the path is optimal.
+    """
+
+    start = problem.startingState()
+    if (problem.isGoal(start)):
+        return []
+
+    bound = heuristic(start, problem)
+    numExpanded = 0
+
+    while (True):
+        actions, nextBound, numExpanded = _boundedSearch(problem, heuristic, start, bound,
+                numExpanded, maxNodes)
+
+        if (actions is not None):
+            return actions
+
+        if (nextBound == float('inf')):
+            return None
+
+        bound = nextBound
+
+def jumpPointSearch(problem, heuristic = nullHeuristic, maxNodes = None):
+    """
+    A* over jump points on a 4-connected grid (JPS).
+
+    Instead of expanding every cell, the search jumps in a straight line
+    until it reaches a cell where the path could usefully turn (a jump point):
+    the goal, a cell next to a wall corner (a forced neighbor),
+    or (when moving vertically) a cell with a jump point somewhere to its left or right.
+    Only jump points are put on the fringe and expanded,
+    so the many symmetric paths through open areas are never looked at.
+
+    Only works on a `pacai.core.search.position.PositionSearchProblem`
+    that has a goal and the default (uniform) step costs.
+    The path is optimal (it costs the same as the path from `uniformCostSearch`),
+    but may take its turns in a different order.
+    """
+
+    if (not isinstance(problem, PositionSearchProblem) or problem.goal is None
+            or problem.costFn is not DEFAULT_COST_FUNCTION):
+        raise ValueError('Jump point search only solves position search problems'
+                + ' with a goal and uniform step costs.')
+
+    start = problem.startingState()
+    goal = problem.goal
+
+    if (problem.isGoal(start)):
+        return []
+
+    grid = _JumpGrid(problem.walls, goal)
+
+    # {position: (parent position, path cost)}
+    parents = {start: (None, 0)}
+    closed = set()
+
+    # Priorities are (priority, -path cost), just like _bestFirstSearch().
+    fringe = IndexedPriorityQueue()
+    fringe.push(start, (heuristic(start, problem), 0))
+    numExpanded = 0
+
+    while (not fringe.isEmpty()):
+        position = fringe.pop()
+        parent, cost = parents[position]
+
+        if (position == goal):
+            problem.isGoal(position)
+            return _buildJumpPath(parents, position)
+
+        closed.add(position)
+        numExpanded = _countExpansion(numExpanded, maxNodes)
+
+        # Expand through the problem (like every other search),
+        # so that its expanded count and visit history (the highlight in the GUI) are kept.
+        problem.successorStates(position)
+
+        for (dx, dy) in grid.getDirections(position, parent):
+            jumpPoint = grid.jump(position, dx, dy)
+            if (jumpPoint is None or jumpPoint in closed):
+                continue
+
+            nextCost = cost + abs(jumpPoint[0] - position[0]) + abs(jumpPoint[1] - position[1])
+
+            known = parents.get(jumpPoint)
+            if (known is not None and known[1] <= nextCost):
+                continue
+
+            parents[jumpPoint] = (position, nextCost)
+            fringe.update(jumpPoint, (nextCost + heuristic(jumpPoint, problem), -nextCost))
+
+    return None
+
+def uniformCostSearch(problem, maxNodes = None):
+    """
+    Search the node of least total cost first.
+    """
+
+    return _bestFirstSearch(problem, nullHeuristic, 1.0, 0.0, maxNodes)
+
+def weightedAStarSearch(problem, heuristic = nullHeuristic, weight = DEFAULT_WEIGHT,
+        maxNodes = None):
+    """
+    A* with the heuristic multiplied by a weight (above one).
+    This expands fewer nodes than A*,
+    and the path costs at most weight times as much as the optimal path.
+    """
+
+    return _bestFirstSearch(problem, heuristic, 1.0, weight, maxNodes)
+
+def _bestFirstSearch(problem, heuristic, costWeight, heuristicWeight, maxNodes):
+    """
+    A graph search that always expands the node with the lowest
+    (costWeight * path cost + heuristicWeight * heuristic) first.
+    States are never reopened once they are closed.
+    """
+
+    start = problem.startingState()
+
+    # {state: (parent state, action, path cost)}
+    parents = {start: (None, None, 0)}
+    closed = set()
+
+    # Priorities are (priority, -path cost),
+    # so ties go to the deepest node (closest to a goal), and then to the first one queued.
+    # A state is only ever in the fringe once, finding a cheaper path just updates its priority.
+    fringe = IndexedPriorityQueue()
+    fringe.push(start, (heuristicWeight * heuristic(start, problem), 0))
+    numExpanded = 0
+
+    while (not fringe.isEmpty()):
+        state = fringe.pop()
+        cost = parents[state][2]
+
+        if (problem.isGoal(state)):
+            return _buildPath(parents, state)
+
+        closed.add(state)
+        numExpanded = _countExpansion(numExpanded, maxNodes)
+
+        for (nextState, action, stepCost) in problem.successorStates(state):
+            if (nextState in closed):
+                continue
+
+            nextCost = cost + stepCost
+
+            known = parents.get(nextState)
+            if (known is not None and known[2] <= nextCost):
+                continue
+
+            parents[nextState] = (state, action, nextCost)
+
+            priority = costWeight * nextCost
+            if (heuristicWeight != 0.0):
+                priority += heuristicWeight * heuristic(nextState, problem)
+
+            fringe.update(nextState, (priority, -nextCost))
+
+    return None
+
+def _boundedSearch(problem, heuristic, start, bound, numExpanded, maxNodes):
+    """
+    A single (iterative, not recursive) depth-first pass of IDA*.
+    Returns (actions or None, the smallest value over the bound, number of nodes expanded).
+    """
+
+    nextBound = float('inf')
+
+    numExpanded = _countExpansion(numExpanded, maxNodes)
+
+    # [(state, path cost, iterator over the successors), ...]
+    stack = [(start, 0, iter(problem.successorStates(start)))]
+    onPath = {start}
+    actions = []
+
+    while (stack):
+        state, cost, successors = stack[-1]
+
+        for (nextState, action, stepCost) in successors:
+            if (nextState in onPath):
+                continue
+
+            nextCost = cost + stepCost
+            estimate = nextCost + heuristic(nextState, problem)
+
+            if (estimate > bound):
+                nextBound = min(nextBound, estimate)
+                continue
+
+            if (problem.isGoal(nextState)):
+                actions.append(action)
+                return actions, nextBound, numExpanded
+
+            numExpanded = _countExpansion(numExpanded, maxNodes)
+
+            stack.append((nextState, nextCost, iter(problem.successorStates(nextState))))
+            onPath.add(nextState)
+            actions.append(action)
+            break
+        else:
+            # Every successor of this state is done.
+            stack.pop()
+            onPath.discard(state)
+
+            if (actions):
+                actions.pop()
+
+    return None, nextBound, numExpanded
+
+def _buildJumpPath(parents, position):
+    """
+    Walk back over the jump points, filling in the straight line between each pair.
+    """
+
+    actions = []
+
+    parent = parents[position][0]
+    while (parent is not None):
+        dx = position[0] - parent[0]
+        dy = position[1] - parent[1]
+        steps = abs(dx) + abs(dy)
+
+        action = Actions.vectorToDirection((dx // steps, dy // steps))
+        actions += [action] * steps
+
+        position = parent
+        parent = parents[position][0]
+
+    actions.reverse()
+    return actions
+
+def _buildPath(parents, state):
+    actions = []
+
+    parent = parents[state]
+    while (parent is not None and parent[0] is not None):
+        actions.append(parent[1])
+        parent = parents[parent[0]]
+
+    actions.reverse()
+    return actions
+
+def _countExpansion(numExpanded, maxNodes):
+    numExpanded += 1
+
+    if (maxNodes is not None and numExpanded > maxNodes):
+        raise SearchBudgetExceededError('Search expanded more than %d nodes.' % (maxNodes))
+
+    return numExpanded
+
+class _JumpGrid(object):
+    """
+    The walls of a jump point search, padded with a border of walls
+    so that moves never need bounds checks.
+    """
+
+    def __init__(self, walls, goal):
+        width = walls.getWidth()
+        height = walls.getHeight()
+
+        self._stride = height + 2
+        self._goal = goal
+
+        # One character per (padded) cell: '1' for walls, '0' for open cells.
+        columns = ['1' * self._stride]
+        for x in range(width):
+            column = ['1']
+            for y in range(height):
+                column.append('1' if walls[x][y] else '0')
+
+            column.append('1')
+            columns.append(''.join(column))
+
+        columns.append('1' * self._stride)
+        self._blocked = ''.join(columns)
+
+    def getDirections(self, position, parent):
+        """
+        Get the directions worth searching from a jump point that was reached from its parent.
+        Moving horizontally, a path may keep going or turn up or down.
+        Moving vertically, a path may keep going or turn left or right.
+        Paths never turn back.
+        """
+
+        if (parent is None):
+            candidates = ((1, 0), (-1, 0), (0, 1), (0, -1))
+        else:
+            dx = _sign(position[0] - parent[0])
+            dy = _sign(position[1] - parent[1])
+
+            if (dx != 0):
+                candidates = ((dx, 0), (0, 1), (0, -1))
+            else:
+                candidates = ((0, dy), (1, 0), (-1, 0))
+
+        x, y = position
+        return [(dx, dy) for (dx, dy) in candidates if not self._isBlocked(x + dx, y + dy)]
+
+    def jump(self, position, dx, dy):
+        """
+        Move from a position in a straight line until reaching a jump point.
+        Returns None if a wall is hit first.
+        """
+
+        x, y = position
+
+        if (dx != 0):
+            return self._jumpHorizontally(x, y, dx)
+
+        isBlocked = self._isBlocked
+        while (True):
+            y += dy
+            if (isBlocked(x, y)):
+                return None
+
+            if ((x, y) == self._goal):
+                return (x, y)
+
+            # A forced neighbor: an opening to the side that was walled off one step back.
+            if ((not isBlocked(x - 1, y) and isBlocked(x - 1, y - dy))
+                    or (not isBlocked(x + 1, y) and isBlocked(x + 1, y - dy))):
+                return (x, y)
+
+            # Horizontal moves are only searched from here,
+            # so any jump point to the side makes this a jump point.
+            if (self._jumpHorizontally(x, y, 1) is not None
+                    or self._jumpHorizontally(x, y, -1) is not None):
+                return (x, y)
+
+    def _isBlocked(self, x, y):
+        return self._blocked[(x + 1) * self._stride + y + 1] == '1'
+
+    def _jumpHorizontally(self, x, y, dx):
+        isBlocked = self._isBlocked
+
+        while (True):
+            x += dx
+            if (isBlocked(x, y)):
+                return None
+
+            if ((x, y) == self._goal):
+                return (x, y)
+
+            if ((not isBlocked(x, y - 1) and isBlocked(x - dx, y - 1))
+                    or (not isBlocked(x, y + 1) and isBlocked(x - dx, y + 1))):
+                return (x, y)
+
+def _sign(value):
+    if (value > 0):
+        return 1
+
+    if (value < 0):
+        return -1
+
+    return 0
+
+# Abbreviations
+
+astar = aStarSearch
+bfs = breadthFirstSearch
+greedy = greedySearch
+idastar = iterativeDeepeningAStarSearch
+jps = jumpPointSearch
+ucs = uniformCostSearch
+wastar = weightedAStarSearch
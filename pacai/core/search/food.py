@@ -1,5 +1,6 @@
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
+from pacai.core.grid import Grid
 from pacai.core.search.problem import SearchProblem
 
 class FoodSearchProblem(SearchProblem):
@@ -11,6 +12,11 @@ class FoodSearchProblem(SearchProblem):
     Wwhere pacmanPosition is a tuple (x, y) of integers specifying Pacman's position,
     and foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`,
     specifying remaining food.
+
+    Heuristics that should work with any food search problem
+    (including `CompactFoodSearchProblem`) can read states through the problem:
+    `FoodSearchProblem.getPosition`, `FoodSearchProblem.getFoodGrid`,
+    `FoodSearchProblem.getCellId`, and `FoodSearchProblem.getFoodBits`.
     """
 
     def __init__(self, startingGameState):
@@ -21,6 +27,12 @@ class FoodSearchProblem(SearchProblem):
         self.startingGameState = startingGameState
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
+        self._topology = startingGameState.getInitialLayout().getTopology()
+
+        # [(x, y), ...]
+        # The food the search started with, indexed by food bit (see getFoodBits()).
+        self._foodPositions = startingGameState.getFood().asList()
+
     def startingState(self):
         return self.start
 
@@ -40,7 +52,7 @@ class FoodSearchProblem(SearchProblem):
             nextx, nexty = int(x + dx), int(y + dy)
             if not self.walls[nextx][nexty]:
                 nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
+                nextFood.set(nextx, nexty, False)
                 successors.append((((nextx, nexty), nextFood), direction, 1))
 
         return successors
@@ -51,7 +63,7 @@ class FoodSearchProblem(SearchProblem):
         If those actions include an illegal move, return 999999.
         """
 
-        x, y = self.startingState()[0]
+        x, y = self.getPosition(self.startingState())
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -62,3 +74,163 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+    def getCellId(self, state):
+        """
+        Get the id of Pacman's cell in a state (see `pacai.core.topology.Topology.getCellId`).
+        """
+
+        return self._topology.getCellId(state[0])
+
+    def getFoodBits(self, state):
+        """
+        Get the food that is left in a state as an int,
+        where bit i is set while `FoodSearchProblem.getFoodPositions()[i]` has not been eaten.
+        """
+
+        foodGrid = state[1]
+
+        foodBits = 0
+        for bit, (x, y) in enumerate(self._foodPositions):
+            if (foodGrid.get(x, y)):
+                foodBits |= 1 << bit
+
+        return foodBits
+
+    def getFoodGrid(self, state):
+        """
+        Get a `pacai.core.grid.Grid` of the food that is left in a state.
+        """
+
+        return state[1]
+
+    def getFoodPositions(self, state = None):
+        """
+        Get the positions of the food that is left in a state,
+        or (without a state) all the food the search started with (indexed by food bit).
+        """
+
+        if (state is None):
+            return self._foodPositions
+
+        return state[1].asList()
+
+    def getNumFood(self, state):
+        return state[1].count()
+
+    def getPosition(self, state):
+        """
+        Get Pacman's position (x, y) in a state.
+        """
+
+        return state[0]
+
+    def toGridState(self, state):
+        """
+        Convert a state into the form (pacmanPosition, foodGrid).
+        """
+
+        return (self.getPosition(state), self.getFoodGrid(state))
+
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """
+    A `FoodSearchProblem` with small states, for searches that need to hold a lot of them.
+
+    A search state in this problem is a tuple of two ints (cellId, foodBits).
+    Where cellId is the id of Pacman's cell (see `pacai.core.topology.Topology.getCellId`),
+    and foodBits has one bit for every piece of food the search started with
+    (bit i is set while `FoodSearchProblem.getFoodPositions()[i]` has not been eaten).
+    States hash fast and share nothing, and successors are made with a single bit operation.
+
+    Heuristics written for (pacmanPosition, foodGrid) states
+    (like `pacai.student.searchAgents.foodHeuristic`) have to be wrapped with `gridHeuristic`.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(startingGameState)
+
+        cells = self._topology.getCells()
+
+        # [the bit of the food on each cell (or 0), ...]
+        foodBits = [0] * len(cells)
+        for bit, position in enumerate(self._foodPositions):
+            foodBits[self._topology.getCellId(position)] = 1 << bit
+
+        # [((next cell id, action, mask that eats the food on the next cell), ...), ...]
+        self._steps = []
+        for (x, y) in cells:
+            steps = []
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(direction)
+                nextId = self._topology.getCellId((int(x + dx), int(y + dy)))
+                if (nextId is not None):
+                    steps.append((nextId, direction, ~foodBits[nextId]))
+
+            self._steps.append(tuple(steps))
+
+        startId = self._topology.getCellId(startingGameState.getPacmanPosition())
+        self.start = (startId, (1 << len(self._foodPositions)) - 1)
+
+    # Override
+    def getCellId(self, state):
+        return state[0]
+
+    # Override
+    def getFoodBits(self, state):
+        return state[1]
+
+    # Override
+    def getFoodGrid(self, state):
+        height = self.walls.getHeight()
+
+        bits = 0
+        count = 0
+        for (x, y) in self._iterFood(state[1]):
+            bits |= 1 << (x * height + y)
+            count += 1
+
+        return Grid.fromBits(self.walls.getWidth(), height, bits, count)
+
+    # Override
+    def getFoodPositions(self, state = None):
+        if (state is None):
+            return self._foodPositions
+
+        return list(self._iterFood(state[1]))
+
+    # Override
+    def getNumFood(self, state):
+        return bin(state[1]).count('1')
+
+    # Override
+    def getPosition(self, state):
+        return self._topology.getCells()[state[0]]
+
+    # Override
+    def isGoal(self, state):
+        return state[1] == 0
+
+    # Override
+    def successorStates(self, state):
+        self._numExpanded += 1
+
+        foodBits = state[1]
+        return [((nextId, foodBits & eatMask), direction, 1)
+                for (nextId, direction, eatMask) in self._steps[state[0]]]
+
+    def _iterFood(self, foodBits):
+        while (foodBits):
+            lowest = foodBits & -foodBits
+            yield self._foodPositions[lowest.bit_length() - 1]
+            foodBits ^= lowest
+
+def gridHeuristic(heuristic):
+    """
+    Wrap a heuristic written for (pacmanPosition, foodGrid) states
+    so that it can be used with any `FoodSearchProblem` (including `CompactFoodSearchProblem`).
+    """
+
+    def wrapper(state, problem):
+        return heuristic(problem.toGridState(state), problem)
+
+    return wrapper
@@ -0,0 +1,187 @@
+"""
+Maze distances for food heuristics (see `pacai.core.search.food.FoodSearchProblem`).
+"""
+
+from pacai.core.distanceCalculator import Distancer
+
+class FoodDistances(object):
+    """
+    The maze distances that food heuristics need, computed once per search problem:
+    the distance between every pair of food the search started with,
+    and the distance from every open cell to every food.
+
+    The maze distances themselves come from the `pacai.core.distanceCalculator.DistanceTable`
+    for the problem's layout, which is computed once per layout and shared by the whole process.
+
+    Anything that only depends on which food is left is memoized by food bits
+    (see `pacai.core.search.food.FoodSearchProblem.getFoodBits`),
+    so the many states that have the same food left (at different positions) share the work.
+    The number of lookups that were (hits) and were not (misses) already memoized are counted,
+    see `FoodDistances.getHits` and `FoodDistances.getMisses`.
+    """
+
+    def __init__(self, problem):
+        self._problem = problem
+
+        distancer = Distancer(problem.startingGameState.getInitialLayout())
+        distancer.getMazeDistances()
+
+        # [(x, y), ...], indexed by food bit.
+        foods = problem.getFoodPositions()
+
+        # [[distance from every cell (by cell id) to the food], ...], indexed by food bit.
+        # Distance table cell ids are the same as the cell ids of food search problems.
+        self._rows = [distancer.getDistanceRow(food) for food in foods]
+
+        # [[distance to every other food (by food bit)], ...], indexed by food bit.
+        foodIds = [distancer.getCellId(food) for food in foods]
+        self._foodDistances = [[row[foodId] for foodId in foodIds] for row in self._rows]
+
+        # {food bits: (food bit, ...)}
+        self._bits = {}
+
+        # {food bits: length of the minimum spanning tree of the food}
+        self._treeLengths = {}
+
+        self._hits = 0
+        self._misses = 0
+
+    def getDistance(self, cellId, bit):
+        """
+        Get the maze distance from a cell to the food with the given bit.
+        """
+
+        return self._rows[bit][cellId]
+
+    def getFarthestDistance(self, state):
+        """
+        Get the maze distance from pacman to the farthest food that is left in a state
+        (zero if there is no food).
+        """
+
+        cellId = self._problem.getCellId(state)
+        rows = self._rows
+
+        farthest = 0
+        for bit in self.getFoodBits(self._problem.getFoodBits(state)):
+            distance = rows[bit][cellId]
+            if (distance > farthest):
+                farthest = distance
+
+        return farthest
+
+    def getFoodBits(self, foodBits):
+        """
+        Get the bits (indexes) of the food that is left in some food bits.
+        """
+
+        bits = self._bits.get(foodBits)
+        if (bits is not None):
+            self._hits += 1
+            return bits
+
+        self._misses += 1
+
+        bits = []
+        remaining = foodBits
+        while (remaining):
+            lowest = remaining & -remaining
+            bits.append(lowest.bit_length() - 1)
+            remaining ^= lowest
+
+        bits = tuple(bits)
+        self._bits[foodBits] = bits
+
+        return bits
+
+    def getFoodDistance(self, bit1, bit2):
+        """
+        Get the maze distance between two food (by their bits).
+        """
+
+        return self._foodDistances[bit1][bit2]
+
+    def getHits(self):
+        return self._hits
+
+    def getMisses(self):
+        return self._misses
+
+    def getNearestDistance(self, state):
+        """
+        Get the maze distance from pacman to the nearest food that is left in a state
+        (zero if there is no food).
+        """
+
+        cellId = self._problem.getCellId(state)
+        rows = self._rows
+
+        bits = self.getFoodBits(self._problem.getFoodBits(state))
+        if (len(bits) == 0):
+            return 0
+
+        return min([rows[bit][cellId] for bit in bits])
+
+    def getSpanningTreeLength(self, foodBits):
+        """
+        Get the total length of the minimum spanning tree (by maze distance)
+        over the food that is left in some food bits.
+        Collecting all of that food takes at least this many moves after reaching the first one.
+        """
+
+        length = self._treeLengths.get(foodBits)
+        if (length is not None):
+            self._hits += 1
+            return length
+
+        self._misses += 1
+
+        length = self._computeSpanningTreeLength(self.getFoodBits(foodBits))
+        self._treeLengths[foodBits] = length
+
+        return length
+
+    def _computeSpanningTreeLength(self, bits):
+        """
+        Prim's algorithm on the complete graph of the food (O(n^2), which suits a dense graph).
+        """
+
+        if (len(bits) <= 1):
+            return 0
+
+        foodDistances = self._foodDistances
+
+        # [the shortest edge from each food outside the tree to the tree, ...]
+        firstDistances = foodDistances[bits[0]]
+        outside = list(bits[1:])
+        edges = [firstDistances[bit] for bit in outside]
+
+        length = 0
+        while (outside):
+            shortest = min(edges)
+            index = edges.index(shortest)
+            length += shortest
+
+            bit = outside.pop(index)
+            edges.pop(index)
+
+            bitDistances = foodDistances[bit]
+            for i in range(len(outside)):
+                distance = bitDistances[outside[i]]
+                if (distance < edges[i]):
+                    edges[i] = distance
+
+        return length
+
+def getFoodDistances(problem):
+    """
+    Get the `FoodDistances` for a food search problem,
+    building it (and storing it in the problem's heuristicInfo) on the first call.
+    """
+
+    distances = problem.heuristicInfo.get('foodDistances')
+    if (distances is None):
+        distances = FoodDistances(problem)
+        problem.heuristicInfo['foodDistances'] = distances
+
+    return distances
@@ -4,6 +4,7 @@ goal in the provided `pacai.core.search.problem.SearchProblem`.
 """
 
 from pacai.core import distance
+from pacai.core.search.fooddistances import getFoodDistances
 
 def null(state, problem = None):
     """
@@ -34,7 +35,33 @@ def euclidean(position, problem):
 
 def numFood(state, problem):
     """
-    This heuristic is the amount of food left to on the board.
+    This heuristic is the amount of food left to on the board
+    (see `pacai.core.search.food.FoodSearchProblem`).
     """
 
-    return state[1].count()
+    return problem.getNumFood(state)
+
+def farthestFood(state, problem):
+    """
+    This heuristic is the maze distance to the farthest food left on the board
+    (see `pacai.core.search.food.FoodSearchProblem`).
+    Maze distances are computed once and kept in the problem's heuristicInfo
+    (see `pacai.core.search.fooddistances.FoodDistances`).
+    """
+
+    return getFoodDistances(problem).getFarthestDistance(state)
+
+def foodSpanningTree(state, problem):
+    """
+    This heuristic is the maze distance to the nearest food,
+    plus the length of the minimum spanning tree (by maze distance) over all the food left
+    (see `pacai.core.search.food.FoodSearchProblem`).
+    It is admissible and consistent, and usually much closer to the true cost than
+    `farthestFood`.
+    Spanning trees are memoized by the food that is left
+    (see `pacai.core.search.fooddistances.FoodDistances`).
+    """
+
+    distances = getFoodDistances(problem)
+    foodBits = problem.getFoodBits(state)
+    return distances.getNearestDistance(state) + distances.getSpanningTreeLength(foodBits)
@@ -0,0 +1,88 @@
+from pacai.core.search.position import DEFAULT_COST_FUNCTION
+from pacai.core.search.position import DEFAULT_GOAL_POSITION
+from pacai.core.search.position import PositionSearchProblem
+
+class JunctionSearchProblem(PositionSearchProblem):
+    """
+    A `pacai.core.search.position.PositionSearchProblem` that plans on the
+    `pacai.core.junctiongraph.JunctionGraph` of the maze instead of cell by cell.
+
+    States are still (x, y) positions, but the only states are junctions
+    (and the start and goal, which may be inside a corridor).
+    Each successor walks a whole corridor (or up to the goal),
+    so its action is the tuple of actions along the walk
+    and its cost is the cost of every cell entered along the way.
+    Use `JunctionSearchProblem.expandActions` to get the actions for an agent
+    (`pacai.agents.search.base.SearchAgent` does this automatically).
+    """
+
+    def __init__(self, gameState, costFn = DEFAULT_COST_FUNCTION,
+            goal = DEFAULT_GOAL_POSITION, start = None):
+        super().__init__(gameState, costFn = costFn, goal = goal, start = start)
+
+        self.graph = gameState.getInitialLayout().getJunctionGraph()
+        self._topology = self.graph.getTopology()
+
+        # Where the goal is inside a corridor (corridor index, path index), if it is.
+        self._goalLocation = None
+
+        goalId = self._topology.getCellId(self.goal)
+        if (goalId is not None):
+            self._goalLocation = self.graph.getLocation(goalId)
+
+    # Override
+    def expandActions(self, actions):
+        expanded = []
+        for walk in actions:
+            expanded.extend(walk)
+
+        return expanded
+
+    # Override
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions along the walk to them, and the cost of the walk.
+        """
+
+        # {successor: (successor, actions, cost)}
+        # Only the cheapest walk to each successor is kept.
+        successors = {}
+        cells = self._topology.getCells()
+
+        for (corridorIndex, fromIndex, toIndex) in self.graph.getWalks(
+                self._topology.getCellId(state)):
+            # Stop at the goal if it is along the way.
+            if (self._goalLocation is not None and self._goalLocation[0] == corridorIndex):
+                goalIndex = self._goalLocation[1]
+                if (min(fromIndex, toIndex) < goalIndex < max(fromIndex, toIndex)):
+                    toIndex = goalIndex
+
+            path = self.graph.getPath(corridorIndex)
+
+            step = 1
+            if (toIndex < fromIndex):
+                step = -1
+
+            cost = 0
+            for pathIndex in range(fromIndex + step, toIndex + step, step):
+                cost += self.costFn(cells[path[pathIndex]])
+
+            nextState = cells[path[toIndex]]
+
+            # Loops that come back to the same cell never help.
+            if (nextState == state):
+                continue
+
+            if (nextState in successors and successors[nextState][2] <= cost):
+                continue
+
+            actions = self.graph.getActions(corridorIndex, fromIndex, toIndex)
+            successors[nextState] = (nextState, actions, cost)
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        if (state not in self._visitedLocations):
+            self._visitedLocations.add(state)
+            self._visitHistory.append(state)
+
+        return list(successors.values())
@@ -43,6 +43,15 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def expandActions(self, actions):
+        """
+        Turn the actions found by a search on this problem into the actions an agent takes.
+        Most problems use agent actions directly,
+        but problems that take bigger steps (like walking a whole corridor) expand them here.
+        """
+
+        return actions
+
     def getExpandedCount(self):
         return self._numExpanded
 
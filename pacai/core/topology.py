@@ -0,0 +1,528 @@
+"""
+The static structure (topology) of a maze.
+"""
+
+import collections
+
+class Topology(object):
+    """
+    An index of the structure of a set of walls:
+    the graph of open cells, dead ends, corridors, chokepoints, and the border between the teams.
+
+    The index is built once (see `pacai.core.layout.Layout.getTopology`)
+    with linear time graph algorithms and shared by every agent using the layout,
+    so questions like "am I in a dead end?" are a single list lookup.
+
+    Open cells are numbered in the order of `pacai.core.grid.Grid.asList`
+    (the same ids as `pacai.core.distanceCalculator.DistanceTable`).
+    Per-cell queries take positions (x, y) and return None for walls and positions off the board,
+    while the graph (neighbors, junctions, and corridors) is described with cell ids.
+
+    The maze graph is compressed into junctions and corridors.
+    A junction is any cell that does not have exactly two open neighbors
+    (an intersection or the very end of a dead end).
+    A corridor is the chain of two-neighbor cells between two junctions,
+    and is stored as (first junction id, last junction id, (cell id, ...)),
+    where the cells are the corridor's interior in order from the first junction to the last.
+    Two adjacent junctions are joined by a corridor with no interior.
+    Loops without any junction get one of their cells promoted to a junction.
+
+    A dead end is a part of the maze that can only be left through a single cell (its exit),
+    away from the core of the maze.
+    Dead ends may have loops inside of them, and may have smaller dead ends inside of them
+    (cells are in the largest dead end they are in).
+    The core is the center of the maze's tree of blocks (biconnected components):
+    the block or articulation point that leaves no piece of more than half of the maze
+    when it is walled off.
+    So in a maze with loops the core is usually its big loopy part,
+    and in a maze without any loops (a tree) the core is the cell at its center.
+    The depth of a cell in a dead end is the number of moves it takes to get out to the exit
+    (cells that are not in a dead end have a depth of zero).
+    """
+
+    def __init__(self, walls):
+        self._width = walls.getWidth()
+        self._height = walls.getHeight()
+
+        # [(x, y), ...]
+        self._cells = walls.asList(False)
+        numCells = len(self._cells)
+
+        # The cell id for every grid index (x * height + y), -1 for walls.
+        self._cellIds = [-1] * (self._width * self._height)
+        for cellId, (x, y) in enumerate(self._cells):
+            self._cellIds[x * self._height + y] = cellId
+
+        # [(neighbor cell id, ...), ...]
+        self._neighbors = []
+        for (x, y) in self._cells:
+            neighbors = []
+            for neighbor in ((x + 1, y), (x, y + 1), (x, y - 1), (x - 1, y)):
+                neighborId = self._getCellId(neighbor)
+                if (neighborId is not None):
+                    neighbors.append(neighborId)
+
+            self._neighbors.append(tuple(neighbors))
+
+        # [is junction, ...]
+        self._isJunction = [len(neighbors) != 2 for neighbors in self._neighbors]
+
+        # [(first junction id, last junction id, (cell id, ...)), ...]
+        self._corridors = []
+
+        # [corridor index (or -1 for junctions), ...]
+        self._cellCorridors = [-1] * numCells
+
+        # [position in its corridor's interior (or -1 for junctions), ...]
+        self._cellCorridorOffsets = [-1] * numCells
+
+        self._computeCorridors()
+
+        # [is articulation point, ...]
+        self._isArticulationPoint = [False] * numCells
+
+        # [[cell id, ...], ...]
+        blocks = self._computeBlocks()
+
+        # [dead end depth, ...]
+        self._deadEndDepths = [0] * numCells
+
+        # [exit cell id (or -1 if not in a dead end), ...]
+        self._deadEndExits = [-1] * numCells
+
+        self._computeDeadEnds(blocks)
+
+        # Cells on the border between the teams that have an open neighbor on the other side.
+        # Red is the left side of the board (see `pacai.core.layout.Layout.getRedSideMask`).
+        redX = int(self._width / 2) - 1
+        self._redBorder = []
+        self._blueBorder = []
+
+        for y in range(self._height):
+            if (self._getCellId((redX, y)) is not None
+                    and self._getCellId((redX + 1, y)) is not None):
+                self._redBorder.append((redX, y))
+                self._blueBorder.append((redX + 1, y))
+
+    def getArticulationPoints(self):
+        """
+        Get all the articulation points (chokepoints) of the maze:
+        the cells that would split the maze into more pieces if they were walled off.
+        """
+
+        return [self._cells[cellId] for cellId in range(len(self._cells))
+                if self._isArticulationPoint[cellId]]
+
+    def getBlueBorder(self):
+        """
+        Get the cells on the blue side of the border that can be crossed to the red side.
+        """
+
+        return self._blueBorder
+
+    def getCellId(self, position):
+        """
+        Get the id of an open cell, or None if the position is a wall or off the board.
+        """
+
+        return self._getCellId(position)
+
+    def getCells(self):
+        """
+        Get all the open cells, indexed by cell id.
+        """
+
+        return self._cells
+
+    def getCorridor(self, position):
+        """
+        Get the index (into `Topology.getCorridors`) of the corridor that a cell is inside of.
+        Returns None for junctions, walls, and positions off the board.
+        """
+
+        cellId = self._getCellId(position)
+        if (cellId is None or self._cellCorridors[cellId] < 0):
+            return None
+
+        return self._cellCorridors[cellId]
+
+    def getCorridorOffset(self, position):
+        """
+        Get where a cell is inside its corridor,
+        i.e. its index in the corridor's interior (counted from the corridor's first junction).
+        Returns None for junctions, walls, and positions off the board.
+        """
+
+        cellId = self._getCellId(position)
+        if (cellId is None or self._cellCorridorOffsets[cellId] < 0):
+            return None
+
+        return self._cellCorridorOffsets[cellId]
+
+    def getCorridors(self):
+        """
+        Get all the corridors, as (first junction id, last junction id, (cell id, ...)).
+        The length of a corridor (in moves between its junctions) is one more than its interior.
+        """
+
+        return self._corridors
+
+    def getDeadEndDepth(self, position):
+        """
+        Get the number of moves it takes to get from a cell out of its dead end
+        (zero if the cell is not in a dead end).
+        Returns None for walls and positions off the board.
+        """
+
+        cellId = self._getCellId(position)
+        if (cellId is None):
+            return None
+
+        return self._deadEndDepths[cellId]
+
+    def getDeadEndExit(self, position):
+        """
+        Get the cell that a dead end has to be left through.
+        Returns None if the position is not in a dead end.
+        """
+
+        cellId = self._getCellId(position)
+        if (cellId is None or self._deadEndExits[cellId] < 0):
+            return None
+
+        return self._cells[self._deadEndExits[cellId]]
+
+    def getJunctions(self):
+        """
+        Get the ids of all the junction cells.
+        """
+
+        return [cellId for cellId in range(len(self._cells)) if self._isJunction[cellId]]
+
+    def getNeighbors(self, cellId):
+        """
+        Get the ids of the open cells next to a cell.
+        """
+
+        return self._neighbors[cellId]
+
+    def getNumCells(self):
+        return len(self._cells)
+
+    def getRedBorder(self):
+        """
+        Get the cells on the red side of the border that can be crossed to the blue side.
+        """
+
+        return self._redBorder
+
+    def isArticulationPoint(self, position):
+        cellId = self._getCellId(position)
+        if (cellId is None):
+            return None
+
+        return self._isArticulationPoint[cellId]
+
+    def isInDeadEnd(self, position):
+        cellId = self._getCellId(position)
+        if (cellId is None):
+            return None
+
+        return self._deadEndDepths[cellId] > 0
+
+    def isJunction(self, position):
+        cellId = self._getCellId(position)
+        if (cellId is None):
+            return None
+
+        return self._isJunction[cellId]
+
+    def _computeBlocks(self):
+        """
+        Find the blocks (biconnected components) and the articulation points
+        with (an iterative version of) Tarjan's algorithm.
+        Returns the blocks as [[cell id, ...], ...].
+        Articulation points are in every block they join, and every other cell is in one block.
+        """
+
+        numCells = len(self._cells)
+        neighbors = self._neighbors
+
+        discovered = [-1] * numCells
+        low = [0] * numCells
+        time = 0
+
+        blocks = []
+
+        for root in range(numCells):
+            if (discovered[root] >= 0):
+                continue
+
+            discovered[root] = time
+            low[root] = time
+            time += 1
+
+            # A cell without any open neighbors is a block by itself.
+            if (len(neighbors[root]) == 0):
+                blocks.append([root])
+                continue
+
+            rootChildren = 0
+
+            # [(cell id, parent id, next neighbor index), ...]
+            stack = [(root, -1, 0)]
+
+            # The cells that have been discovered but are not in a block yet.
+            cellStack = [root]
+
+            while (stack):
+                cellId, parentId, index = stack[-1]
+
+                if (index < len(neighbors[cellId])):
+                    stack[-1] = (cellId, parentId, index + 1)
+
+                    neighborId = neighbors[cellId][index]
+                    if (neighborId == parentId):
+                        continue
+
+                    if (discovered[neighborId] >= 0):
+                        low[cellId] = min(low[cellId], discovered[neighborId])
+                        continue
+
+                    discovered[neighborId] = time
+                    low[neighborId] = time
+                    time += 1
+
+                    if (cellId == root):
+                        rootChildren += 1
+
+                    stack.append((neighborId, cellId, 0))
+                    cellStack.append(neighborId)
+                    continue
+
+                stack.pop()
+                if (parentId < 0):
+                    continue
+
+                low[parentId] = min(low[parentId], low[cellId])
+                if (low[cellId] < discovered[parentId]):
+                    continue
+
+                # The parent cuts this cell (and everything found after it) off.
+                if (parentId != root):
+                    self._isArticulationPoint[parentId] = True
+
+                block = [parentId]
+                while (block[-1] != cellId):
+                    block.append(cellStack.pop())
+
+                blocks.append(block)
+
+            if (rootChildren > 1):
+                self._isArticulationPoint[root] = True
+
+        return blocks
+
+    def _computeCorridors(self):
+        isJunction = self._isJunction
+
+        # Every corridor is walked from both of its ends, only the first walk is kept.
+        seen = set()
+
+        for cellId in range(len(self._cells)):
+            if (isJunction[cellId]):
+                self._walkCorridors(cellId, seen)
+
+        # Any cells that are still not in a corridor are in loops without any junctions.
+        for cellId in range(len(self._cells)):
+            if (not isJunction[cellId] and self._cellCorridors[cellId] < 0):
+                isJunction[cellId] = True
+                self._walkCorridors(cellId, seen)
+
+    def _computeDeadEnds(self, blocks):
+        """
+        Build the tree of blocks (the block-cut tree),
+        where every block is joined to the articulation points in it.
+        Root each piece of the tree at its center (the core),
+        then every articulation point that is not in the core's block
+        is the exit of the dead end below it.
+        """
+
+        numCells = len(self._cells)
+        numBlocks = len(blocks)
+        neighbors = self._neighbors
+        isArticulationPoint = self._isArticulationPoint
+
+        # Tree nodes are the blocks (by index), followed by the articulation points
+        # (numBlocks + cell id).
+        numNodes = numBlocks + numCells
+
+        # [[node, ...], ...]
+        treeNeighbors = [[] for node in range(numNodes)]
+
+        # [the number of cells that belong to a node, ...]
+        # Articulation points belong to their own node, and other cells to their block.
+        weights = [0] * numNodes
+
+        # [the node of every cell, ...]
+        cellNodes = [0] * numCells
+
+        for blockIndex, block in enumerate(blocks):
+            for cellId in block:
+                if (isArticulationPoint[cellId]):
+                    cellNode = numBlocks + cellId
+                    treeNeighbors[blockIndex].append(cellNode)
+                    treeNeighbors[cellNode].append(blockIndex)
+                else:
+                    cellNode = blockIndex
+
+                cellNodes[cellId] = cellNode
+
+        for cellId in range(numCells):
+            weights[cellNodes[cellId]] += 1
+
+        # [the highest articulation point above a node (or -1), ...]
+        exits = [-1] * numNodes
+
+        visited = [False] * numNodes
+        for start in range(numBlocks):
+            if (visited[start]):
+                continue
+
+            center = self._findTreeCenter(start, treeNeighbors, weights, visited)
+
+            # Walk down from the center, passing the highest articulation point down.
+            fringe = [center]
+            parents = {center: -1}
+            while (fringe):
+                node = fringe.pop()
+
+                childExit = exits[node]
+                if (childExit < 0 and node >= numBlocks):
+                    childExit = node - numBlocks
+
+                for child in treeNeighbors[node]:
+                    if (child != parents[node]):
+                        parents[child] = node
+                        exits[child] = childExit
+                        fringe.append(child)
+
+        for cellId in range(numCells):
+            self._deadEndExits[cellId] = exits[cellNodes[cellId]]
+
+        # Walk into the dead ends from their exits (breadth first, dead ends may have loops).
+        fringe = collections.deque()
+        for cellId in range(numCells):
+            exitId = self._deadEndExits[cellId]
+            if (exitId >= 0 and exitId in neighbors[cellId]):
+                self._deadEndDepths[cellId] = 1
+                fringe.append(cellId)
+
+        while (fringe):
+            cellId = fringe.popleft()
+            exitId = self._deadEndExits[cellId]
+
+            for neighborId in neighbors[cellId]:
+                if (self._deadEndExits[neighborId] == exitId
+                        and self._deadEndDepths[neighborId] == 0):
+                    self._deadEndDepths[neighborId] = self._deadEndDepths[cellId] + 1
+                    fringe.append(neighborId)
+
+    def _findTreeCenter(self, start, treeNeighbors, weights, visited):
+        """
+        Find the node of a (block-cut) tree that leaves the lightest largest piece when removed.
+        Marks every node of the tree as visited.
+        """
+
+        # [node, ...] in the order they were reached, and {node: parent node}.
+        order = [start]
+        parents = {start: -1}
+        visited[start] = True
+
+        for node in order:
+            for child in treeNeighbors[node]:
+                if (not visited[child]):
+                    visited[child] = True
+                    parents[child] = node
+                    order.append(child)
+
+        # {node: the total weight of the node and everything below it}
+        subtreeWeights = {node: weights[node] for node in order}
+
+        # {node: the weight of the heaviest piece below it}
+        heaviestChildren = {node: 0 for node in order}
+
+        for node in reversed(order):
+            parent = parents[node]
+            if (parent >= 0):
+                subtreeWeights[parent] += subtreeWeights[node]
+                heaviestChildren[parent] = max(heaviestChildren[parent], subtreeWeights[node])
+
+        totalWeight = subtreeWeights[start]
+
+        center = start
+        centerPiece = totalWeight
+        for node in order:
+            piece = max(heaviestChildren[node], totalWeight - subtreeWeights[node])
+            if (piece < centerPiece):
+                center = node
+                centerPiece = piece
+
+        return center
+
+    def _getCellId(self, position):
+        x, y = position
+
+        # Grid positions may be floats (e.g. from `pacai.core.actions.Actions.getSuccessor`).
+        if (type(x) is not int or type(y) is not int):
+            if (x != int(x) or y != int(y)):
+                return None
+
+            x = int(x)
+            y = int(y)
+
+        if (x < 0 or y < 0 or x >= self._width or y >= self._height):
+            return None
+
+        cellId = self._cellIds[x * self._height + y]
+        if (cellId < 0):
+            return None
+
+        return cellId
+
+    def _walkCorridors(self, startId, seen):
+        """
+        Follow every corridor leaving a junction until it reaches another junction.
+        """
+
+        neighbors = self._neighbors
+        isJunction = self._isJunction
+
+        for firstStep in neighbors[startId]:
+            previousId = startId
+            cellId = firstStep
+            interior = []
+
+            while (not isJunction[cellId]):
+                interior.append(cellId)
+
+                nextId = neighbors[cellId][0]
+                if (nextId == previousId):
+                    nextId = neighbors[cellId][1]
+
+                previousId = cellId
+                cellId = nextId
+
+            # The same corridor walked from the other end.
+            key = min((startId, firstStep), (cellId, previousId))
+            if (key in seen):
+                continue
+
+            seen.add(key)
+
+            corridorIndex = len(self._corridors)
+            for offset, interiorId in enumerate(interior):
+                self._cellCorridors[interiorId] = corridorIndex
+                self._cellCorridorOffsets[interiorId] = offset
+
+            self._corridors.append((startId, cellId, tuple(interior)))
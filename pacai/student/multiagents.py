@@ -127,8 +127,8 @@ class MinimaxAgent(MultiAgentSearchAgent):
         if 'Stop' in legalActions:
             legalActions.remove('Stop')
         for action in legalActions:
-            successor = s.generateSuccessor(0, action)
-            minvalue = self.minValue(successor, depth, 1)
+            with s.withAction(0, action):
+                minvalue = self.minValue(s, depth, 1)
             value = max(value, minvalue)
         return value
 
@@ -140,11 +140,11 @@ class MinimaxAgent(MultiAgentSearchAgent):
         if 'Stop' in legalActions:
             legalActions.remove('Stop')
         for action in legalActions:
-            successor = s.generateSuccessor(agent, action)
-            if agent == (s.getNumAgents() - 1):
-                value = min(value, self.maxValue(successor, depth + 1))
-            else:
-                value = min(value, self.minValue(successor, depth, agent + 1))
+            with s.withAction(agent, action):
+                if agent == (s.getNumAgents() - 1):
+                    value = min(value, self.maxValue(s, depth + 1))
+                else:
+                    value = min(value, self.minValue(s, depth, agent + 1))
         return value
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
@@ -186,8 +186,8 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
         if 'Stop' in legalActions:
             legalActions.remove('Stop')
         for action in legalActions:
-            successor = s.generateSuccessor(0, action)
-            minvalue = self.minValue(successor, depth, 1, alpha, beta)
+            with s.withAction(0, action):
+                minvalue = self.minValue(s, depth, 1, alpha, beta)
             value = max(value, minvalue)
             # if value >= beta:
             #     return value
@@ -205,11 +205,11 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
         if 'Stop' in legalActions:
             legalActions.remove('Stop')
         for action in legalActions:
-            successor = s.generateSuccessor(agent, action)
-            if agent == (s.getNumAgents() - 1):
-                value = min(value, self.maxValue(successor, depth + 1, alpha, beta))
-            else:
-                value = min(value, self.minValue(successor, depth, agent + 1, alpha, beta))
+            with s.withAction(agent, action):
+                if agent == (s.getNumAgents() - 1):
+                    value = min(value, self.maxValue(s, depth + 1, alpha, beta))
+                else:
+                    value = min(value, self.minValue(s, depth, agent + 1, alpha, beta))
             # if value <= alpha:
             #     return value
             # beta = min(beta, value)
@@ -258,8 +258,8 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         if 'Stop' in legalActions:
             legalActions.remove('Stop')
         for action in legalActions:
-            successor = s.generateSuccessor(0, action)
-            v = self.expValue(successor, d, 1)
+            with s.withAction(0, action):
+                v = self.expValue(s, d, 1)
             value = max(value, v)
         return value
 
@@ -271,11 +271,11 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             legalActions.remove('Stop')
         expValues = 0
         for action in legalActions:
-            successor = s.generateSuccessor(agent, action)
-            if agent == (s.getNumAgents() - 1):
-                value = self.maxValue(successor, depth)
-            else:
-                value = self.expValue(successor, depth, agent + 1)
+            with s.withAction(agent, action):
+                if agent == (s.getNumAgents() - 1):
+                    value = self.maxValue(s, depth)
+                else:
+                    value = self.expValue(s, depth, agent + 1)
             expValues += value
         return 0 if len(legalActions) == 0 else (expValues / len(legalActions))
 
@@ -3,6 +3,7 @@ Priority queue containers.
 """
 
 import heapq
+import itertools
 
 class PriorityQueue(object):
     """
@@ -10,20 +11,24 @@ class PriorityQueue(object):
     Each inserted item has a priority associated with it,
     and the user is usually interested in quick retrieval of the lowest-priority item in the queue.
     This data structure allows O(1) access to the lowest-priority item.
+    Items with the same priority come out in the order they were pushed
+    (items themselves are never compared).
 
     Note that this PriorityQueue does not allow you to change the priority of an item.
     However, you may insert the same item multiple times with different priorities.
+    See `IndexedPriorityQueue` for a queue that can change priorities.
     """
 
     def __init__(self):
         self.heap = []
+        self._counter = itertools.count()
 
     def push(self, item, priority):
-        pair = (priority, item)
-        heapq.heappush(self.heap, pair)
+        entry = (priority, next(self._counter), item)
+        heapq.heappush(self.heap, entry)
 
     def pop(self):
-        (priority, item) = heapq.heappop(self.heap)
+        (priority, order, item) = heapq.heappop(self.heap)
         return item
 
     def isEmpty(self):
@@ -56,3 +61,117 @@ class PriorityQueueWithFunction(PriorityQueue):
 
     def __len__(self):
         return len(self.heap)
+
+class IndexedPriorityQueue(object):
+    """
+    A priority queue that keeps track of the entry for every item,
+    so the priority of an item already in the queue can be changed (see `update`),
+    and `in` checks if an item is waiting in the queue.
+    Each item is in the queue at most once.
+
+    Items must be hashable.
+    Items with the same priority come out in the order they were given that priority
+    (items themselves are never compared).
+
+    The heap itself is a `heapq` heap (so pushes and pops run at C speed).
+    Changing the priority of an item pushes a new entry and marks the old one as removed,
+    removed entries are skipped when they reach the top of the heap,
+    and the heap is rebuilt without them whenever they outnumber the live entries.
+    So the heap never holds more than about two entries per item in the queue.
+    """
+
+    def __init__(self):
+        # [[priority, order, item], ...]
+        # Removed entries have their item replaced with _REMOVED.
+        self._heap = []
+
+        # {item: entry}
+        self._entries = {}
+
+        self._numRemoved = 0
+        self._counter = itertools.count()
+
+    def getPriority(self, item):
+        """
+        Get the priority of an item in the queue.
+        Raises a KeyError if the item is not in the queue.
+        """
+
+        return self._entries[item][0]
+
+    def isEmpty(self):
+        return len(self._entries) == 0
+
+    def pop(self):
+        """
+        Remove and return the item with the lowest priority.
+        """
+
+        return self.popWithPriority()[0]
+
+    def popWithPriority(self):
+        """
+        Remove and return the item with the lowest priority, as (item, priority).
+        """
+
+        heap = self._heap
+
+        while (True):
+            priority, order, item = heapq.heappop(heap)
+            if (item is not _REMOVED):
+                del self._entries[item]
+                return (item, priority)
+
+            self._numRemoved -= 1
+
+    def push(self, item, priority):
+        """
+        Add an item to the queue.
+        If the item is already in the queue, its priority is changed (see `update`).
+        """
+
+        self.update(item, priority)
+
+    def remove(self, item):
+        """
+        Take an item out of the queue.
+        Raises a KeyError if the item is not in the queue.
+        """
+
+        entry = self._entries.pop(item)
+        self._markRemoved(entry)
+
+    def update(self, item, priority):
+        """
+        Set the priority of an item, adding it to the queue if it is not already there.
+        Setting an item to the priority it already has does not change its place in line.
+        """
+
+        oldEntry = self._entries.get(item)
+        if (oldEntry is not None):
+            if (oldEntry[0] == priority):
+                return
+
+            self._markRemoved(oldEntry)
+
+        entry = [priority, next(self._counter), item]
+        self._entries[item] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _markRemoved(self, entry):
+        entry[2] = _REMOVED
+        self._numRemoved += 1
+
+        if (self._numRemoved > len(self._entries)):
+            self._heap = [entry for entry in self._heap if entry[2] is not _REMOVED]
+            heapq.heapify(self._heap)
+            self._numRemoved = 0
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+# Marks entries in an IndexedPriorityQueue that are no longer in the queue.
+_REMOVED = object()
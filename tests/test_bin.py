@@ -8,7 +8,6 @@ from pacai.bin import pacman
 This is a test class to assess the executables of this project.
 """
 class BinTest(unittest.TestCase):
-
     def test_pacman(self):
         # Run game of pacman with valid agent.
         pacman.main(['-p', 'GreedyAgent', '--null-graphics'])
@@ -21,6 +20,15 @@ class BinTest(unittest.TestCase):
             # Expected exception.
             pass
 
+    def test_pacman_food_search(self):
+        # Student heuristics see food search states as (pacmanPosition, foodGrid).
+        games = pacman.main(['--null-graphics', '-l', 'testSearch', '-p', 'SearchAgent',
+                '--agent-args', 'fn=pacai.student.search.aStarSearch,'
+                + 'prob=pacai.core.search.food.FoodSearchProblem,'
+                + 'heuristic=pacai.student.searchAgents.foodHeuristic'])
+
+        self.assertTrue(games[0].state.isWin())
+
     def test_pacman_help(self):
         # Show all pacman arguments.
         try:
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pacai.bin import compilelayouts
+from pacai.core import compiledlayout
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import Layout
+from pacai.core.layout import parseLayoutSource
+
+"""
+Test compiling layouts and loading the compiled layouts.
+"""
+class CompiledLayoutTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_matches_text(self):
+        for name in os.listdir(DEFAULT_LAYOUT_DIR):
+            shutil.copy(os.path.join(DEFAULT_LAYOUT_DIR, name), self._dir)
+
+        compiledPaths = compilelayouts.main([self._dir])
+        self.assertTrue(len(compiledPaths) > 0)
+
+        for compiledPath in compiledPaths:
+            path = os.path.splitext(compiledPath)[0] + '.lay'
+            with open(path, 'rb') as file:
+                source = file.read()
+
+            compiled = compiledlayout.readCompiledLayout(compiledPath,
+                    compiledlayout.getSourceDigest(source))
+            self.assertIsNotNone(compiled)
+
+            for maxGhosts in [None, 1]:
+                expected = Layout(parseLayoutSource(source), maxGhosts)
+                actual = Layout.fromCompiled(compiled, maxGhosts)
+
+                self.assertEqual(expected.getFingerprint(), actual.getFingerprint(), path)
+                self.assertEqual(expected.walls, actual.walls)
+                self.assertEqual(expected.food, actual.food)
+                self.assertEqual(expected.capsules, actual.capsules)
+                self.assertEqual(expected.agentPositions, actual.agentPositions)
+                self.assertEqual(expected.getNumGhosts(), actual.getNumGhosts())
+                self.assertEqual(expected.layoutText, actual.layoutText)
+
+    def test_stale(self):
+        path = os.path.join(self._dir, 'test.lay')
+        with open(path, 'w') as file:
+            file.write('%%%%\n%P.%\n%%%%\n')
+
+        compiledPath = compilelayouts.compileLayout(path)
+
+        with open(path, 'rb') as file:
+            source = file.read()
+
+        self.assertIsNotNone(compiledlayout.readCompiledLayout(compiledPath,
+                compiledlayout.getSourceDigest(source)))
+
+        # The source changed, so the compiled layout is out of date.
+        self.assertIsNone(compiledlayout.readCompiledLayout(compiledPath,
+                compiledlayout.getSourceDigest(source + b'%%%%\n')))
+
+        # Garbage is not a compiled layout.
+        with open(compiledPath, 'wb') as file:
+            file.write(b'not a layout')
+
+        self.assertIsNone(compiledlayout.readCompiledLayout(compiledPath))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import sys
+import unittest
+
+from pacai.core import distanceCalculator
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.util import queue
+
+TEST_LAYOUT = [
+    '%%%%%%%',
+    '%  %  %',
+    '% %%% %',
+    '%     %',
+    '%%%%%%%',
+]
+
+# The cell at (5, 3) is walled off from the rest of the board.
+ISLAND_LAYOUT = [
+    '%%%%%%%',
+    '%   % %',
+    '% % %%%',
+    '%     %',
+    '%%%%%%%',
+]
+
+"""
+Test the maze distance machinery.
+"""
+class DistanceCalculatorTest(unittest.TestCase):
+    def test_matches_bfs(self):
+        for layout in [Layout(TEST_LAYOUT), getLayout('mediumClassic')]:
+            distancer = distanceCalculator.Distancer(layout)
+            distancer.getMazeDistances()
+            self.assertTrue(distancer.isReadyForMazeDistance())
+
+            cells = layout.walls.asList(False)
+            for source in cells[::7]:
+                expected = _bfs(layout, source)
+
+                for target in cells:
+                    self.assertEqual(expected[target], distancer.getDistance(source, target))
+                    self.assertEqual(expected[target], distancer.getDistance(target, source))
+
+    def test_special_positions(self):
+        layout = Layout(ISLAND_LAYOUT)
+        distancer = distanceCalculator.Distancer(layout)
+
+        # Before the distances are computed, manhattan distance is used.
+        self.assertFalse(distancer.isReadyForMazeDistance())
+        self.assertEqual(2, distancer.getDistance((3, 2), (1, 2)))
+
+        distancer.getMazeDistances()
+
+        self.assertEqual(4, distancer.getDistance((3, 2), (1, 2)))
+        self.assertEqual(sys.maxsize, distancer.getDistance((1, 1), (5, 3)))
+
+        # Positions between grid points use the closest grid points.
+        self.assertEqual(3.5, distancer.getDistance((1, 1.5), (3, 3)))
+        self.assertEqual(1.0, distancer.getDistance((1.5, 1), (2.5, 1)))
+
+        # Grid positions may be floats.
+        self.assertEqual(4, distancer.getDistance((3.0, 2.0), (1, 2)))
+        self.assertEqual(4, distancer.getDistance((3.0, 2.0), (1.0, 2.0)))
+        self.assertEqual(distancer.getCellId((3, 2)), distancer.getCellId((3.0, 2.0)))
+
+        # Any other fractions are not rounded to half steps.
+        self.assertEqual([(1, 0.25), (2, 0.75)], distanceCalculator.getGrids1D(1.25))
+        self.assertEqual(1.75, distancer.getDistance((1.25, 1), (3, 1)))
+        self.assertEqual(2.25, distancer.getDistance((1, 1), (3, 1.25)))
+
+        with self.assertRaises(Exception):
+            distancer.getDistance((0, 0), (1, 1))
+
+    def test_lazy(self):
+        layout = getLayout('mediumClassic')
+
+        full = distanceCalculator.Distancer(layout)
+        full.getMazeDistances()
+
+        cells = layout.walls.asList(False)
+        rowBytes = 2 * len(cells)
+
+        # Only enough room for three rows.
+        lazy = distanceCalculator.LazyDistanceTable(layout.walls, maxBytes = 3 * rowBytes)
+        self.assertEqual(0, lazy.getNumCachedRows())
+
+        for source in cells[::5]:
+            for target in cells[::3]:
+                self.assertEqual(full.getDistance(source, target), lazy.getDistance(source, target))
+
+        self.assertEqual(3, lazy.getNumCachedRows())
+
+        with self.assertRaises(TypeError):
+            lazy.getData()
+
+        distancer = distanceCalculator.Distancer(Layout(TEST_LAYOUT), lazy = True)
+        distancer.getMazeDistances()
+        self.assertEqual(6, distancer.getDistance((1, 1), (5, 3)))
+
+    def test_landmarks(self):
+        layout = getLayout('mediumClassic')
+
+        full = distanceCalculator.Distancer(layout)
+        full.getMazeDistances()
+
+        cells = layout.walls.asList(False)
+
+        # No room for any rows, so every distance is a search.
+        table = distanceCalculator.LandmarkDistanceTable(layout.walls, 4, maxBytes = 0)
+        self.assertEqual(4, len(table.getLandmarks()))
+
+        for source in cells[::11]:
+            for target in cells[::5]:
+                distance = full.getDistance(source, target)
+                self.assertEqual(distance, table.getDistance(source, target))
+                self.assertLessEqual(table.getLowerBound(source, target), distance)
+
+        island = distanceCalculator.LandmarkDistanceTable(Layout(ISLAND_LAYOUT).walls, 2)
+        self.assertEqual(4, island.getDistance((3, 2), (1, 2)))
+        self.assertEqual(sys.maxsize, island.getDistance((1, 1), (5, 3)))
+        self.assertEqual(sys.maxsize, island.getLowerBound((1, 1), (5, 3)))
+
+        # Too many cells for a complete table, but not for lazy or landmark tables.
+        layout = Layout(['%' * 260] + ['%' + ' ' * 258 + '%'] * 258 + ['%' * 260])
+        with self.assertRaises(ValueError):
+            distanceCalculator.DistanceTable(layout.walls, layout = layout)
+
+        huge = distanceCalculator.LandmarkDistanceTable(layout.walls, 2, layout = layout)
+        self.assertEqual(514, huge.getDistance((1, 1), (258, 258)))
+
+        lazy = distanceCalculator.LazyDistanceTable(layout.walls, layout = layout)
+        self.assertEqual(257, lazy.getDistance((1, 1), (1, 258)))
+
+        # A maze that is not shipped, so its distances are not already known.
+        layout = Layout(['%' * 40] + ['%' + ' ' * 38 + '%'] * 30 + ['%' * 40])
+
+        distancer = distanceCalculator.Distancer(layout, landmarks = 4)
+        distancer.getMazeDistances()
+        self.assertIsInstance(distancer._distances, distanceCalculator.LandmarkDistanceTable)
+        self.assertEqual(44, distancer.getDistance((1, 1), (16, 30)))
+        self.assertLessEqual(distancer.getDistanceLowerBound((1, 1), (16, 30)), 44)
+
+    def test_background(self):
+        # A maze that is not shipped, so its distances are not already known.
+        layout = Layout(['%' * 30] + ['%' + ' ' * 28 + '%'] * 20 + ['%' * 30])
+
+        distancer = distanceCalculator.Distancer(layout)
+        self.assertEqual(0.0, distancer.getMazeDistanceProgress())
+
+        distancer.getMazeDistances(background = True)
+        other = distanceCalculator.Distancer(layout)
+        other.getMazeDistances(background = True)
+
+        # Distances are exact right away.
+        self.assertEqual(20, distancer.getDistance((1, 1), (11, 11)))
+
+        self.assertTrue(distancer.waitForMazeDistances())
+        self.assertTrue(distancer.isReadyForMazeDistance())
+        self.assertEqual(1.0, distancer.getMazeDistanceProgress())
+        self.assertEqual(20, distancer.getDistance((1, 1), (11, 11)))
+
+        self.assertTrue(other.waitForMazeDistances(10))
+        self.assertIs(distancer._distances, other._distances)
+        self.assertNotIsInstance(distancer._distances, distanceCalculator.LazyDistanceTable)
+
+    def test_distance_row(self):
+        layout = getLayout('mediumClassic')
+        cells = layout.walls.asList(False)
+
+        for lazy in [False, True]:
+            distancer = distanceCalculator.Distancer(layout, lazy = lazy)
+            distancer.getMazeDistances()
+
+            row = distancer.getDistanceRow(cells[10])
+            self.assertEqual(len(cells), len(row))
+
+            for target in cells:
+                self.assertEqual(distancer.getDistance(cells[10], target),
+                        row[distancer.getCellId(target)])
+
+            self.assertIsNone(distancer.getCellId((0, 0)))
+
+            with self.assertRaises(Exception):
+                distancer.getDistanceRow((0, 0))
+
+    def test_shared(self):
+        layout = getLayout('mediumClassic')
+
+        distancer1 = distanceCalculator.Distancer(layout)
+        distancer1.getMazeDistances()
+
+        distancer2 = distanceCalculator.Distancer(layout)
+        distancer2.getMazeDistances()
+
+        self.assertIs(distancer1._distances, distancer2._distances)
+
+def _bfs(layout, source):
+    distances = {source: 0}
+
+    fringe = queue.Queue()
+    fringe.push(source)
+
+    while (not fringe.isEmpty()):
+        x, y = fringe.pop()
+        for neighbor in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+            if (layout.isWall(neighbor) or neighbor in distances):
+                continue
+
+            distances[neighbor] = distances[(x, y)] + 1
+            fringe.push(neighbor)
+
+    for cell in layout.walls.asList(False):
+        distances.setdefault(cell, sys.maxsize)
+
+    return distances
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from pacai.core import distanceCalculator
+from pacai.core import distancecache
+from pacai.core.layout import getLayout
+
+"""
+Test the on-disk cache of maze distances.
+"""
+class DistanceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_cache_dir(self):
+        # The cache is off unless it is asked for.
+        with mock.patch.dict(os.environ, clear = True):
+            self.assertIsNone(distancecache.getCacheDir())
+
+        with mock.patch.dict(os.environ, {distancecache.CACHE_DIR_ENV: ''}):
+            self.assertIsNone(distancecache.getCacheDir())
+
+        with mock.patch.dict(os.environ, {distancecache.CACHE_DIR_ENV: self._dir}):
+            self.assertEqual(self._dir, distancecache.getCacheDir())
+
+    def test_round_trip(self):
+        walls = getLayout('mediumClassic').walls
+        table = distanceCalculator.DistanceTable(walls)
+        numCells = table.getNumCells()
+
+        self.assertIsNone(distancecache.load(walls, numCells, cacheDir = self._dir))
+        self.assertTrue(distancecache.save(walls, numCells, table.getData(),
+                cacheDir = self._dir))
+
+        # No temp files are left behind.
+        self.assertEqual(1, len(os.listdir(self._dir)))
+
+        data = distancecache.load(walls, numCells, cacheDir = self._dir)
+        self.assertIsNotNone(data)
+        self.assertEqual(list(table.getData()), list(data))
+
+        loaded = distanceCalculator.DistanceTable(walls, data = data)
+        cells = table.getCells()
+        self.assertEqual(table.getDistance(cells[0], cells[-1]),
+                loaded.getDistance(cells[0], cells[-1]))
+
+        # Other walls are not found.
+        otherWalls = getLayout('smallClassic').walls
+        self.assertIsNone(distancecache.load(otherWalls, numCells, cacheDir = self._dir))
+
+    def test_load_or_compute(self):
+        walls = getLayout('mediumClassic').walls
+        table = distanceCalculator.DistanceTable(walls)
+        numCells = table.getNumCells()
+
+        calls = []
+
+        def compute():
+            calls.append(True)
+            return table.getData()
+
+        data = distancecache.loadOrCompute(walls, numCells, compute, cacheDir = self._dir)
+        self.assertEqual(1, len(calls))
+        self.assertEqual(list(table.getData()), list(data))
+
+        # The computing process also gets the shared (mapped) copy.
+        self.assertIsInstance(data, memoryview)
+
+        distancecache.loadOrCompute(walls, numCells, compute, cacheDir = self._dir)
+        self.assertEqual(1, len(calls))
+
+        # Another process is computing a table (and holds the lock), wait and then give up.
+        otherWalls = getLayout('smallClassic').walls
+        lockPath = os.path.join(self._dir, distancecache.getWallsFingerprint(otherWalls)
+                + distancecache.EXTENSION + distancecache.LOCK_EXTENSION)
+        open(lockPath, 'w').close()
+
+        data = distancecache.loadOrCompute(otherWalls, numCells, compute, cacheDir = self._dir,
+                lockTimeout = 0.2)
+        self.assertEqual(2, len(calls))
+        self.assertTrue(os.path.exists(lockPath))
+
+        # The process holding the lock died.
+        os.utime(lockPath, (0, 0))
+        distancecache.loadOrCompute(otherWalls, numCells, compute, cacheDir = self._dir,
+                lockTimeout = 0.2)
+        self.assertEqual(3, len(calls))
+        self.assertFalse(os.path.exists(lockPath))
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), 'Requires fork.')
+    def test_processes_share(self):
+        walls = getLayout('mediumClassic').walls
+        table = distanceCalculator.DistanceTable(walls)
+
+        context = multiprocessing.get_context('fork')
+        computed = context.Queue()
+
+        def worker():
+            def compute():
+                computed.put(os.getpid())
+                time.sleep(0.2)
+                return table.getData()
+
+            data = distancecache.loadOrCompute(walls, table.getNumCells(), compute,
+                    cacheDir = self._dir)
+            assert list(data) == list(table.getData())
+
+        workers = [context.Process(target = worker) for i in range(3)]
+        for process in workers:
+            process.start()
+
+        for process in workers:
+            process.join(30)
+            self.assertEqual(0, process.exitcode)
+
+        # Only one worker did the work.
+        self.assertFalse(computed.empty())
+        computed.get()
+        self.assertTrue(computed.empty())
+
+    def test_corrupt(self):
+        walls = getLayout('mediumClassic').walls
+        table = distanceCalculator.DistanceTable(walls)
+        numCells = table.getNumCells()
+
+        distancecache.save(walls, numCells, table.getData(), cacheDir = self._dir)
+
+        path = os.path.join(self._dir, os.listdir(self._dir)[0])
+        with open(path, 'r+b') as file:
+            file.truncate(100)
+
+        self.assertIsNone(distancecache.load(walls, numCells, cacheDir = self._dir))
+
+        with open(path, 'wb'):
+            pass
+
+        self.assertIsNone(distancecache.load(walls, numCells, cacheDir = self._dir))
+
+    def test_evict(self):
+        names = ['smallClassic', 'mediumClassic', 'originalClassic']
+        tables = [distanceCalculator.DistanceTable(getLayout(name).walls) for name in names]
+
+        for i in range(len(names)):
+            walls = getLayout(names[i]).walls
+            distancecache.save(walls, tables[i].getNumCells(), tables[i].getData(),
+                    cacheDir = self._dir)
+
+            # Make sure every file has a different modification time.
+            path = os.path.join(self._dir, distancecache.getWallsFingerprint(walls)
+                    + distancecache.EXTENSION)
+            os.utime(path, (i, i))
+
+        sizes = [os.path.getsize(os.path.join(self._dir, name)) for name in os.listdir(self._dir)]
+        self.assertEqual(3, len(sizes))
+
+        # Only room for the most recent table.
+        distancecache.evict(self._dir, max(sizes))
+
+        remaining = os.listdir(self._dir)
+        self.assertEqual(1, len(remaining))
+        self.assertEqual(distancecache.getWallsFingerprint(getLayout(names[-1]).walls)
+                + distancecache.EXTENSION, remaining[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+TEST_LAYOUT = [
+    '%%%%%',
+    '%. .%',
+    '% P %',
+    '%. .%',
+    '%%%%%',
+]
+
+"""
+Test the game state machinery shared by all games.
+"""
+class GameStateTest(unittest.TestCase):
+    def _play(self, state, actions):
+        for action in actions:
+            state = state.generateSuccessor(0, action)
+
+        return state
+
+    def test_hash_path_independent(self):
+        start = PacmanGameState(Layout(TEST_LAYOUT))
+
+        # Same position, direction, and score by two different paths.
+        state1 = self._play(start, [Directions.EAST, Directions.WEST, Directions.WEST])
+        state2 = self._play(start, [Directions.WEST, Directions.EAST, Directions.WEST])
+
+        self.assertEqual(state1, state2)
+        self.assertEqual(hash(state1), hash(state2))
+
+        # Eat the same food by two different paths.
+        state1 = self._play(start, [Directions.WEST, Directions.NORTH, Directions.SOUTH])
+        state2 = self._play(start, [Directions.NORTH, Directions.WEST, Directions.SOUTH])
+
+        self.assertEqual(3, state1.getNumFood())
+        self.assertEqual(state1, state2)
+        self.assertEqual(hash(state1), hash(state2))
+
+    def test_hash_tracks_changes(self):
+        start = PacmanGameState(Layout(TEST_LAYOUT))
+        startHash = hash(start)
+
+        successor = start.generateSuccessor(0, Directions.WEST)
+        self.assertNotEqual(startHash, hash(successor))
+
+        # Generating a successor must not touch the parent.
+        self.assertEqual(startHash, hash(start))
+
+        # Eating food and changing the score are reflected in the hash.
+        eaten = successor.generateSuccessor(0, Directions.NORTH)
+        self.assertNotEqual(hash(successor), hash(eaten))
+
+        before = hash(eaten)
+        eaten.addScore(5)
+        self.assertNotEqual(before, hash(eaten))
+        eaten.addScore(-5)
+        self.assertEqual(before, hash(eaten))
+
+    def test_food_view(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+        food = state.getFood()
+
+        self.assertIs(food, state.getFood())
+        self.assertTrue(food[1][1])
+
+        with self.assertRaises(TypeError):
+            food[1][1] = False
+
+        # The parent's view is not affected by a successor eating.
+        successor = state.generateSuccessor(0, Directions.WEST)
+        successor = successor.generateSuccessor(0, Directions.SOUTH)
+
+        self.assertTrue(food[1][1])
+        self.assertFalse(successor.getFood()[1][1])
+
+    def test_shared_agent_states(self):
+        layout = getLayout('mediumClassic')
+        state = PacmanGameState(layout)
+
+        pacmanState = state.getAgentState(0)
+        ghostState = state.getAgentState(1)
+
+        successor = state.generateSuccessor(0, Directions.WEST)
+
+        # Only pacman moved, so only pacman's agent state was copied.
+        self.assertIsNot(pacmanState, successor.getAgentState(0))
+        self.assertIs(ghostState, successor.getAgentState(1))
+        self.assertNotEqual(pacmanState, successor.getAgentState(0))
+
+        ghostAction = successor.getLegalActions(1)[0]
+        ghostSuccessor = successor.generateSuccessor(1, ghostAction)
+
+        self.assertIs(successor.getAgentState(0), ghostSuccessor.getAgentState(0))
+        self.assertIsNot(ghostState, ghostSuccessor.getAgentState(1))
+        self.assertEqual(layout.agentPositions[1][1], ghostState.getPosition())
+
+    def test_team_food(self):
+        layout = getLayout('defaultCapture')
+        state = CaptureGameState(layout, 1200)
+
+        redFood = state.getRedFood()
+        blueFood = state.getBlueFood()
+
+        self.assertIs(redFood, state.getRedFood())
+        self.assertEqual(state.getNumFood(), redFood.count() + blueFood.count())
+        self.assertEqual(redFood.count(), state.getNumRedFood())
+
+        for (x, y) in state.getFood().asList():
+            self.assertEqual(state.isOnRedSide((x, y)), redFood[x][y])
+            self.assertEqual(state.isOnBlueSide((x, y)), blueFood[x][y])
+
+        x, y = redFood.asList()[0]
+        state.eatFood(x, y)
+
+        # Only the red view changes.
+        self.assertIs(blueFood, state.getBlueFood())
+        self.assertFalse(state.getRedFood()[x][y])
+        self.assertTrue(redFood[x][y])
+        self.assertEqual(redFood.count() - 1, state.getRedFood().count())
+        self.assertEqual(state.getRedFood().count(), state.getNumRedFood())
+
+    def test_half_step_positions(self):
+        layout = getLayout('mediumClassic')
+        state = PacmanGameState(layout)
+
+        ghostState = state.getMutableAgentState(1)
+        ghostState.setScaredTimer(10)
+        startPosition = ghostState.getPosition()
+
+        # Scared ghosts move at half speed.
+        action = state.getLegalActions(1)[0]
+        state = state.generateSuccessor(1, action)
+        ghostState = state.getAgentState(1)
+
+        x, y = ghostState.getPosition()
+        self.assertFalse(ghostState.isOnGridPoint())
+        self.assertEqual(0.5, abs(x - startPosition[0]) + abs(y - startPosition[1]))
+        self.assertEqual((int(x), int(y)), state.getAgentPosition(1))
+        self.assertEqual((int(x * 2), int(y * 2)), ghostState.getHalfPosition())
+        self.assertEqual(1, ghostState.getHalfStepsToNearestPoint())
+
+        ghostState = ghostState.copy()
+        ghostState.snapToNearestPoint()
+        self.assertTrue(ghostState.isOnGridPoint())
+        self.assertEqual(ghostState.getNearestPosition(), ghostState.getPosition())
+        self.assertIs(int, type(ghostState.getPosition()[0]))
+
+    def test_apply_undo_pacman(self):
+        layout = getLayout('mediumClassic')
+        self._checkApplyUndo(PacmanGameState(layout), PacmanGameState(layout))
+
+    def test_apply_undo_capture(self):
+        layout = getLayout('defaultCapture')
+        self._checkApplyUndo(CaptureGameState(layout, 1200), CaptureGameState(layout, 1200))
+
+    def test_with_action(self):
+        layout = Layout(TEST_LAYOUT)
+        state = PacmanGameState(layout)
+        startHash = hash(state)
+
+        with state.withAction(0, Directions.WEST):
+            self.assertEqual(state.getAgentPosition(0), (1, 2))
+
+            with state.withAction(0, Directions.NORTH):
+                self.assertEqual(3, state.getNumFood())
+
+            self.assertEqual(4, state.getNumFood())
+
+        self.assertEqual(PacmanGameState(layout), state)
+        self.assertEqual(startHash, hash(state))
+
+        # Illegal actions leave the state untouched.
+        with state.withAction(0, Directions.WEST):
+            westHash = hash(state)
+
+            with self.assertRaises(ValueError):
+                state.applyAction(0, Directions.WEST)
+
+            self.assertEqual(westHash, hash(state))
+
+        self.assertEqual(startHash, hash(state))
+
+        with self.assertRaises(RuntimeError):
+            state.undo()
+
+    def _checkApplyUndo(self, state, walker):
+        """
+        Walk a random game with both generateSuccessor() (on state)
+        and applyAction() (on walker), and make sure they always agree.
+        """
+
+        rng = random.Random(12345)
+        initialHash = hash(walker)
+
+        numSteps = 0
+        for i in range(300):
+            if (state.isOver()):
+                break
+
+            agentIndex = i % state.getNumAgents()
+            action = rng.choice(state.getLegalActions(agentIndex))
+
+            state = state.generateSuccessor(agentIndex, action)
+            walker.applyAction(agentIndex, action)
+            numSteps += 1
+
+            self._assertStatesMatch(state, walker)
+
+        for i in range(numSteps):
+            walker.undo()
+
+        self.assertEqual(type(walker)(walker.getInitialLayout(), *self._extraArgs(walker)), walker)
+        self.assertEqual(initialHash, hash(walker))
+
+    def _assertStatesMatch(self, expected, actual):
+        self.assertEqual(expected, actual)
+        self.assertEqual(hash(expected), hash(actual))
+        self.assertEqual(expected.getFood().count(), actual.getNumFood())
+        self.assertEqual(expected.getCapsules(), actual.getCapsules())
+        self.assertEqual(expected.getLastAgentMoved(), actual.getLastAgentMoved())
+
+        for agentIndex in range(expected.getNumAgents()):
+            self.assertEqual(expected.getAgentPosition(agentIndex),
+                    actual.getAgentPosition(agentIndex))
+
+        if (isinstance(expected, CaptureGameState)):
+            self.assertEqual(expected.getTimeleft(), actual.getTimeleft())
+            self.assertEqual(expected.getRedFood(), actual.getRedFood())
+            self.assertEqual(expected.getBlueFood(), actual.getBlueFood())
+            self.assertEqual(expected.getRedFood().count(), actual.getNumRedFood())
+            self.assertEqual(expected.getBlueFood().count(), actual.getNumBlueFood())
+
+    def _extraArgs(self, state):
+        if (isinstance(state, CaptureGameState)):
+            return (1200, )
+
+        return ()
+
+if __name__ == '__main__':
+    unittest.main()
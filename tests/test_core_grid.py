@@ -0,0 +1,119 @@
+import pickle
+import unittest
+
+from pacai.core.grid import Grid
+
+"""
+Test the bitboard-backed Grid.
+"""
+class GridTest(unittest.TestCase):
+    def test_read_write(self):
+        grid = Grid(4, 3)
+        self.assertFalse(grid[1][2])
+
+        grid[1][2] = True
+        grid.set(3, 0, True)
+
+        self.assertTrue(grid[1][2])
+        self.assertTrue(grid.get(1, 2))
+        self.assertTrue(grid[3][0])
+        self.assertTrue(grid[-1][0])
+        self.assertEqual([False, False, True], list(grid[1]))
+        self.assertEqual(2, grid.count())
+        self.assertEqual(10, grid.count(False))
+        self.assertEqual([(1, 2), (3, 0)], grid.asList())
+
+        with self.assertRaises(IndexError):
+            grid[4]
+
+        with self.assertRaises(IndexError):
+            grid[0][3]
+
+    def test_initial_value(self):
+        grid = Grid(5, 7, initialValue = True)
+        self.assertEqual(35, grid.count())
+        self.assertEqual([], grid.asList(False))
+
+        with self.assertRaises(ValueError):
+            Grid(2, 2, initialValue = 1)
+
+    def test_copy(self):
+        grid = Grid(3, 3)
+        grid[1][1] = True
+
+        # Materialize a column before copying.
+        self.assertTrue(grid[1][1])
+
+        other = grid.copy()
+        self.assertEqual(grid, other)
+        self.assertEqual(hash(grid), hash(other))
+
+        other[1][1] = False
+        self.assertTrue(grid[1][1])
+        self.assertFalse(other[1][1])
+        self.assertEqual(1, grid.count())
+        self.assertEqual(0, other.count())
+        self.assertNotEqual(grid, other)
+
+    def test_read_only(self):
+        grid = Grid(3, 3)
+        grid[2][2] = True
+
+        view = grid.asReadOnly()
+        self.assertIs(view, grid.asReadOnly())
+        self.assertEqual(grid, view)
+        self.assertEqual(hash(grid), hash(view))
+        self.assertTrue(view[2][2])
+        self.assertEqual(1, view.count())
+
+        with self.assertRaises(TypeError):
+            view[1][1] = True
+
+        with self.assertRaises(TypeError):
+            view.set(1, 1, True)
+
+        with self.assertRaises(TypeError):
+            view[1] = [True, True, True]
+
+        self.assertFalse(view[1][1])
+
+        # Copies of a view are mutable.
+        other = view.copy()
+        other[1][1] = True
+        self.assertTrue(other[1][1])
+
+        # Modifying the grid gives out a new view.
+        grid[0][0] = True
+        self.assertIsNot(view, grid.asReadOnly())
+        self.assertTrue(grid.asReadOnly()[0][0])
+
+    def test_pickle(self):
+        grid = Grid(6, 2)
+        grid[5][1] = True
+        grid[0][0] = True
+
+        other = pickle.loads(pickle.dumps(grid))
+        self.assertEqual(grid, other)
+        self.assertEqual(2, other.count())
+        self.assertTrue(other[5][1])
+
+        # Grids pickled before grids were bitboards (e.g. in old replays).
+        legacy = Grid.__new__(Grid)
+        legacy.__setstate__({
+            '_width': 6,
+            '_height': 2,
+            '_data': [[(x, y) in [(0, 0), (5, 1)] for y in range(2)] for x in range(6)],
+        })
+        self.assertEqual(grid, legacy)
+        self.assertEqual(2, legacy.count())
+        self.assertEqual(hash(grid), hash(legacy))
+
+    def test_str(self):
+        grid = Grid(3, 2)
+        grid[0][1] = True
+        grid[2][0] = True
+
+        self.assertEqual('TFF\nFFT', str(grid))
+
+if __name__ == '__main__':
+    unittest.main()
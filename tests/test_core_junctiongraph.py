@@ -0,0 +1,96 @@
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distanceCalculator
+from pacai.core.actions import Actions
+from pacai.core.junctiongraph import JunctionGraph
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search.junction import JunctionSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.topology import Topology
+from pacai.student import search
+
+# A loop with a corridor hanging off of it, and a cell walled off from everything.
+# The only junction on the loop is at (4, 1).
+TEST_LAYOUT = [
+    '%%%%%%%%',
+    '%    %.%',
+    '% %% %%%',
+    '%      %',
+    '%%%%%%%%',
+]
+
+"""
+Test the corridor-compressed maze graph.
+"""
+class JunctionGraphTest(unittest.TestCase):
+    def test_actions(self):
+        layout = getLayout('mediumMaze')
+        graph = layout.getJunctionGraph()
+        cells = graph.getTopology().getCells()
+
+        self.assertIs(graph, layout.getJunctionGraph())
+        self.assertTrue(graph.getNumJunctions() < graph.getTopology().getNumCells() / 5)
+
+        for corridorIndex in range(graph.getNumEdges()):
+            path = graph.getPath(corridorIndex)
+            last = len(path) - 1
+
+            # Walking the corridor in either direction ends up at the other end.
+            for (fromIndex, toIndex) in [(0, last), (last, 0), (1, last), (last - 1, 0)]:
+                position = cells[path[fromIndex]]
+                for action in graph.getActions(corridorIndex, fromIndex, toIndex):
+                    position = Actions.getSuccessor(position, action)
+
+                self.assertEqual(cells[path[toIndex]], position)
+
+    def test_distances(self):
+        for layout in [Layout(TEST_LAYOUT), getLayout('bigMaze'), getLayout('mediumClassic')]:
+            table = distanceCalculator.LazyDistanceTable(layout.walls)
+
+            # Always use the graph, even if the maze has a lot of junctions.
+            graph = JunctionGraph(Topology(layout.walls))
+            table._initCorridorOrder(graph)
+
+            for sourceId in range(table.getNumCells()):
+                self.assertEqual(table._computeRowOnCells(sourceId),
+                        table._computeRowOnGraph(sourceId, graph))
+
+        # Tables for a layout use the layout's topology and junction graph.
+        layout = getLayout('mediumMaze')
+        table = distanceCalculator.LazyDistanceTable(layout.walls, layout = layout)
+        self.assertIs(layout.getTopology().getCells(), table.getCells())
+        self.assertIs(layout.getJunctionGraph(), table._getJunctionGraph())
+
+    def test_search(self):
+        for name in ['mediumMaze', 'bigMaze']:
+            state = PacmanGameState(getLayout(name))
+
+            cellProblem = PositionSearchProblem(state)
+            cellActions = search.uniformCostSearch(cellProblem)
+
+            graphProblem = JunctionSearchProblem(state)
+            graphActions = graphProblem.expandActions(search.uniformCostSearch(graphProblem))
+
+            self.assertEqual(cellProblem.actionsCost(cellActions),
+                    graphProblem.actionsCost(graphActions))
+            self.assertTrue(graphProblem.getExpandedCount() * 3 < cellProblem.getExpandedCount())
+
+        # Start and goal inside the same corridor.
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+        problem = JunctionSearchProblem(state, start = (2, 1), goal = (5, 1))
+        actions = problem.expandActions(search.uniformCostSearch(problem))
+        self.assertEqual(3, problem.actionsCost(actions))
+
+        problem = JunctionSearchProblem(state, start = (2, 1), goal = (1, 3))
+        actions = problem.expandActions(search.uniformCostSearch(problem))
+        self.assertEqual(3, problem.actionsCost(actions))
+
+        # Both ways around the loop lead to the same junction, only the shorter one is kept.
+        successors = problem.successorStates((2, 1))
+        self.assertEqual([((4, 1), 2)], [(state, cost) for (state, actions, cost) in successors
+                if state == (4, 1)])
+
+if __name__ == '__main__':
+    unittest.main()
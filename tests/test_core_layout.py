@@ -0,0 +1,144 @@
+import gc
+import pickle
+import unittest
+from unittest import mock
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import Layout
+from pacai.core.layout import _layoutsByPath
+from pacai.core.layout import getLayout
+from pacai.core.layout import registerLayout
+
+TEST_LAYOUT = [
+    '%%%%%',
+    '%. .%',
+    '% P %',
+    '%.o.%',
+    '%%%%%',
+]
+
+"""
+Test layout loading and sharing.
+"""
+class LayoutTest(unittest.TestCase):
+    def test_get_layout_shared(self):
+        layout = getLayout('mediumClassic')
+
+        self.assertIs(layout, getLayout('mediumClassic'))
+        self.assertIs(layout, getLayout('mediumClassic.lay'))
+
+        # A different number of ghosts is a different layout.
+        fewerGhosts = getLayout('mediumClassic', maxGhosts = 1)
+        self.assertIsNot(layout, fewerGhosts)
+        self.assertNotEqual(layout, fewerGhosts)
+        self.assertEqual(1, fewerGhosts.getNumGhosts())
+
+    def test_cache_limits(self):
+        with mock.patch('pacai.core.layout.MAX_CACHED_LAYOUTS', 1), \
+                mock.patch.dict(_layoutsByPath, clear = True):
+            layout = getLayout('mediumClassic')
+            getLayout('smallClassic')
+            self.assertEqual(1, len(_layoutsByPath))
+
+            # Reloaded, but still shared with everyone using the old copy.
+            self.assertIs(layout, getLayout('mediumClassic'))
+            self.assertEqual(1, len(_layoutsByPath))
+
+        # Registered layouts are only kept while they are used.
+        registered = registerLayout(Layout(TEST_LAYOUT))
+        self.assertIs(registered, registerLayout(Layout(TEST_LAYOUT)))
+
+        registered = None
+        gc.collect()
+
+        other = Layout(TEST_LAYOUT)
+        self.assertIs(other, registerLayout(other))
+
+    def test_fingerprint(self):
+        layout1 = Layout(TEST_LAYOUT)
+        layout2 = Layout(list(TEST_LAYOUT))
+
+        self.assertIsNot(layout1, layout2)
+        self.assertEqual(layout1.getFingerprint(), layout2.getFingerprint())
+        self.assertEqual(layout1, layout2)
+        self.assertEqual(hash(layout1), hash(layout2))
+
+        # States on equal layouts are equal.
+        self.assertEqual(PacmanGameState(layout1), PacmanGameState(layout2))
+        self.assertEqual(hash(PacmanGameState(layout1)), hash(PacmanGameState(layout2)))
+
+        other = Layout(TEST_LAYOUT[:-2] + ['%. .%', '%%%%%'])
+        self.assertNotEqual(layout1, other)
+        self.assertNotEqual(layout1.getFingerprint(), other.getFingerprint())
+
+        # Registering content that is already known gives back the known layout.
+        registered = registerLayout(layout1)
+        self.assertIs(registered, registerLayout(layout2))
+
+        # Very large boards can be fingerprinted.
+        large = Layout(['%' * 200] + ['%' + ' ' * 198 + '%'] * 198 + ['%' * 200])
+        self.assertEqual(40, len(large.getFingerprint()))
+
+    def test_side_masks(self):
+        layout = getLayout('defaultCapture')
+        allCells = (1 << (layout.getWidth() * layout.getHeight())) - 1
+
+        redMask = layout.getRedSideMask()
+        blueMask = layout.getBlueSideMask()
+        self.assertEqual(0, redMask & blueMask)
+        self.assertEqual(allCells, redMask | blueMask)
+
+        # The masks are computed once per layout.
+        self.assertIs(redMask, layout.getRedSideMask())
+        self.assertIs(blueMask, layout.getBlueSideMask())
+
+        copy = pickle.loads(pickle.dumps(layout))
+        self.assertEqual(redMask, copy.getRedSideMask())
+        self.assertEqual(blueMask, copy.getBlueSideMask())
+
+    def test_legacy_state(self):
+        layout = Layout(TEST_LAYOUT)
+
+        # Layouts pickled before they had fingerprints (e.g. in old replays).
+        legacy = Layout.__new__(Layout)
+        legacy.__setstate__({
+            'width': layout.width,
+            'height': layout.height,
+            'walls': layout.walls.copy(),
+            'food': layout.food.copy(),
+            'capsules': list(layout.capsules),
+            'agentPositions': list(layout.agentPositions),
+            'numGhosts': layout.numGhosts,
+            'layoutText': layout.layoutText,
+        })
+
+        self.assertEqual(layout.getFingerprint(), legacy.getFingerprint())
+        self.assertEqual(layout, legacy)
+        self.assertEqual(hash(layout), hash(legacy))
+        self.assertEqual(layout.getRedSideMask(), legacy.getRedSideMask())
+        self.assertEqual(layout.capsules, legacy.capsules)
+
+        with self.assertRaises(TypeError):
+            legacy.walls[1][1] = True
+
+    def test_read_only(self):
+        layout = Layout(TEST_LAYOUT)
+
+        with self.assertRaises(TypeError):
+            layout.walls[1][1] = True
+
+        with self.assertRaises(TypeError):
+            layout.food[1][1] = False
+
+        self.assertEqual(((2, 1),), layout.capsules)
+        self.assertEqual(((True, (2, 2)),), layout.agentPositions)
+
+        with self.assertRaises(AttributeError):
+            layout.capsules.append((1, 1))
+
+        # States still get their own food to eat.
+        state = PacmanGameState(layout)
+        self.assertTrue(state.hasFood(1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
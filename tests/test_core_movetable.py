@@ -0,0 +1,112 @@
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.agentstate import AgentState
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+LAYOUTS = ['mediumClassic', 'contoursMaze', 'defaultCapture']
+
+"""
+Test the precomputed move tables against the general action computations.
+"""
+class MoveTableTest(unittest.TestCase):
+    def test_matches_actions(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+            walls = layout.walls
+            moveTable = layout.getMoveTable()
+
+            self.assertIs(moveTable, layout.getMoveTable())
+
+            for position in walls.asList(False):
+                for heading in Actions.getCodedActions():
+                    expected = Actions.getPossibleActions(position, heading, walls)
+                    self.assertEqual(expected, list(moveTable.getLegalActions(position)))
+
+                    # Ghosts can't stop or reverse (unless they have to).
+                    ghostExpected = [action for action in expected if action != Directions.STOP]
+                    reverse = Actions.reverseDirection(heading)
+                    if (reverse in ghostExpected and len(ghostExpected) > 1):
+                        ghostExpected.remove(reverse)
+
+                    self.assertEqual(ghostExpected,
+                            list(moveTable.getGhostActions(position, heading)))
+
+                    headingCode = Actions.actionToCode(heading)
+                    self.assertEqual(ghostExpected,
+                            list(moveTable.getGhostActionsByCode(position, headingCode)))
+
+                    for action in Actions.getCodedActions():
+                        code = Actions.actionToCode(action)
+                        self.assertEqual(action in expected,
+                                moveTable.isLegalCode(position, code))
+                        self.assertEqual(action in ghostExpected,
+                                moveTable.isLegalGhostCode(position, headingCode, code))
+
+                self.assertEqual(Actions.getLegalNeighbors(position, walls),
+                        list(moveTable.getNeighbors(position)))
+
+                for action in moveTable.getLegalActions(position):
+                    self.assertEqual(Actions.getSuccessor(position, action),
+                            moveTable.getSuccessor(position, action))
+
+                codes = moveTable.getLegalActionCodes(position)
+                self.assertEqual(list(moveTable.getLegalActions(position)),
+                        [Actions.codeToAction(code) for code in codes])
+
+    def test_off_grid(self):
+        moveTable = getLayout('mediumClassic').getMoveTable()
+
+        # Walls and positions between grid points are not in the table.
+        self.assertIsNone(moveTable.getLegalActions((0, 0)))
+        self.assertIsNone(moveTable.getLegalActions((1.5, 1)))
+        self.assertIsNone(moveTable.getGhostActions((1.5, 1), Directions.EAST))
+        self.assertIsNone(moveTable.isLegalCode((1.5, 1), Actions.STOP_CODE))
+        self.assertIsNone(moveTable.isLegalGhostCode((1.5, 1), Actions.STOP_CODE,
+                Actions.STOP_CODE))
+
+        # Walls and illegal actions have no successor.
+        self.assertIsNone(moveTable.getSuccessor((1, 1), Directions.WEST))
+        self.assertIsNone(moveTable.getSuccessor((0, 0), Directions.EAST))
+
+        # Float positions on a grid point are fine.
+        self.assertEqual(moveTable.getLegalActions((1, 1)), moveTable.getLegalActions((1.0, 1.0)))
+
+    def test_action_codes(self):
+        for action in Actions.getCodedActions():
+            code = Actions.actionToCode(action)
+            self.assertEqual(action, Actions.codeToAction(code))
+            self.assertTrue(0 <= code < Actions.NUM_ACTION_CODES)
+
+        self.assertEqual(Directions.NORTH, Actions.codeToAction(Directions.NORTH))
+
+        with self.assertRaises(ValueError):
+            Actions.actionToCode('Up')
+
+    def test_move_by_code(self):
+        for speed in [1.0, 0.5]:
+            for action in Actions.getCodedActions():
+                byVector = AgentState((3, 2), Directions.WEST, False)
+                byVector.updatePosition(Actions.directionToVector(action, speed))
+
+                byCode = AgentState((3, 2), Directions.WEST, False)
+                byCode.updatePositionByCode(Actions.actionToCode(action), speed)
+
+                self.assertEqual(byVector, byCode)
+                self.assertEqual(byVector.getPosition(), byCode.getPosition())
+                self.assertEqual(byVector.getDirectionCode(), byCode.getDirectionCode())
+                self.assertEqual(Actions.actionToCode(byCode.getDirection()),
+                        byCode.getDirectionCode())
+
+    def test_illegal_actions(self):
+        state = PacmanGameState(getLayout('mediumClassic'))
+
+        # Pacman starts with a wall to the north, and ghosts can never stop.
+        for (agentIndex, action) in [(0, Directions.NORTH), (0, 'Up'), (1, Directions.STOP)]:
+            with self.assertRaises(ValueError):
+                state.generateSuccessor(agentIndex, action)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+
+from pacai.agents.search.base import SearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.distanceCalculator import DistanceTable
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search import heuristic
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+
+# The goal (1, 1) is walled off from pacman.
+NO_PATH_LAYOUT = [
+    '%%%%%',
+    '% % %',
+    '%%%P%',
+    '%%%%%',
+]
+
+"""
+Test the search engine.
+"""
+class SearchEngineTest(unittest.TestCase):
+    def test_optimal(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        searches = [
+            engine.bfs,
+            engine.ucs,
+            lambda problem: engine.astar(problem, heuristic.manhattan),
+            lambda problem: engine.idastar(problem, heuristic.manhattan),
+            engine.jps,
+            lambda problem: engine.jps(problem, heuristic.manhattan),
+        ]
+
+        for search in searches:
+            problem = PositionSearchProblem(state)
+            self.assertEqual(68, problem.actionsCost(search(problem)))
+
+        # A* only expands what it needs to.
+        problem = PositionSearchProblem(state)
+        engine.astar(problem, heuristic.manhattan)
+        self.assertTrue(problem.getExpandedCount() < 269)
+
+    def test_suboptimal(self):
+        state = PacmanGameState(getLayout('bigMaze'))
+
+        for weight in [1.5, 3.0]:
+            problem = PositionSearchProblem(state)
+            actions = engine.wastar(problem, heuristic.manhattan, weight = weight)
+            self.assertTrue(210 <= problem.actionsCost(actions) <= 210 * weight)
+
+        problem = PositionSearchProblem(state)
+        actions = engine.greedy(problem, heuristic.manhattan)
+        self.assertTrue(problem.actionsCost(actions) < 999999)
+
+    def test_food(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        problem = FoodSearchProblem(state)
+        self.assertEqual(27, problem.actionsCost(engine.astar(problem, heuristic.numFood)))
+
+        problem = FoodSearchProblem(state)
+        self.assertEqual(27, problem.actionsCost(engine.ucs(problem)))
+
+    def test_no_path(self):
+        state = PacmanGameState(Layout(NO_PATH_LAYOUT))
+
+        for search in [engine.bfs, engine.ucs, engine.astar, engine.greedy, engine.idastar,
+                engine.jps]:
+            self.assertIsNone(search(PositionSearchProblem(state)))
+
+        # Already at the goal.
+        problem = PositionSearchProblem(state, goal = (3, 1))
+        for search in [engine.bfs, engine.ucs, engine.astar, engine.idastar, engine.jps]:
+            self.assertEqual([], search(problem))
+
+    def test_budget(self):
+        state = PacmanGameState(getLayout('bigMaze'))
+
+        for search in [engine.bfs, engine.ucs, engine.astar, engine.idastar]:
+            with self.assertRaises(engine.SearchBudgetExceededError):
+                search(PositionSearchProblem(state), maxNodes = 50)
+
+        problem = PositionSearchProblem(state)
+        self.assertEqual(210, problem.actionsCost(engine.ucs(problem, maxNodes = 1000)))
+
+    def test_jump_point(self):
+        for name in ['openMaze', 'bigMaze', 'mediumClassic']:
+            layout = getLayout(name)
+            state = PacmanGameState(layout)
+            table = DistanceTable(layout.walls)
+
+            cells = table.getCells()
+            for i in range(0, len(cells), 7):
+                start = cells[i]
+                goal = cells[-1 - (i * 3) % len(cells)]
+
+                problem = PositionSearchProblem(state, start = start, goal = goal)
+                actions = engine.jps(problem, heuristic.manhattan)
+                self.assertEqual(table.getDistance(start, goal), problem.actionsCost(actions))
+
+                x, y = start
+                for action in actions:
+                    dx, dy = Actions.directionToVector(action)
+                    x, y = int(x + dx), int(y + dy)
+
+                self.assertEqual(goal, (x, y))
+
+        # Open areas are jumped across instead of expanded.
+        state = PacmanGameState(getLayout('openMaze'))
+
+        problem = PositionSearchProblem(state)
+        engine.astar(problem, heuristic.manhattan)
+        aStarExpanded = problem.getExpandedCount()
+
+        problem = PositionSearchProblem(state)
+        self.assertEqual(54, problem.actionsCost(engine.jps(problem, heuristic.manhattan)))
+        self.assertTrue(problem.getExpandedCount() * 10 < aStarExpanded)
+
+        # Every expanded jump point is in the visit history, and the goal is last.
+        self.assertEqual(problem.getExpandedCount() + 1, len(problem.getVisitHistory()))
+        self.assertEqual(problem.goal, problem.getVisitHistory()[-1])
+
+        # Only uniform cost position problems are supported.
+        with self.assertRaises(ValueError):
+            engine.jps(PositionSearchProblem(state, costFn = lambda position: 2))
+
+        with self.assertRaises(ValueError):
+            engine.jps(FoodSearchProblem(state))
+
+    def test_agent_short_names(self):
+        agent = SearchAgent(0, fn = 'astar', heuristic = 'pacai.core.search.heuristic.manhattan')
+
+        state = PacmanGameState(getLayout('mediumMaze'))
+        agent.registerInitialState(state)
+        self.assertEqual(68, len(agent._actions))
+
+        agent = SearchAgent(0, fn = 'jps')
+        agent.registerInitialState(state)
+        self.assertEqual(68, len(agent._actions))
+
+        agent = SearchAgent(0, fn = 'bfs')
+        self.assertIs(engine.bfs, agent.searchFunction)
+
+if __name__ == '__main__':
+    unittest.main()
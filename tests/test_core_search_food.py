@@ -0,0 +1,146 @@
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search import heuristic
+from pacai.core.search.food import CompactFoodSearchProblem
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.food import gridHeuristic
+from pacai.core.search.fooddistances import getFoodDistances
+
+SMALL_LAYOUT = [
+    '%%%%%',
+    '%.P.%',
+    '%% .%',
+    '%%%%%',
+]
+
+"""
+Test the food search problems (and the compact (cell id, food bits) version).
+"""
+class FoodSearchProblemTest(unittest.TestCase):
+    def test_grid_states(self):
+        state = PacmanGameState(Layout(SMALL_LAYOUT))
+        problem = FoodSearchProblem(state)
+
+        # The states that student heuristics are written for.
+        position, foodGrid = problem.startingState()
+        self.assertEqual((2, 2), position)
+        self.assertEqual(state.getFood(), foodGrid)
+
+        compact = CompactFoodSearchProblem(state)
+
+        # Both problems describe their states (the start, and after moving west) the same way.
+        gridStart = problem.startingState()
+        compactStart = compact.startingState()
+        pairs = [
+            (gridStart, compactStart),
+            (problem.successorStates(gridStart)[2][0], compact.successorStates(compactStart)[2][0]),
+        ]
+
+        for (gridState, compactState) in pairs:
+            self.assertEqual(compact.getCellId(compactState), problem.getCellId(gridState))
+            self.assertEqual(compact.getFoodBits(compactState), problem.getFoodBits(gridState))
+            self.assertEqual(compact.getNumFood(compactState), problem.getNumFood(gridState))
+            self.assertEqual(compact.toGridState(compactState), problem.toGridState(gridState))
+
+    def test_compact_states(self):
+        state = PacmanGameState(Layout(SMALL_LAYOUT))
+        problem = CompactFoodSearchProblem(state)
+
+        start = problem.startingState()
+        self.assertEqual((2, 2), problem.getPosition(start))
+        self.assertEqual(3, problem.getNumFood(start))
+        self.assertFalse(problem.isGoal(start))
+
+        self.assertEqual(sorted(state.getFood().asList()), sorted(problem.getFoodPositions()))
+        self.assertEqual(state.getFood(), problem.getFoodGrid(start))
+
+        successors = problem.successorStates(start)
+        self.assertEqual([Directions.SOUTH, Directions.EAST, Directions.WEST],
+                [action for (nextState, action, cost) in successors])
+
+        # Moving west eats the food at (1, 2).
+        west = successors[2][0]
+        self.assertEqual((1, 2), problem.getPosition(west))
+        self.assertEqual(2, problem.getNumFood(west))
+        self.assertEqual([(3, 1), (3, 2)], sorted(problem.getFoodPositions(west)))
+
+        position, foodGrid = problem.toGridState(west)
+        self.assertEqual((1, 2), position)
+        self.assertFalse(foodGrid[1][2])
+        self.assertEqual(2, foodGrid.count())
+
+        # Moving south (onto an empty cell) keeps all the food.
+        south = successors[0][0]
+        self.assertEqual(start[1], south[1])
+
+        # States are plain, hashable values.
+        self.assertEqual(west, problem.successorStates(start)[2][0])
+        self.assertEqual(1, len({west, problem.successorStates(start)[2][0]}))
+
+    def test_search(self):
+        state = PacmanGameState(Layout(SMALL_LAYOUT))
+
+        for problem in [FoodSearchProblem(state), CompactFoodSearchProblem(state)]:
+            actions = engine.astar(problem, heuristic.numFood)
+            self.assertEqual(4, problem.actionsCost(actions))
+
+        # A heuristic written for (position, food grid) states.
+        def remainingFood(gridState, problem):
+            position, foodGrid = gridState
+            return len(foodGrid.asList())
+
+        problem = CompactFoodSearchProblem(PacmanGameState(getLayout('trickySearch')))
+        actions = engine.astar(problem, gridHeuristic(remainingFood))
+        self.assertEqual(60, problem.actionsCost(actions))
+
+        self.assertEqual(999999, problem.actionsCost([Directions.NORTH] * 10))
+
+    def test_food_distances(self):
+        state = PacmanGameState(Layout(SMALL_LAYOUT))
+        problem = CompactFoodSearchProblem(state)
+        start = problem.startingState()
+
+        self.assertEqual(2, heuristic.farthestFood(start, problem))
+
+        # The nearest food is one away, and the tree over the food is 2 + 1 long.
+        self.assertEqual(4, heuristic.foodSpanningTree(start, problem))
+
+        distances = getFoodDistances(problem)
+        self.assertIs(distances, problem.heuristicInfo['foodDistances'])
+        self.assertEqual(3, distances.getSpanningTreeLength(start[1]))
+        self.assertEqual(0, distances.getSpanningTreeLength(0))
+
+        foods = problem.getFoodPositions()
+        self.assertEqual(2, distances.getFoodDistance(foods.index((1, 2)), foods.index((3, 2))))
+
+        # Same food left at another position, so only the nearest food is looked up again.
+        hits = distances.getHits()
+        misses = distances.getMisses()
+
+        south = problem.successorStates(start)[0][0]
+        self.assertEqual(1 + 3, heuristic.foodSpanningTree(south, problem))
+        self.assertEqual(hits + 2, distances.getHits())
+        self.assertEqual(misses, distances.getMisses())
+
+    def test_food_heuristics(self):
+        state = PacmanGameState(getLayout('trickySearch'))
+
+        problem = FoodSearchProblem(state)
+        engine.astar(problem, heuristic.numFood)
+        numFoodExpanded = problem.getExpandedCount()
+
+        for foodHeuristic in [heuristic.farthestFood, heuristic.foodSpanningTree]:
+            for problemClass in [FoodSearchProblem, CompactFoodSearchProblem]:
+                problem = problemClass(state)
+                actions = engine.astar(problem, foodHeuristic)
+
+                self.assertEqual(60, problem.actionsCost(actions))
+                self.assertTrue(problem.getExpandedCount() < numFoodExpanded / 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import unittest
+
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.topology import Topology
+
+# A loop on the left, with a dead end (along the bottom and up the right side) coming off it.
+TEST_LAYOUT = [
+    '%%%%%%%%',
+    '%   %% %',
+    '% % %% %',
+    '%      %',
+    '%%%%%%%%',
+]
+
+# A loop (on the right) that hangs off the loopy core (on the left) through a single cell.
+LOOP_DEAD_END_LAYOUT = [
+    '%%%%%%%%%',
+    '%    %  %',
+    '%       %',
+    '%%%%%%%%%',
+]
+
+# A maze without any loops, centered on (3, 2).
+TREE_LAYOUT = [
+    '%%%%%%%',
+    '% % % %',
+    '%     %',
+    '% % % %',
+    '%%%%%%%',
+]
+
+"""
+Test the maze topology index.
+"""
+class TopologyTest(unittest.TestCase):
+    def test_dead_ends(self):
+        topology = Topology(Layout(TEST_LAYOUT).walls)
+
+        self.assertEqual(5, topology.getDeadEndDepth((6, 3)))
+        self.assertEqual(4, topology.getDeadEndDepth((6, 2)))
+        self.assertEqual(1, topology.getDeadEndDepth((4, 1)))
+        self.assertEqual(0, topology.getDeadEndDepth((3, 1)))
+        self.assertEqual((3, 1), topology.getDeadEndExit((6, 3)))
+        self.assertTrue(topology.isInDeadEnd((6, 2)))
+
+        # The loop is not a dead end.
+        self.assertFalse(topology.isInDeadEnd((2, 3)))
+        self.assertIsNone(topology.getDeadEndExit((2, 3)))
+
+        self.assertIsNone(topology.getDeadEndDepth((0, 0)))
+        self.assertIsNone(topology.getDeadEndDepth((-1, 20)))
+
+        # Grid positions may be floats.
+        self.assertEqual(5, topology.getDeadEndDepth((6.0, 3.0)))
+        self.assertEqual(topology.getCellId((6, 3)), topology.getCellId((6.0, 3.0)))
+        self.assertIsNone(topology.getCellId((6.5, 3.0)))
+
+    def test_loop_dead_ends(self):
+        topology = Topology(Layout(LOOP_DEAD_END_LAYOUT).walls)
+
+        expected = {(5, 1): 1, (6, 1): 2, (6, 2): 3, (7, 1): 3, (7, 2): 4}
+        for cell in topology.getCells():
+            self.assertEqual(expected.get(cell, 0), topology.getDeadEndDepth(cell), cell)
+
+            if (cell in expected):
+                self.assertEqual((4, 1), topology.getDeadEndExit(cell))
+            else:
+                self.assertIsNone(topology.getDeadEndExit(cell))
+
+    def test_tree_dead_ends(self):
+        topology = Topology(Layout(TREE_LAYOUT).walls)
+
+        # Every branch is a dead end that is left through the center.
+        self.assertFalse(topology.isInDeadEnd((3, 2)))
+        for (x, y) in topology.getCells():
+            if ((x, y) != (3, 2)):
+                self.assertEqual((3, 2), topology.getDeadEndExit((x, y)))
+                self.assertEqual(abs(x - 3) + abs(y - 2), topology.getDeadEndDepth((x, y)))
+
+        # A single corridor.
+        topology = Topology(Layout(['%%%%%%%', '%     %', '%%%%%%%']).walls)
+        self.assertEqual(2, topology.getDeadEndDepth((1, 1)))
+        self.assertEqual((3, 1), topology.getDeadEndExit((1, 1)))
+        self.assertEqual((3, 1), topology.getDeadEndExit((5, 1)))
+        self.assertFalse(topology.isInDeadEnd((3, 1)))
+
+    def test_dead_end_exits(self):
+        # Walling off the exit of a dead end cuts it off from the rest of the maze.
+        layout = getLayout('defaultCapture')
+        topology = layout.getTopology()
+        cells = topology.getCells()
+
+        for cell in cells:
+            deadEndExit = topology.getDeadEndExit(cell)
+            if (deadEndExit is None):
+                continue
+
+            reached = _reach(layout, cell, deadEndExit)
+            self.assertTrue(len(reached) < len(cells) / 2, cell)
+            self.assertTrue(all(topology.getDeadEndExit(other) == deadEndExit
+                    for other in reached), cell)
+
+    def test_articulation_points(self):
+        topology = Topology(Layout(TEST_LAYOUT).walls)
+
+        expected = [(3, 1), (4, 1), (5, 1), (6, 1), (6, 2)]
+        self.assertEqual(expected, topology.getArticulationPoints())
+
+        self.assertTrue(topology.isArticulationPoint((4, 1)))
+        self.assertFalse(topology.isArticulationPoint((1, 1)))
+        self.assertIsNone(topology.isArticulationPoint((0, 0)))
+
+        # Compare against walling off each cell.
+        layout = getLayout('mediumClassic')
+        topology = layout.getTopology()
+
+        for cell in layout.walls.asList(False):
+            self.assertEqual(_splits(layout, cell), topology.isArticulationPoint(cell), cell)
+
+    def test_corridors(self):
+        layout = getLayout('mediumClassic')
+        topology = layout.getTopology()
+        cells = topology.getCells()
+
+        # Every non-junction cell is in exactly one corridor.
+        counts = [0] * topology.getNumCells()
+        for (first, last, interior) in topology.getCorridors():
+            self.assertTrue(topology.isJunction(cells[first]))
+            self.assertTrue(topology.isJunction(cells[last]))
+
+            path = [first] + list(interior) + [last]
+            for i in range(len(path) - 1):
+                self.assertIn(path[i + 1], topology.getNeighbors(path[i]))
+
+            for offset, cellId in enumerate(interior):
+                counts[cellId] += 1
+                self.assertEqual(offset, topology.getCorridorOffset(cells[cellId]))
+                self.assertEqual(topology.getCorridors()[topology.getCorridor(cells[cellId])],
+                        (first, last, interior))
+
+        for cellId in range(topology.getNumCells()):
+            if (topology.isJunction(cells[cellId])):
+                self.assertEqual(0, counts[cellId])
+                self.assertIsNone(topology.getCorridor(cells[cellId]))
+            else:
+                self.assertEqual(1, counts[cellId])
+
+        # A loop without any junctions.
+        topology = Topology(Layout(['%%%%', '%  %', '%  %', '%%%%']).walls)
+        self.assertEqual(1, len(topology.getJunctions()))
+        self.assertEqual(1, len(topology.getCorridors()))
+        self.assertEqual(3, len(topology.getCorridors()[0][2]))
+
+    def test_borders(self):
+        layout = getLayout('defaultCapture')
+        topology = layout.getTopology()
+
+        self.assertIs(topology, layout.getTopology())
+
+        redMask = layout.getRedSideMask()
+        height = layout.getHeight()
+
+        self.assertTrue(len(topology.getRedBorder()) > 0)
+        self.assertEqual(len(topology.getRedBorder()), len(topology.getBlueBorder()))
+
+        for ((redX, redY), (blueX, blueY)) in zip(topology.getRedBorder(),
+                topology.getBlueBorder()):
+            self.assertTrue(redMask & (1 << (redX * height + redY)))
+            self.assertFalse(redMask & (1 << (blueX * height + blueY)))
+            self.assertEqual((redX + 1, redY), (blueX, blueY))
+            self.assertFalse(layout.isWall((redX, redY)))
+            self.assertFalse(layout.isWall((blueX, blueY)))
+
+def _splits(layout, removed):
+    """
+    Check if walling off a cell splits the other cells in its piece of the maze.
+    """
+
+    x, y = removed
+    neighbors = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+    neighbors = [cell for cell in neighbors if not layout.isWall(cell)]
+    if (len(neighbors) <= 1):
+        return False
+
+    reached = {removed, neighbors[0]}
+    fringe = [neighbors[0]]
+
+    while (fringe):
+        x, y = fringe.pop()
+        for cell in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+            if (not layout.isWall(cell) and cell not in reached):
+                reached.add(cell)
+                fringe.append(cell)
+
+    return any(cell not in reached for cell in neighbors)
+
+def _reach(layout, start, removed):
+    """
+    Get the cells that can be reached from a cell after walling off another cell.
+    """
+
+    reached = {start}
+    fringe = [start]
+
+    while (fringe):
+        x, y = fringe.pop()
+        for cell in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+            if (not layout.isWall(cell) and cell != removed and cell not in reached):
+                reached.add(cell)
+                fringe.append(cell)
+
+    return reached
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,22 @@
 import os
+import pickle
 import tempfile
 import unittest
 
 from pacai.bin import capture
 from pacai.bin import pacman
+from pacai.core.actions import Actions
+from pacai.core.layout import getLayout
 
 PACMAN_FILENAME = 'pacai_unittest_pacman.replay'
 CAPTURE_FILENAME = 'pacai_unittest_capture.replay'
 
+# Replays recorded before grids were bitboards, layouts had fingerprints,
+# and actions were recorded as codes.
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+LEGACY_PACMAN_PATH = os.path.join(DATA_DIR, 'legacy_pacman.replay')
+LEGACY_CAPTURE_PATH = os.path.join(DATA_DIR, 'legacy_capture.replay')
+
 """
 Test saving and playing replays.
 """
@@ -24,6 +33,45 @@ class ReplayTest(unittest.TestCase):
 
         os.remove(replayPath)
 
+    def test_pacman_string_actions(self):
+        replayPath = os.path.join(tempfile.gettempdir(), PACMAN_FILENAME)
+
+        pacman.main(['--null-graphics', '--fps=500', '-p', 'GreedyAgent', '--record', replayPath])
+
+        with open(replayPath, 'rb') as file:
+            recorded = pickle.load(file)
+
+        # Actions are recorded as codes, but replays recorded as strings still play.
+        for agentIndex, action in recorded['actions']:
+            self.assertIsInstance(action, int)
+
+        recorded['actions'] = [(agentIndex, Actions.codeToAction(action))
+                for agentIndex, action in recorded['actions']]
+
+        with open(replayPath, 'wb') as file:
+            pickle.dump(recorded, file)
+
+        pacman.main(['--null-graphics', '--replay', replayPath])
+
+        os.remove(replayPath)
+
+    def test_legacy_replays(self):
+        with open(LEGACY_PACMAN_PATH, 'rb') as file:
+            recorded = pickle.load(file)
+
+        self.assertEqual(getLayout('smallClassic'), recorded['layout'])
+        self.assertEqual(getLayout('smallClassic').food, recorded['layout'].food)
+        for agentIndex, action in recorded['actions']:
+            self.assertIsInstance(action, str)
+
+        with open(LEGACY_CAPTURE_PATH, 'rb') as file:
+            recorded = pickle.load(file)
+
+        self.assertEqual(getLayout('testCapture'), recorded['layout'])
+
+        pacman.main(['--null-graphics', '--replay', LEGACY_PACMAN_PATH])
+        capture.main(['--null-graphics', '--replay', LEGACY_CAPTURE_PATH])
+
     def test_capture(self):
         replayPath = os.path.join(tempfile.gettempdir(), CAPTURE_FILENAME)
 
@@ -52,5 +52,62 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_priority_queue_ties(self):
+        testPriorityQueue = priorityQueue.PriorityQueue()
+
+        # Items that can't be compared come out in the order they went in.
+        items = [{'value': x} for x in range(5)]
+        for item in items:
+            testPriorityQueue.push(item, 0)
+
+        for item in items:
+            self.assertIs(item, testPriorityQueue.pop())
+
+    def test_indexed_priority_queue(self):
+        testPriorityQueue = priorityQueue.IndexedPriorityQueue()
+        self.assertTrue(testPriorityQueue.isEmpty())
+
+        for x in range(1, 10):
+            testPriorityQueue.push(x, x)
+
+        self.assertIn(5, testPriorityQueue)
+        self.assertNotIn(10, testPriorityQueue)
+        self.assertEqual(9, len(testPriorityQueue))
+
+        # Change priorities in both directions, and take one item out.
+        testPriorityQueue.update(9, 0)
+        testPriorityQueue.update(1, 20)
+        testPriorityQueue.remove(5)
+        self.assertNotIn(5, testPriorityQueue)
+        self.assertEqual(20, testPriorityQueue.getPriority(1))
+
+        # Same priority, first come first served.
+        testPriorityQueue.update(10, 3)
+
+        expected = [9, 2, 3, 10, 4, 6, 7, 8, 1]
+        self.assertEqual(len(expected), len(testPriorityQueue))
+
+        actual = []
+        while (not testPriorityQueue.isEmpty()):
+            actual.append(testPriorityQueue.pop())
+
+        self.assertEqual(expected, actual)
+
+    def test_indexed_priority_queue_heap_size(self):
+        testPriorityQueue = priorityQueue.IndexedPriorityQueue()
+
+        for x in range(100):
+            testPriorityQueue.push(x, 1000)
+
+        for priority in range(999, 0, -1):
+            for x in range(100):
+                testPriorityQueue.update(x, priority)
+
+        # Entries for old priorities do not pile up.
+        self.assertEqual(100, len(testPriorityQueue))
+        self.assertTrue(len(testPriorityQueue._heap) <= 201)
+
+        self.assertEqual((0, 1), testPriorityQueue.popWithPriority())
+
 if __name__ == '__main__':
     unittest.main()